@@ -21,6 +21,7 @@
   const btnRunStep = document.getElementById('btn-run-step');
   const btnRunPipeline = document.getElementById('btn-run-pipeline');
   const btnRefresh = document.getElementById('btn-refresh');
+  const btnCancelJob = document.getElementById('btn-cancel-job');
   const btnRefreshArtifacts = document.getElementById('btn-refresh-artifacts');
   const progressValueEl = document.getElementById('progress-value');
   const progressFillEl = document.getElementById('progress-fill');
@@ -45,6 +46,13 @@
   let currentStatus = null;
   let guidedEnabled = false;
   let isRunning = false;
+  let currentJob = null;
+  const JOB_POLL_MS = 1000;
+  const JOB_DONE = ['ok', 'error', 'cancelled'];
+  const STREAMED_LOG = 'phase9_pipeline.log';
+  const logOffsets = {};
+  let logStream = null;
+  let artifactsEtag = null;
 
   function buildStepper(){
     STEPS.forEach((step, index) => {
@@ -341,7 +349,10 @@
       artifactsEl.appendChild(title);
       (files || []).forEach(file => {
         const li = document.createElement('li');
-        li.textContent = file;
+        const details = [formatBytes(file.size)];
+        if(file.rows !== null && file.rows !== undefined) details.push(`${file.rows.toLocaleString()} linhas`);
+        details.push(new Date(file.mtime * 1000).toLocaleString());
+        li.textContent = `${file.path} · ${details.join(' · ')}`;
         artifactsEl.appendChild(li);
       });
     });
@@ -353,17 +364,57 @@
     renderStatus(status);
   }
 
+  function formatBytes(size){
+    const units = ['B', 'KB', 'MB', 'GB'];
+    let value = size;
+    let unit = 0;
+    while(value >= 1024 && unit < units.length - 1){
+      value /= 1024;
+      unit += 1;
+    }
+    return `${unit ? value.toFixed(1) : value} ${units[unit]}`;
+  }
+
   async function refreshArtifacts(){
-    const artifacts = await fetchJSON('/api/artifacts');
-    renderArtifacts(artifacts);
+    const headers = artifactsEtag ? { 'If-None-Match': artifactsEtag } : {};
+    const response = await fetch('/api/artifacts', { headers });
+    if(response.status === 304) return;
+    if(!response.ok){
+      throw new Error(`/api/artifacts -> ${response.status}: ${await response.text()}`);
+    }
+    artifactsEtag = response.headers.get('ETag');
+    renderArtifacts(await response.json());
+  }
+
+  function startLogStream(){
+    if(logStream || !window.EventSource || logOffsets[STREAMED_LOG] === undefined) return;
+    const url = `/api/logs/stream?file=${encodeURIComponent(STREAMED_LOG)}&offset=${logOffsets[STREAMED_LOG]}`;
+    logStream = new EventSource(url);
+    logStream.addEventListener('log', event => {
+      logOffsets[STREAMED_LOG] = Number(event.lastEventId);
+      event.data.split('\n').forEach(line => appendLog(line));
+    });
+    logStream.addEventListener('reset', () => appendLog(`--- ${STREAMED_LOG} reiniciado ---`));
   }
 
   async function refreshLogs(){
-    const logPayload = await fetchJSON('/api/logs');
-    const newest = Object.entries(logPayload.logs || {}).map(([name, text]) => `--- ${name} ---\n${text.trim()}`).join('\n\n');
-    appendLog(`Logs atualizados (${Object.keys(logPayload.logs || {}).length} ficheiros)`);
-    if(newest){
-      appendLog(newest);
+    // Only the bytes appended since the last refresh are fetched; the
+    // pipeline log itself arrives through the event stream.
+    if(!Object.keys(logOffsets).length){
+      const listing = await fetchJSON('/api/logs');
+      Object.entries(listing.logs || {}).forEach(([name, text]) => {
+        if(text.trim()) appendLog(`--- ${name} ---\n${text.trim()}`);
+      });
+      Object.assign(logOffsets, listing.offsets || {});
+      appendLog(`Logs carregados (${Object.keys(listing.files || {}).length} ficheiros)`);
+      startLogStream();
+      return;
+    }
+    for(const name of Object.keys(logOffsets)){
+      if(logStream && name === STREAMED_LOG) continue;
+      const page = await fetchJSON(`/api/logs?file=${encodeURIComponent(name)}&offset=${logOffsets[name]}`);
+      logOffsets[name] = page.next_offset;
+      if(page.text.trim()) appendLog(`--- ${name} ---\n${page.text.trim()}`);
     }
   }
 
@@ -379,59 +430,92 @@
     isRunning = value;
     btnRunStep.disabled = value;
     btnRunPipeline.disabled = value;
+    if(btnCancelJob) btnCancelJob.disabled = !value;
     btnGuidedRun.disabled = value || !guidedEnabled;
     btnGuidedSkip.disabled = value || !guidedEnabled;
     updateNavButtons();
     renderGuided(currentStatus);
   }
 
-  async function runStep(slug){
-    appendLog(`Execução do passo ${slug} iniciada...`);
-    try{
-      setRunning(true);
-      const payload = overridesForStep(slug);
-      const result = await fetchJSON(`/api/run/${slug}`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(payload),
+  function sleep(ms){
+    return new Promise(resolve => setTimeout(resolve, ms));
+  }
+
+  async function submitJob(slug, payload){
+    const response = await fetchJSON(`/api/run/${slug}`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(payload),
+    });
+    if(response.coalesced){
+      appendLog(`Pedido juntado ao job ${response.job.id} já em curso.`);
+    }
+    return response.job;
+  }
+
+  async function waitForJob(job){
+    currentJob = job;
+    const seen = {};
+    while(!JOB_DONE.includes(job.status)){
+      await sleep(JOB_POLL_MS);
+      job = (await fetchJSON(`/api/jobs/${job.id}`)).job;
+      currentJob = job;
+      (job.steps || []).forEach(step => {
+        if(seen[step.slug] !== step.status){
+          seen[step.slug] = step.status;
+          if(step.status !== 'pending') appendLog(`Job ${job.id} · ${step.slug}: ${step.status}`);
+        }
       });
-      appendLog(`Passo ${slug} concluído: ${JSON.stringify(result.step || result)}`);
       await refreshStatus();
-      await refreshArtifacts();
-    }catch(err){
-      appendLog(`Erro ao executar ${slug}: ${err.message}`);
-    }finally{
-      setRunning(false);
     }
+    currentJob = null;
+    return job;
   }
 
-  async function runPipeline(){
-    appendLog('Execução do pipeline completo iniciada...');
+  async function runJob(slug, payload, label){
+    appendLog(`${label} iniciada...`);
     try{
       setRunning(true);
-      const payload = overridesForPipeline();
-      const result = await fetchJSON('/api/run/pipeline', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(payload),
-      });
-      appendLog('Pipeline concluído.');
-      if(result.steps){
-        appendLog(JSON.stringify(result.steps));
+      const job = await waitForJob(await submitJob(slug, payload));
+      if(job.status === 'ok'){
+        appendLog(`${label} concluída (${job.completed}/${job.total} passos).`);
+      } else if(job.status === 'cancelled'){
+        appendLog(`${label} cancelada.`);
+      } else {
+        appendLog(`Erro em ${label}: ${job.error}`);
       }
       await refreshAll();
     }catch(err){
-      appendLog(`Erro no pipeline: ${err.message}`);
+      appendLog(`Erro em ${label}: ${err.message}`);
     }finally{
       setRunning(false);
     }
   }
 
+  function runStep(slug){
+    return runJob(slug, overridesForStep(slug), `Execução do passo ${slug}`);
+  }
+
+  function runPipeline(){
+    return runJob('pipeline', overridesForPipeline(), 'Execução do pipeline completo');
+  }
+
+  async function cancelJob(){
+    if(!currentJob) return;
+    try{
+      await fetchJSON(`/api/jobs/${currentJob.id}/cancel`, { method: 'POST' });
+      appendLog(`Cancelamento pedido; o job ${currentJob.id} pára antes do próximo passo.`);
+    }catch(err){
+      appendLog(`Erro ao cancelar: ${err.message}`);
+    }
+  }
+
   btnPrev.addEventListener('click', () => selectStep(currentIndex - 1));
   btnNext.addEventListener('click', () => selectStep(currentIndex + 1));
   btnRunStep.addEventListener('click', () => runStep(STEPS[currentIndex].slug));
   btnRunPipeline.addEventListener('click', () => runPipeline());
   btnRefresh.addEventListener('click', () => refreshAll());
+  if(btnCancelJob) btnCancelJob.addEventListener('click', () => cancelJob());
   btnRefreshArtifacts.addEventListener('click', () => refreshArtifacts());
   toggleGuided.addEventListener('change', () => {
     guidedEnabled = toggleGuided.checked;
@@ -8,9 +8,9 @@ from pathlib import Path
 from typing import Any, Dict
 import json
 import logging
-import os
 
 from app.logging_utils import initialize_logging_if_requested
+from .events import EventLogger
 
 
 initialize_logging_if_requested()
@@ -21,6 +21,7 @@ INPUTS_DIR = ARTIFACTS_ROOT / "inputs"
 WORKING_DIR = ARTIFACTS_ROOT / "working"
 OUTPUTS_DIR = ARTIFACTS_ROOT / "outputs"
 LOGS_DIR = ARTIFACTS_ROOT / "logs"
+CACHE_DIR = ARTIFACTS_ROOT / "cache"
 PHASE9_LOG = LOGS_DIR / "phase9_pipeline.log"
 GUI_LOG = LOGS_DIR / "gui_actions.log"
 
@@ -53,31 +54,41 @@ class LogRecord:
         return json.dumps(payload, ensure_ascii=False)
 
 
+_EVENTS = EventLogger(PHASE9_LOG)
+
+
 def log_event(step: str, message: str, *, status: str = "info", extra: Dict[str, Any] | None = None) -> None:
-    """Append a structured log entry to the Phase 9 pipeline log."""
+    """Queue a structured log entry for the Phase 9 pipeline log.
+
+    The entry is serialized once here; a background writer appends it to the
+    log, mirrors it to stdout and the ``barcode.pipeline`` logger.
+    """
 
-    ensure_directories()
     record = LogRecord(step=step, message=message, status=status, extra=extra)
-    with open(PHASE9_LOG, "a", encoding="utf-8") as fh:
-        fh.write(record.to_json() + os.linesep)
-    # Mirror to stdout for CLI friendliness.
-    print(f"[{status.upper()}] {step}: {message}")
-    logging.getLogger("barcode.pipeline").log(
+    _EVENTS.emit(
         getattr(logging, status.upper(), logging.INFO),
-        "%s",
+        f"[{status.upper()}] {step}: {message}",
         record.to_json(),
     )
 
 
+def flush_events() -> None:
+    """Wait until every queued log entry has been written to disk."""
+
+    _EVENTS.flush()
+
+
 __all__ = [
     "ARTIFACTS_ROOT",
     "INPUTS_DIR",
     "WORKING_DIR",
     "OUTPUTS_DIR",
     "LOGS_DIR",
+    "CACHE_DIR",
     "PHASE9_LOG",
     "GUI_LOG",
     "SMART_MODE",
     "ensure_directories",
     "log_event",
+    "flush_events",
 ]
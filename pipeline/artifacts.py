@@ -0,0 +1,213 @@
+"""In-memory index of the artifact folders served by the GUI backend."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import ARTIFACTS_ROOT
+
+BUCKETS = ("working", "outputs", "logs")
+# Buckets whose files are appended to in place, so their directory mtime
+# does not change: these few files are re-stat'ed on every refresh.
+LIVE_BUCKETS = ("logs",)
+FULL_RESCAN_S = 60.0
+COUNT_CHUNK = 1 << 20
+
+
+def _count_newlines(path: Path, start: int = 0) -> int:
+    count = 0
+    with path.open("rb") as fh:
+        fh.seek(start)
+        for chunk in iter(lambda: fh.read(COUNT_CHUNK), b""):
+            count += chunk.count(b"\n")
+    return count
+
+
+def _sqlite_rows(path: Path) -> Optional[int]:
+    try:
+        conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+
+def row_count(path: Path, previous: Optional[dict] = None, stat: Optional[os.stat_result] = None) -> Optional[int]:
+    """Data rows in an artifact (CSV minus its header, JSONL/log lines, SQLite products).
+
+    ``previous`` is the entry from the last refresh: a log that only grew is
+    counted from where it ended.
+    """
+
+    suffix = path.suffix
+    try:
+        if suffix == ".log":
+            if previous and stat and previous.get("rows") is not None and previous["inode"] == stat.st_ino \
+                    and stat.st_size >= previous["size"]:
+                return previous["rows"] + _count_newlines(path, previous["size"])
+            return _count_newlines(path)
+        if suffix == ".jsonl":
+            return _count_newlines(path)
+        if suffix == ".csv":
+            return max(0, _count_newlines(path) - 1)
+        if suffix == ".sqlite":
+            return _sqlite_rows(path)
+    except OSError:
+        return None
+    return None
+
+
+class ArtifactIndex:
+    """Sizes, row counts and timestamps of every file under the artifact buckets.
+
+    A refresh only stats directories: a folder is listed again when its
+    mtime changes (files added, removed or renamed into place), and its
+    files are stat'ed again then. Files rewritten in place are picked up
+    through :meth:`invalidate`, which the job queue calls with each step's
+    artifacts, and by a full rescan every ``full_rescan_s`` seconds. Row
+    counts are only recomputed for files whose size or mtime changed.
+    """
+
+    def __init__(
+        self,
+        root: Path = ARTIFACTS_ROOT,
+        buckets: Iterable[str] = BUCKETS,
+        *,
+        live_buckets: Iterable[str] = LIVE_BUCKETS,
+        full_rescan_s: float = FULL_RESCAN_S,
+    ) -> None:
+        self.root = root
+        self.buckets = tuple(buckets)
+        self.live_buckets = tuple(live_buckets)
+        self.full_rescan_s = full_rescan_s
+        self._lock = threading.Lock()
+        self._dirs: Dict[Path, Tuple[int, List[Path], List[Path]]] = {}
+        self._files: Dict[Path, dict] = {}
+        self._dirty: Set[Path] = set()
+        self._last_full = 0.0
+        self._cached: Optional[Tuple[str, bytes]] = None
+
+    def invalidate(self, paths: Optional[Iterable[object]] = None) -> None:
+        """Mark files (and their folders) as changed; ``None`` rescans everything."""
+
+        with self._lock:
+            if paths is None:
+                self._dirs.clear()
+                return
+            for path in (Path(os.path.abspath(str(path))) for path in paths):
+                self._dirty.add(path)
+                self._dirs.pop(path.parent, None)
+
+    def snapshot(self) -> Tuple[str, bytes]:
+        """The current listing as (ETag, JSON bytes); rebuilt only after a change."""
+
+        with self._lock:
+            if time.monotonic() - self._last_full >= self.full_rescan_s:
+                self._dirs.clear()
+                self._last_full = time.monotonic()
+            changed = False
+            for bucket in self.buckets:
+                changed |= self._scan(self.root / bucket)
+            live = [path for path in self._files if self._bucket(path) in self.live_buckets]
+            for path in set(live) | self._dirty:
+                changed |= self._restat(path)
+            self._dirty.clear()
+            if changed or self._cached is None:
+                body = json.dumps({"artifacts": self._listing()}, ensure_ascii=False).encode("utf-8")
+                self._cached = (f'"{hashlib.sha1(body).hexdigest()[:20]}"', body)
+            return self._cached
+
+    def listing(self) -> Dict[str, List[dict]]:
+        return json.loads(self.snapshot()[1])["artifacts"]
+
+    # Internals ---------------------------------------------------------------
+    def _bucket(self, path: Path) -> Optional[str]:
+        try:
+            return path.relative_to(self.root).parts[0]
+        except (ValueError, IndexError):
+            return None
+
+    def _scan(self, directory: Path) -> bool:
+        try:
+            mtime = directory.stat().st_mtime_ns
+        except OSError:
+            return self._forget(directory)
+        cached = self._dirs.get(directory)
+        changed = False
+        if cached is None or cached[0] != mtime:
+            subdirs: List[Path] = []
+            files: List[Path] = []
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(Path(entry.path))
+                    elif entry.is_file():
+                        files.append(Path(entry.path))
+            if cached:
+                known_files, known_dirs = set(cached[2]), set(cached[1])
+            else:
+                below = [path for path in self._files if directory in path.parents]
+                known_files = {path for path in below if path.parent == directory}
+                known_dirs = {directory / path.relative_to(directory).parts[0] for path in below} - known_files
+            for gone in known_files - set(files):
+                changed |= self._files.pop(gone, None) is not None
+            for gone in known_dirs - set(subdirs):
+                changed |= self._forget(gone)
+            for path in files:
+                changed |= self._restat(path)
+            self._dirs[directory] = (mtime, subdirs, files)
+        else:
+            subdirs = cached[1]
+        for subdir in subdirs:
+            changed |= self._scan(subdir)
+        return changed
+
+    def _forget(self, directory: Path) -> bool:
+        dirs = [path for path in self._dirs if path == directory or directory in path.parents]
+        files = [path for path in self._files if directory in path.parents]
+        for path in dirs:
+            del self._dirs[path]
+        for path in files:
+            del self._files[path]
+        return bool(files)
+
+    def _restat(self, path: Path) -> bool:
+        try:
+            stat = path.stat()
+        except OSError:
+            return self._files.pop(path, None) is not None
+        previous = self._files.get(path)
+        if previous and (previous["size"], previous["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            return False
+        if self._bucket(path) not in self.buckets:
+            return False
+        self._files[path] = {
+            "path": str(path.relative_to(self.root)),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "mtime_ns": stat.st_mtime_ns,
+            "inode": stat.st_ino,
+            "rows": row_count(path, previous, stat),
+        }
+        return True
+
+    def _listing(self) -> Dict[str, List[dict]]:
+        listing: Dict[str, List[dict]] = {bucket: [] for bucket in self.buckets}
+        for path in sorted(self._files):
+            entry = self._files[path]
+            listing[self._bucket(path)].append(
+                {"path": entry["path"], "size": entry["size"], "mtime": entry["mtime"], "rows": entry["rows"]}
+            )
+        return listing
+
+
+__all__ = ["ArtifactIndex", "BUCKETS", "row_count"]
@@ -4,18 +4,67 @@ from __future__ import annotations
 
 import argparse
 import csv
+from collections import Counter
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional
 
+from scripts.python import classify_products_v2
 from scripts.python.classify_products_v2 import classify, norm_brand, up
+from scripts.python.textnorm import cache_counters, cache_stats
 
 from . import WORKING_DIR, ensure_directories, log_event
 from .models import StepResult
+from .sharding import read_header, run_sharded
 
 
-def classify_file(input_path: Path, output_path: Path) -> int:
+def classify_row(row: Dict[str, str]) -> Dict[str, str]:
+    row["brand"] = norm_brand(row.get("brand", ""))
+    fam, sub = classify(
+        up(row.get("name", "")),
+        up(row.get("category_raw", "")),
+        up(row.get("country", "")),
+    )
+    row["family"], row["subfamily"] = fam, sub
+    return row
+
+
+def classify_rows(rows: Iterable[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+    """Generator stage used by the streaming runner and :func:`classify_file`."""
+
+    for row in rows:
+        yield classify_row(row)
+
+
+def warm_worker() -> None:
+    """Pool initializer: make the dictionaries and matchers available.
+
+    Forked workers inherit the copy the parent loaded before starting the
+    pool; spawned ones read the compiled dictionary cache instead of
+    re-parsing the CSVs.
+    """
+
+    classify_products_v2.dictionaries()
+
+
+def classify_file(input_path: Path, output_path: Path, workers: int = 1, stats: Optional[Counter] = None) -> int:
     ensure_directories()
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    if workers > 1:
+        classify_products_v2.dictionaries()
+        _, fieldnames = read_header(input_path)
+        for column in ("family", "subfamily"):
+            if column not in fieldnames:
+                fieldnames.append(column)
+        return run_sharded(
+            input_path,
+            output_path,
+            stage=classify_rows,
+            fieldnames=fieldnames,
+            workers=workers,
+            initializer=warm_worker,
+            counters=cache_counters,
+            stats=stats,
+        )
 
     count = 0
     with input_path.open("r", newline="", encoding="utf-8") as src, output_path.open(
@@ -29,14 +78,7 @@ def classify_file(input_path: Path, output_path: Path) -> int:
             fieldnames.append("subfamily")
         writer = csv.DictWriter(dst, fieldnames=fieldnames)
         writer.writeheader()
-        for row in reader:
-            row["brand"] = norm_brand(row.get("brand", ""))
-            fam, sub = classify(
-                up(row.get("name", "")),
-                up(row.get("category_raw", "")),
-                up(row.get("country", "")),
-            )
-            row["family"], row["subfamily"] = fam, sub
+        for row in classify_rows(reader):
             writer.writerow(row)
             count += 1
     return count
@@ -45,12 +87,16 @@ def classify_file(input_path: Path, output_path: Path) -> int:
 def run_classify(
     input_path: Path = WORKING_DIR / "normalized.csv",
     output_path: Path = WORKING_DIR / "classified.csv",
+    workers: int = 1,
 ) -> StepResult:
-    count = classify_file(input_path, output_path)
+    before = cache_counters()
+    worker_lookups: Counter = Counter()
+    count = classify_file(input_path, output_path, workers=workers, stats=worker_lookups)
+    lookups = cache_counters() - before + worker_lookups
     result = StepResult(
         name="classify",
         status="ok" if count else "empty",
-        metrics={"classified": count},
+        metrics={"classified": count, "workers": workers, "text_cache": cache_stats(lookups)},
         artifacts={"csv": str(output_path)},
     )
     log_event("classify", f"Classified {count} rows.", extra=result.metrics)
@@ -73,9 +119,10 @@ def main(argv: List[str] | None = None) -> int:
         default=WORKING_DIR / "classified.csv",
         help="Output CSV path (default: artifacts/working/classified.csv).",
     )
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for sharded execution (default: 1).")
     args = parser.parse_args(argv)
 
-    run_classify(args.input_path, args.output_path)
+    run_classify(args.input_path, args.output_path, workers=args.workers)
     return 0
 
 
@@ -4,18 +4,28 @@ from __future__ import annotations
 
 import argparse
 import csv
+import heapq
 import json
+import math
+import re
+import shutil
+import tempfile
+import zlib
+from collections import Counter, defaultdict
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
 
 from scripts.python.dedupe_unify import make_key
+from scripts.python.textnorm import up
 
 from . import WORKING_DIR, ensure_directories, log_event
 from .models import StepResult
+from .rows import Row, RowSchema
 
 ORDERED_FIELDS = [
     "gtin",
     "gtin_valid",
+    "gtin14",
     "name",
     "brand",
     "qty",
@@ -37,6 +47,8 @@ ORDERED_FIELDS = [
     "extra",
 ]
 
+REPORT_FIELDS = ["key_type", "key", "gtin", "name", "source", "source_type", "score"]
+
 
 def _score_row(row: Dict[str, str]) -> Tuple[int, float, bool]:
     priority = int(row.get("priority") or 0)
@@ -57,16 +69,51 @@ def _score_row(row: Dict[str, str]) -> Tuple[int, float, bool]:
     return base, confidence, price_present
 
 
-def _merge_provenance(base_row: Dict[str, str], new_row: Dict[str, str]) -> None:
-    base_prov = json.loads(base_row.get("provenance", "[]") or "[]")
-    new_prov = json.loads(new_row.get("provenance", "[]") or "[]")
-    seen = {json.dumps(entry, sort_keys=True) for entry in base_prov}
-    for entry in new_prov:
-        key = json.dumps(entry, sort_keys=True)
-        if key not in seen:
-            base_prov.append(entry)
-            seen.add(key)
-    base_row["provenance"] = json.dumps(base_prov, ensure_ascii=False)
+def _freeze(value: Any) -> Hashable:
+    """Hashable, type-aware stand-in for ``json.dumps(value, sort_keys=True)``."""
+
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((key, _freeze(item)) for key, item in value.items())))
+    if isinstance(value, list):
+        return ("list", tuple(_freeze(item) for item in value))
+    return (type(value).__name__, value)
+
+
+class _Provenance:
+    """Parsed provenance of a key group, serialized once when the row is emitted."""
+
+    __slots__ = ("entries", "seen")
+
+    def __init__(self, raw: str) -> None:
+        self.entries: List[Any] = json.loads(raw or "[]")
+        self.seen = {_freeze(entry) for entry in self.entries}
+
+    def extend(self, other: "_Provenance") -> None:
+        for entry in list(other.entries):
+            key = _freeze(entry)
+            if key not in self.seen:
+                self.entries.append(entry)
+                self.seen.add(key)
+
+    def dumps(self) -> str:
+        return json.dumps(self.entries, ensure_ascii=False)
+
+
+def _as_provenance(value: Any) -> _Provenance:
+    return value if isinstance(value, _Provenance) else _Provenance(value or "[]")
+
+
+def _merge_provenance(base_row: Dict[str, Any], new_row: Dict[str, Any]) -> None:
+    base_prov = _as_provenance(base_row.get("provenance", "[]"))
+    base_prov.extend(_as_provenance(new_row.get("provenance", "[]")))
+    base_row["provenance"] = base_prov
+
+
+def _finalize_row(row: Dict[str, Any]) -> Dict[str, str]:
+    provenance = row.get("provenance")
+    if isinstance(provenance, _Provenance):
+        row["provenance"] = provenance.dumps()
+    return row
 
 
 def _merge_rows(base_row: Dict[str, str], new_row: Dict[str, str]) -> Dict[str, str]:
@@ -86,52 +133,472 @@ def _merge_rows(base_row: Dict[str, str], new_row: Dict[str, str]) -> Dict[str,
     return base_row
 
 
-def unify_rows(input_path: Path) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+def unify_rows(
+    input_path: Path,
+    fuzzy_threshold: Optional[float] = None,
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
     with input_path.open("r", newline="", encoding="utf-8") as fh:
         reader = csv.DictReader(fh)
-        rows = list(reader)
-
-    unified: Dict[Tuple[str, str], Dict[str, str]] = {}
+        return unify_records(reader, fuzzy_threshold)
+
+
+def _duplicate_entry(key: Tuple[str, str], row: Dict[str, str]) -> Dict[str, str]:
+    return {
+        "key_type": key[0],
+        "key": key[1],
+        "gtin": row.get("gtin", ""),
+        "name": row.get("name", ""),
+        "source": row.get("source", ""),
+        "source_type": row.get("source_type", ""),
+    }
+
+
+def _unify_one(
+    unified: Dict[Tuple[str, str], Row],
+    key: Tuple[str, str],
+    row: Dict[str, str],
+    schema: RowSchema,
+) -> Optional[Dict[str, str]]:
+    """Fold ``row`` into ``unified``; return its duplicate report entry, if any."""
+
+    base = unified.get(key)
+    if base is None:
+        unified[key] = schema.row(row)
+        return None
+    unified[key] = _merge_rows(base, schema.row(row))
+    return _duplicate_entry(key, row)
+
+
+def unify_records(
+    rows: Iterable[Dict[str, str]],
+    fuzzy_threshold: Optional[float] = None,
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Unify an iterable of validated rows (CSV reader or streamed stages).
+
+    Key groups are held as compact :class:`~pipeline.rows.Row` mappings
+    sharing one schema. With ``fuzzy_threshold`` the exact-key groups then go
+    through :func:`fuzzy_merge`; its merges follow the exact duplicates in
+    the report.
+    """
+
+    schema = RowSchema(ORDERED_FIELDS)
+    unified: Dict[Tuple[str, str], Row] = {}
     duplicates: List[Dict[str, str]] = []
 
     for row in rows:
-        key = make_key(row)
-        base = unified.get(key)
-        if base is None:
-            unified[key] = dict(row)
-        else:
-            merged = _merge_rows(base, dict(row))
-            unified[key] = merged
-            duplicates.append(
-                {
-                    "key_type": key[0],
-                    "key": key[1],
-                    "gtin": row.get("gtin", ""),
-                    "name": row.get("name", ""),
-                    "source": row.get("source", ""),
-                    "source_type": row.get("source_type", ""),
-                }
-            )
-
-    return list(unified.values()), duplicates
+        duplicate = _unify_one(unified, make_key(row), row, schema)
+        if duplicate is not None:
+            duplicates.append(duplicate)
+
+    merged = list(unified.values())
+    if fuzzy_threshold is not None:
+        survivors, near_duplicates = fuzzy_merge(merged, fuzzy_threshold)
+        merged = [row for _, row in survivors]
+        duplicates.extend(entry for _, entry in near_duplicates)
+    return [_finalize_row(row) for row in merged], duplicates
+
+
+# Near-duplicate detection ------------------------------------------------------
+
+_WORD = re.compile(r"[A-Z0-9]+")
+_UNIT_WORDS = frozenset({"KG", "G", "GR", "L", "LT", "ML", "CL", "UN", "UNI", "UNID"})
+_UNIT_SCALE = {"KG": ("G", 1000.0), "L": ("ML", 1000.0), "CL": ("ML", 10.0)}
+GTIN_FIELDS = ("gtin", "gtin_valid", "gtin14")
+
+
+def _block_key(row: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Brand, base unit and quantity bucket: only rows sharing one are compared."""
+
+    unit, scale = _UNIT_SCALE.get(up(row.get("uom", "")), (up(row.get("uom", "")), 1.0))
+    qty = (row.get("qty") or "").strip()
+    try:
+        bucket = f"{float(qty.replace(',', '.')) * scale:.3g}"
+    except ValueError:
+        bucket = qty
+    return up(row.get("brand", "")), unit, bucket
+
+
+def group_keys(row: Dict[str, Any]) -> Tuple[Tuple[str, str], Tuple[str, str, str]]:
+    """Exact dedupe key and fuzzy block of a validated row."""
+
+    return make_key(row), _block_key(row)
+
+
+def _name_tokens(row: Dict[str, Any]) -> frozenset:
+    # Brand and quantity are already part of the block, so only the words of
+    # the name that describe the product are compared.
+    brand = set(_WORD.findall(up(row.get("brand", ""))))
+    return frozenset(
+        token
+        for token in _WORD.findall(up(row.get("name", "")))
+        if not token[0].isdigit() and token not in _UNIT_WORDS and token not in brand
+    )
+
+
+def _prefix_length(size: int, threshold: float) -> int:
+    return max(1, size - math.ceil(threshold * size - 1e-9) + 1)
+
+
+def _merge_near_duplicate(target: Dict[str, Any], row: Dict[str, Any]) -> Dict[str, Any]:
+    anchor = {field: target.get(field, "") for field in GTIN_FIELDS} if target.get("gtin_valid") == "1" else None
+    merged = _merge_rows(target, row.copy())
+    if anchor is not None:
+        # A GTIN-less listing never overrides the barcode it was matched to.
+        merged.update(anchor)
+    return merged
+
+
+def fuzzy_merge(
+    rows: List[Dict[str, Any]],
+    threshold: float,
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Tuple[int, Dict[str, str]]]]:
+    """Fold rows without a valid GTIN into their most similar neighbour.
+
+    Rows are blocked on :func:`_block_key` and compared on the Jaccard
+    similarity of their name tokens. Candidates come from a prefix-filtered
+    token index (tokens ordered rarest first), which finds every pair at or
+    above ``threshold`` without comparing the whole block pairwise. Rows with
+    a valid GTIN are indexed first and never merged away, so two different
+    barcodes are never joined. Returns the surviving ``(index, row)`` pairs
+    and the ``(index, report entry)`` of each merged row, both in input order.
+    """
+
+    if not 0 < threshold <= 1:
+        raise ValueError("fuzzy threshold must be in (0, 1]")
+    blocks = [_block_key(row) for row in rows]
+    tokens = [_name_tokens(row) for row in rows]
+    frequency = Counter(token for token_set in tokens for token in token_set)
+    prefixes = [
+        sorted(token_set, key=lambda token: (frequency[token], token))[: _prefix_length(len(token_set), threshold)]
+        for token_set in tokens
+    ]
+    index: Dict[Tuple[Tuple[str, str, str], str], List[int]] = defaultdict(list)
+    keys: Dict[int, Tuple[str, str]] = {}
+
+    def add(position: int) -> None:
+        keys[position] = make_key(rows[position])
+        for token in prefixes[position]:
+            index[(blocks[position], token)].append(position)
+
+    for position, row in enumerate(rows):
+        if row.get("gtin_valid") == "1" and tokens[position]:
+            add(position)
+
+    merged_away = set()
+    duplicates: List[Tuple[int, Dict[str, str]]] = []
+    for position, row in enumerate(rows):
+        size = len(tokens[position])
+        if row.get("gtin_valid") == "1" or not size:
+            continue
+        best: Optional[Tuple[float, int]] = None
+        checked = set()
+        for token in prefixes[position]:
+            for other in index.get((blocks[position], token), ()):
+                if other in checked:
+                    continue
+                checked.add(other)
+                other_size = len(tokens[other])
+                if other_size < threshold * size or size < threshold * other_size:
+                    continue
+                shared = len(tokens[position] & tokens[other])
+                score = shared / (size + other_size - shared)
+                if score >= threshold and (best is None or score > best[0] or (score == best[0] and other < best[1])):
+                    best = (score, other)
+        if best is None:
+            add(position)
+            continue
+        score, target = best
+        rows[target] = _merge_near_duplicate(rows[target], row)
+        merged_away.add(position)
+        entry = _duplicate_entry(("FUZZY", keys[target][1]), row)
+        entry["score"] = f"{score:.3f}"
+        duplicates.append((position, entry))
+
+    survivors = [(position, row) for position, row in enumerate(rows) if position not in merged_away]
+    return survivors, duplicates
+
+
+# External-memory dedupe --------------------------------------------------------
+
+# In-memory row dicts take roughly this many times their CSV size.
+SPILL_EXPANSION = 4
+DEFAULT_SPILL_PARTITIONS = 64
+MAX_SPILL_PARTITIONS = 1024
+
+
+def spill_partitions(input_bytes: Optional[int], memory_budget_mb: float) -> int:
+    if input_bytes is None:
+        return DEFAULT_SPILL_PARTITIONS
+    return max(1, min(MAX_SPILL_PARTITIONS, math.ceil(input_bytes * SPILL_EXPANSION / _budget_bytes(memory_budget_mb))))
+
+
+def _budget_bytes(memory_budget_mb: float) -> float:
+    return max(1.0, memory_budget_mb) * 1024 * 1024
+
+
+def _read_run(path: Path) -> Iterator[list]:
+    with path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            yield json.loads(line)
+
+
+def _key_text(item: list) -> str:
+    return f"{item[1]}|{item[2]}"
+
+
+def _block_text(item: list) -> str:
+    return "|".join(_block_key(item[1]))
+
+
+def _spill(items: Iterable[list], paths: List[Path], key_text: Callable[[list], str], salt: int = 0) -> List[int]:
+    """Hash ``items`` into ``paths`` on ``key_text``; returns the characters written to each."""
+
+    sizes = [0] * len(paths)
+    handles = [path.open("w", encoding="utf-8") for path in paths]
+    try:
+        for item in items:
+            line = json.dumps(item, ensure_ascii=False) + "\n"
+            index = zlib.crc32(key_text(item).encode("utf-8"), salt) % len(paths)
+            handles[index].write(line)
+            sizes[index] += len(line)
+    finally:
+        for handle in handles:
+            handle.close()
+    return sizes
+
+
+def _fit_budget(
+    parts: List[Tuple[Path, int]],
+    key_text: Callable[[list], str],
+    budget: Optional[float],
+    salt: int = 1,
+) -> Tuple[List[Path], List[Path]]:
+    """Re-split every partition whose rows would not fit ``budget`` bytes in memory.
+
+    Each split hashes with a new ``salt`` so rows sharing a partition are
+    spread out. Returns the non-empty partitions and, among them, those that
+    are still over budget because all their rows share one key.
+    """
+
+    kept: List[Path] = []
+    oversized: List[Path] = []
+    for path, size in parts:
+        if not size:
+            path.unlink()
+            continue
+        if budget is None or size * SPILL_EXPANSION <= budget:
+            kept.append(path)
+            continue
+        fanout = min(MAX_SPILL_PARTITIONS, math.ceil(size * SPILL_EXPANSION / budget))
+        sub_paths = [path.with_name(f"{path.stem}-{index:04d}{path.suffix}") for index in range(fanout)]
+        sizes = _spill(_read_run(path), sub_paths, key_text, salt)
+        path.unlink()
+        if max(sizes) == size:
+            # Nothing moved: a single key, which cannot be split any further.
+            whole = sub_paths[sizes.index(size)]
+            for sub_path in sub_paths:
+                if sub_path != whole:
+                    sub_path.unlink()
+            kept.append(whole)
+            oversized.append(whole)
+            continue
+        sub_kept, sub_oversized = _fit_budget(list(zip(sub_paths, sizes)), key_text, budget, salt + 1)
+        kept.extend(sub_kept)
+        oversized.extend(sub_oversized)
+    return kept, oversized
+
+
+def unify_external(
+    rows: Iterable[Dict[str, str]],
+    unified_path: Path,
+    report_path: Path,
+    *,
+    partitions: int,
+    fuzzy_threshold: Optional[float] = None,
+    memory_budget_mb: Optional[float] = None,
+    stats: Optional[Counter] = None,
+) -> Tuple[int, int]:
+    """Dedupe ``rows`` with bounded memory and write both outputs.
+
+    Rows are hash-partitioned by ``make_key`` into temporary files, each
+    partition is unified on its own with the in-memory merge rules, and the
+    per-partition results are k-way merged on each key's first-seen position.
+    With ``fuzzy_threshold`` the unified rows are re-partitioned by block for
+    :func:`fuzzy_merge` before that final merge. The outputs are therefore
+    identical to :func:`unify_records`.
+
+    With ``memory_budget_mb`` any partition that turns out larger than the
+    budget allows is split again, so streamed input of unknown size stays
+    bounded too. ``stats`` receives the final ``spill_partitions``, the
+    ``fuzzy_merged`` count and the ``oversized_blocks`` that had to be loaded
+    whole although they exceed the budget.
+    """
+
+    ensure_directories()
+    unified_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    budget = _budget_bytes(memory_budget_mb) if memory_budget_mb else None
+    stats = stats if stats is not None else Counter()
+    scratch = Path(tempfile.mkdtemp(prefix=".dedupe-", dir=unified_path.parent))
+    try:
+        fieldnames = ORDERED_FIELDS[:]
+        known = set(fieldnames)
+
+        def keyed() -> Iterator[list]:
+            for seq, row in enumerate(rows):
+                for column in row.keys():
+                    if column not in known:
+                        known.add(column)
+                        fieldnames.append(column)
+                key = make_key(row)
+                yield [seq, key[0], key[1], row]
+
+        part_paths = [scratch / f"part-{index:04d}.jsonl" for index in range(partitions)]
+        sizes = _spill(keyed(), part_paths, _key_text)
+        # A partition holding one key only keeps its merged row in memory, so
+        # the ones left over budget need no special handling.
+        part_paths, _ = _fit_budget(list(zip(part_paths, sizes)), _key_text, budget)
+        stats["spill_partitions"] = len(part_paths)
+
+        unified_runs: List[Path] = []
+        duplicate_runs: List[Path] = []
+        for part_path in part_paths:
+            schema = RowSchema(fieldnames)
+            unified: Dict[Tuple[str, str], Row] = {}
+            first_seen: Dict[Tuple[str, str], int] = {}
+            duplicate_run = part_path.with_suffix(".dups")
+            with duplicate_run.open("w", encoding="utf-8") as dups:
+                for seq, key_type, key_value, row in _read_run(part_path):
+                    key = (key_type, key_value)
+                    first_seen.setdefault(key, seq)
+                    duplicate = _unify_one(unified, key, row, schema)
+                    if duplicate is not None:
+                        dups.write(json.dumps([seq, duplicate], ensure_ascii=False) + "\n")
+            part_path.unlink()
+            unified_run = part_path.with_suffix(".unified")
+            with unified_run.open("w", encoding="utf-8") as out:
+                for key in sorted(unified, key=first_seen.__getitem__):
+                    out.write(json.dumps([first_seen[key], dict(_finalize_row(unified[key]))], ensure_ascii=False) + "\n")
+            unified_runs.append(unified_run)
+            duplicate_runs.append(duplicate_run)
+            del unified, first_seen
+
+        fuzzy_runs: List[Path] = []
+        if fuzzy_threshold is not None:
+            unified_runs, fuzzy_runs = _fuzzy_partitions(unified_runs, scratch, partitions, fuzzy_threshold, budget, stats)
+
+        unified_count = 0
+        with unified_path.open("w", newline="", encoding="utf-8") as fout:
+            writer = csv.DictWriter(fout, fieldnames=fieldnames)
+            writer.writeheader()
+            for _, row in heapq.merge(*(_read_run(path) for path in unified_runs), key=lambda item: item[0]):
+                writer.writerow(row)
+                unified_count += 1
+
+        duplicate_count = 0
+        with report_path.open("w", newline="", encoding="utf-8") as freport:
+            writer = csv.DictWriter(freport, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            for runs in (duplicate_runs, fuzzy_runs):
+                for _, dup in heapq.merge(*(_read_run(path) for path in runs), key=lambda item: item[0]):
+                    writer.writerow(dup)
+                    duplicate_count += 1
+                    if dup["key_type"] == "FUZZY":
+                        stats["fuzzy_merged"] += 1
+        return unified_count, duplicate_count
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _fuzzy_partitions(
+    unified_runs: List[Path],
+    scratch: Path,
+    partitions: int,
+    threshold: float,
+    budget: Optional[float],
+    stats: Counter,
+) -> Tuple[List[Path], List[Path]]:
+    """Run :func:`fuzzy_merge` per block partition of the unified runs.
+
+    Partitions over ``budget`` are split again by block. A single block
+    larger than the budget must still be compared as a whole; it is counted
+    in ``stats["oversized_blocks"]``.
+    """
+
+    block_paths = [scratch / f"block-{index:04d}.jsonl" for index in range(partitions)]
+    sizes = _spill(heapq.merge(*(_read_run(path) for path in unified_runs), key=lambda item: item[0]), block_paths, _block_text)
+    for path in unified_runs:
+        path.unlink()
+    block_paths, oversized = _fit_budget(list(zip(block_paths, sizes)), _block_text, budget)
+    stats["oversized_blocks"] += len(oversized)
+
+    survivor_runs: List[Path] = []
+    fuzzy_runs: List[Path] = []
+    for block_path in block_paths:
+        items = list(_read_run(block_path))
+        block_path.unlink()
+        survivors, near_duplicates = fuzzy_merge([row for _, row in items], threshold)
+        survivor_run = block_path.with_suffix(".unified")
+        with survivor_run.open("w", encoding="utf-8") as out:
+            for position, row in survivors:
+                out.write(json.dumps([items[position][0], _finalize_row(row)], ensure_ascii=False) + "\n")
+        fuzzy_run = block_path.with_suffix(".fuzzy")
+        with fuzzy_run.open("w", encoding="utf-8") as out:
+            for position, entry in near_duplicates:
+                out.write(json.dumps([items[position][0], entry], ensure_ascii=False) + "\n")
+        survivor_runs.append(survivor_run)
+        fuzzy_runs.append(fuzzy_run)
+    return survivor_runs, fuzzy_runs
 
 
 def run_dedupe(
     input_path: Path = WORKING_DIR / "validated.csv",
     output_path: Path = WORKING_DIR / "unified.csv",
     report_path: Path = WORKING_DIR / "duplicates.csv",
+    rows: Optional[Iterable[Dict[str, str]]] = None,
+    memory_budget_mb: Optional[float] = None,
+    fuzzy_threshold: Optional[float] = None,
 ) -> StepResult:
-    unified_rows, duplicates = unify_rows(input_path)
-    write_outputs(unified_rows, duplicates, output_path, report_path)
+    metrics: Dict[str, object]
+    if memory_budget_mb:
+        input_bytes = input_path.stat().st_size if rows is None else None
+        partitions = spill_partitions(input_bytes, memory_budget_mb)
+        stats: Counter = Counter()
+        options = {
+            "partitions": partitions,
+            "fuzzy_threshold": fuzzy_threshold,
+            "memory_budget_mb": memory_budget_mb,
+            "stats": stats,
+        }
+        if rows is not None:
+            unified_count, duplicate_count = unify_external(rows, output_path, report_path, **options)
+        else:
+            with input_path.open("r", newline="", encoding="utf-8") as fh:
+                unified_count, duplicate_count = unify_external(csv.DictReader(fh), output_path, report_path, **options)
+        metrics = {"unified": unified_count, "duplicates": duplicate_count, "spill_partitions": stats["spill_partitions"]}
+        if stats["oversized_blocks"]:
+            metrics["oversized_blocks"] = stats["oversized_blocks"]
+        fuzzy_merged = stats["fuzzy_merged"]
+    else:
+        if rows is not None:
+            unified_rows, duplicates = unify_records(rows, fuzzy_threshold)
+        else:
+            unified_rows, duplicates = unify_rows(input_path, fuzzy_threshold)
+        write_outputs(unified_rows, duplicates, output_path, report_path)
+        metrics = {"unified": len(unified_rows), "duplicates": len(duplicates)}
+        fuzzy_merged = sum(1 for entry in duplicates if entry["key_type"] == "FUZZY")
+    if fuzzy_threshold is not None:
+        metrics["fuzzy_threshold"] = fuzzy_threshold
+        metrics["fuzzy_merged"] = fuzzy_merged
     result = StepResult(
         name="dedupe",
         status="ok",
-        metrics={"unified": len(unified_rows), "duplicates": len(duplicates)},
+        metrics=metrics,
         artifacts={"unified_csv": str(output_path), "duplicates_csv": str(report_path)},
     )
     log_event(
         "dedupe",
-        f"Unified {len(unified_rows)} records (duplicates: {len(duplicates)}).",
+        f"Unified {metrics['unified']} records (duplicates: {metrics['duplicates']}).",
         extra=result.metrics,
     )
     return result
@@ -143,20 +610,22 @@ def write_outputs(unified_rows: List[Dict[str, str]], duplicates: List[Dict[str,
     report_path.parent.mkdir(parents=True, exist_ok=True)
 
     fieldnames = ORDERED_FIELDS[:]
+    known = set(fieldnames)
     for row in unified_rows:
         for column in row.keys():
-            if column not in fieldnames:
+            if column not in known:
+                known.add(column)
                 fieldnames.append(column)
 
+    columns = tuple(fieldnames)
     with unified_path.open("w", newline="", encoding="utf-8") as fout:
-        writer = csv.DictWriter(fout, fieldnames=fieldnames)
-        writer.writeheader()
+        writer = csv.writer(fout)
+        writer.writerow(columns)
         for row in unified_rows:
-            writer.writerow(row)
+            writer.writerow(row.pick(columns) if isinstance(row, Row) else [row.get(name, "") for name in columns])
 
     with report_path.open("w", newline="", encoding="utf-8") as freport:
-        report_fields = ["key_type", "key", "gtin", "name", "source", "source_type"]
-        writer = csv.DictWriter(freport, fieldnames=report_fields)
+        writer = csv.DictWriter(freport, fieldnames=REPORT_FIELDS)
         writer.writeheader()
         for dup in duplicates:
             writer.writerow(dup)
@@ -185,9 +654,27 @@ def main(argv: List[str] | None = None) -> int:
         default=WORKING_DIR / "duplicates.csv",
         help="Duplicates report path (default: artifacts/working/duplicates.csv).",
     )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=float,
+        default=None,
+        help="Spill to disk partitions so dedupe stays within this memory budget.",
+    )
+    parser.add_argument(
+        "--fuzzy-threshold",
+        type=float,
+        default=None,
+        help="Also merge GTIN-less near-duplicates whose name similarity (0-1) reaches this threshold.",
+    )
     args = parser.parse_args(argv)
 
-    run_dedupe(args.input_path, args.output_path, args.dup_report)
+    run_dedupe(
+        args.input_path,
+        args.output_path,
+        args.dup_report,
+        memory_budget_mb=args.memory_budget_mb,
+        fuzzy_threshold=args.fuzzy_threshold,
+    )
     return 0
 
 
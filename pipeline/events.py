@@ -0,0 +1,148 @@
+"""Background writer for the structured pipeline event log."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+from pathlib import Path
+from typing import List, Optional, TextIO, Tuple
+
+FLUSH_INTERVAL = 0.5
+MAX_BATCH = 1024
+
+_STOP = object()
+
+# (level, console line, JSON line)
+Event = Tuple[int, str, str]
+
+
+class EventLogger:
+    """Append JSON lines to ``path`` from a single writer thread.
+
+    Callers only enqueue an already serialized event. The writer keeps one
+    handle open, writes whatever has queued up as one batch, mirrors it to
+    stdout and the ``barcode.pipeline`` logger, then flushes. The log is
+    reopened if it was rotated or deleted, the thread is restarted after a
+    fork, and pending events are drained at interpreter exit.
+    """
+
+    def __init__(self, path: Path, *, logger_name: str = "barcode.pipeline", echo: bool = True) -> None:
+        self.path = path
+        self.logger = logging.getLogger(logger_name)
+        self.echo = echo
+        self._lock = threading.Lock()
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._fh: Optional[TextIO] = None
+        self._atexit = False
+
+    # Producer side ---------------------------------------------------------
+    def emit(self, level: int, console: str, line: str) -> None:
+        self._ensure_started()
+        self._queue.put((level, console, line))
+
+    def flush(self, timeout: Optional[float] = 5.0) -> None:
+        """Block until every event emitted so far is on disk."""
+
+        if not self._running():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        if not self._running():
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    # Writer side -----------------------------------------------------------
+    def _running(self) -> bool:
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _ensure_started(self) -> None:
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            if self._pid != os.getpid():
+                # Inherited across fork: the old thread and handle are not ours.
+                self._queue = queue.SimpleQueue()
+                self._fh = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="pipeline-events", daemon=True)
+            self._thread.start()
+            if not self._atexit:
+                atexit.register(self.close)
+                self._atexit = True
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            batch: List[Event] = []
+            waiters: List[threading.Event] = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= MAX_BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception:  # pragma: no cover - never let logging kill the run
+                pass
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                if self._fh is not None:
+                    self._fh.close()
+                    self._fh = None
+                return
+
+    def _write(self, batch: List[Event]) -> None:
+        if not batch:
+            return
+        fh = self._handle()
+        fh.write("".join(line + os.linesep for _, _, line in batch))
+        fh.flush()
+        if self.echo:
+            sys.stdout.write("".join(console + "\n" for _, console, _ in batch))
+            sys.stdout.flush()
+        for level, _, line in batch:
+            if self.logger.isEnabledFor(level):
+                self.logger.log(level, "%s", line)
+
+    def _handle(self) -> TextIO:
+        if self._fh is not None:
+            try:
+                current = os.stat(self.path)
+                opened = os.fstat(self._fh.fileno())
+                if (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+                    return self._fh
+            except OSError:
+                pass
+            self._fh.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "a", encoding="utf-8")
+        return self._fh
+
+
+__all__ = ["EventLogger", "FLUSH_INTERVAL"]
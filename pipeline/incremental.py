@@ -0,0 +1,239 @@
+"""Change tracking for incremental pipeline runs."""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import WORKING_DIR
+
+STATE_NAME = "incremental_state.json"
+DELTA_NAME = "ingested_delta.csv"
+DEFAULT_STATE = WORKING_DIR / STATE_NAME
+DELTA_CSV = WORKING_DIR / DELTA_NAME
+# Bump when normalize, classify or validate change what they derive from a
+# row, so earlier states are dropped and the next run rebuilds everything.
+STATE_VERSION = 2
+
+# Fields that change on every fetch without the product itself changing.
+VOLATILE_FIELDS = ("last_seen",)
+
+Key = Tuple[str, str]
+Block = Tuple[str, ...]
+# Dedupe key and fuzzy block of each ingested row, in order, once the
+# row-wise stages have run on it.
+Describe = Callable[[List[Dict[str, str]]], Iterable[Tuple[Key, Block]]]
+
+
+def fingerprint_row(row: Dict[str, str]) -> str:
+    """Content hash of an ingested row, ignoring fetch timestamps."""
+
+    stable = {key: value for key, value in row.items() if key not in VOLATILE_FIELDS}
+    provenance = stable.get("provenance")
+    if provenance:
+        try:
+            entries = json.loads(provenance)
+        except ValueError:
+            entries = None
+        if isinstance(entries, list):
+            stable["provenance"] = [
+                {k: v for k, v in entry.items() if k not in VOLATILE_FIELDS} if isinstance(entry, dict) else entry
+                for entry in entries
+            ]
+    digest = hashlib.sha1(json.dumps(stable, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def row_identity(row: Dict[str, str], fingerprint: str) -> str:
+    """Stable name of an ingested row: its code, else its source and URL, else its content."""
+
+    code = (row.get("code") or "").strip()
+    if code:
+        return code
+    url = (row.get("url") or "").strip()
+    if url:
+        return f"{row.get('source', '')}|{url}"
+    return f"#{fingerprint}"
+
+
+@dataclass
+class Delta:
+    """Rows selected for an incremental run and what publish must replace."""
+
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    related: int = 0
+    # Dedupe keys whose published rows are rebuilt from the delta.
+    keys: Set[Key] = field(default_factory=set)
+    # First ingest position of every current dedupe key (the full-run order).
+    order: Dict[Key, int] = field(default_factory=dict)
+
+    def metrics(self) -> Dict[str, int]:
+        return {"changed": self.changed, "unchanged": self.unchanged, "removed": self.removed, "related": self.related}
+
+
+class ChangeTracker:
+    """Compare ingested rows with the fingerprints recorded by the last run.
+
+    Besides its fingerprint the state keeps each row's dedupe key and fuzzy
+    block, so a change can pull in the unchanged rows it is merged with.
+    The new state is only persisted by :meth:`commit`, so a run that fails
+    halfway reprocesses the same rows next time.
+
+    ``config`` is a digest of whatever else shapes the published rows (the
+    classification dictionaries, step settings). A state recorded under
+    another ``config`` or :data:`STATE_VERSION` is ignored.
+    """
+
+    def __init__(self, state_path: Path = DEFAULT_STATE, config: str = "") -> None:
+        self.state_path = state_path
+        self.config = config
+        self.previous: Dict[str, List] = {}
+        self.current: Dict[str, List] = {}
+        if state_path.exists():
+            try:
+                state = json.loads(state_path.read_text(encoding="utf-8"))
+            except ValueError:
+                state = None
+            if (
+                isinstance(state, dict)
+                and state.get("version") == STATE_VERSION
+                and state.get("config") == config
+            ):
+                self.previous = state["rows"]
+
+    def reset(self) -> None:
+        """Forget the previous run so every row is treated as changed."""
+
+        self.previous = {}
+
+    def write_delta(
+        self,
+        ingested_path: Path,
+        delta_path: Path,
+        describe: Describe,
+        *,
+        blocks: bool = False,
+    ) -> Delta:
+        """Copy changed rows and every row merged with them to ``delta_path``.
+
+        ``describe`` gives the dedupe key and block of the changed rows. Rows
+        sharing a key with a changed, new or removed row are added back, and
+        with ``blocks`` (fuzzy dedupe) so are rows sharing a block, until no
+        more rows join. The copy keeps the ingest order so dedupe picks the
+        same winners as a full run.
+        """
+
+        delta = Delta()
+        identities: List[str] = []
+        fingerprints: List[str] = []
+        changed_rows: List[Dict[str, str]] = []
+        changed_at: List[int] = []
+        with ingested_path.open("r", newline="", encoding="utf-8") as src:
+            reader = csv.DictReader(src)
+            fieldnames = list(reader.fieldnames or [])
+            seen: Dict[str, int] = defaultdict(int)
+            for position, row in enumerate(reader):
+                fingerprint = fingerprint_row(row)
+                identity = row_identity(row, fingerprint)
+                seen[identity] += 1
+                if seen[identity] > 1:
+                    identity = f"{identity}#{seen[identity]}"
+                identities.append(identity)
+                fingerprints.append(fingerprint)
+                previous = self.previous.get(identity)
+                if previous is None or previous[0] != fingerprint:
+                    changed_rows.append(row)
+                    changed_at.append(position)
+
+        described = dict(zip(changed_at, describe(changed_rows)))
+        affected_keys: Set[Key] = set()
+        affected_blocks: Set[Block] = set()
+
+        def affect(entry: List) -> None:
+            affected_keys.add(tuple(entry[1]))
+            if blocks:
+                affected_blocks.add(tuple(entry[2]))
+
+        by_key: Dict[Key, List[int]] = defaultdict(list)
+        by_block: Dict[Block, List[int]] = defaultdict(list)
+        self.current = {}
+        for position, identity in enumerate(identities):
+            previous = self.previous.get(identity)
+            if position in described:
+                key, block = described[position]
+                entry = [fingerprints[position], list(key), list(block)]
+                affect(entry)
+                if previous is not None:
+                    affect(previous)
+            else:
+                entry = previous
+                by_key[tuple(entry[1])].append(position)
+                by_block[tuple(entry[2])].append(position)
+            self.current[identity] = entry
+            delta.order.setdefault(tuple(entry[1]), position)
+        for identity in self.previous.keys() - self.current.keys():
+            affect(self.previous[identity])
+            delta.removed += 1
+
+        selected = set(described)
+        pending_keys, pending_blocks = list(affected_keys), list(affected_blocks)
+        while pending_keys or pending_blocks:
+            positions = [p for key in pending_keys for p in by_key.pop(key, ())]
+            positions += [p for block in pending_blocks for p in by_block.pop(block, ())]
+            pending_keys, pending_blocks = [], []
+            for position in positions:
+                if position in selected:
+                    continue
+                selected.add(position)
+                entry = self.current[identities[position]]
+                key, block = tuple(entry[1]), tuple(entry[2])
+                if key not in affected_keys:
+                    affected_keys.add(key)
+                    pending_keys.append(key)
+                if blocks and block not in affected_blocks:
+                    affected_blocks.add(block)
+                    pending_blocks.append(block)
+
+        delta_path.parent.mkdir(parents=True, exist_ok=True)
+        with ingested_path.open("r", newline="", encoding="utf-8") as src, delta_path.open(
+            "w", newline="", encoding="utf-8"
+        ) as dst:
+            writer = csv.DictWriter(dst, fieldnames=fieldnames)
+            writer.writeheader()
+            for position, row in enumerate(csv.DictReader(src)):
+                if position in selected:
+                    writer.writerow(row)
+        delta.changed = len(described)
+        delta.unchanged = len(identities) - delta.changed
+        delta.related = len(selected) - delta.changed
+        delta.keys = affected_keys
+        return delta
+
+    def commit(self) -> None:
+        """Persist the state of the last :meth:`write_delta`; removed rows are forgotten."""
+
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        state = {"version": STATE_VERSION, "config": self.config, "rows": self.current}
+        tmp.write_text(json.dumps(state, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+
+__all__ = [
+    "ChangeTracker",
+    "Delta",
+    "fingerprint_row",
+    "row_identity",
+    "DEFAULT_STATE",
+    "DELTA_CSV",
+    "DELTA_NAME",
+    "STATE_NAME",
+]
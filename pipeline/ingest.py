@@ -6,6 +6,7 @@ import argparse
 import csv
 import json
 from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Iterable, List, Mapping, Optional, Sequence
@@ -15,9 +16,10 @@ try:  # pragma: no cover - optional for offline execution
 except ImportError:  # pragma: no cover
     requests = None  # type: ignore[assignment]
 
-from . import REPO_ROOT, WORKING_DIR, ensure_directories, log_event
+from . import CACHE_DIR, REPO_ROOT, WORKING_DIR, ensure_directories, log_event
 from .models import RawProduct, StepResult, json_dumps
-from .sources.base import ConnectorError
+from .sources.base import ConnectorError, HostLimiter
+from .sources.cache import ResponseCache
 from .sources.supermarkets import build_default_connectors
 
 DATA_ROOT = REPO_ROOT / "data" / "sources"
@@ -32,6 +34,14 @@ class IngestionConfig:
     countries: Sequence[str] = ("PT", "ANG", "CV")
     queries: Mapping[str, Sequence[str]] = field(default_factory=dict)
     prefer_online: Optional[bool] = None
+    # Number of online requests in flight across all connectors; 1 keeps the
+    # sequential behaviour. ``per_host`` caps requests against a single host.
+    concurrency: int = 1
+    per_host: int = 2
+    # Online responses are cached on disk; ``cache_dir=None`` disables it.
+    cache_dir: Optional[Path] = CACHE_DIR / "http"
+    cache_ttl: float = 3600.0
+    cache_max_bytes: int = 256 * 1024 * 1024
 
 
 class IngestionManager:
@@ -40,7 +50,15 @@ class IngestionManager:
     def __init__(self, config: IngestionConfig) -> None:
         self.config = config
         session = requests.Session() if requests is not None else None
-        self.connectors = build_default_connectors(DATA_ROOT, session=session, prefer_online=config.prefer_online)
+        self.cache: Optional[ResponseCache] = None
+        if config.cache_dir is not None and config.prefer_online is not False:
+            self.cache = ResponseCache(config.cache_dir, ttl=config.cache_ttl, max_bytes=config.cache_max_bytes)
+        self.connectors = build_default_connectors(
+            DATA_ROOT,
+            session=session,
+            prefer_online=config.prefer_online,
+            response_cache=self.cache,
+        )
 
     # Public -----------------------------------------------------------------
     def collect(self) -> tuple[List[RawProduct], Dict[str, List[dict]], Counter]:
@@ -49,47 +67,82 @@ class IngestionManager:
         provenance: Dict[str, List[dict]] = defaultdict(list)
         metrics: Counter = Counter()
 
-        for connector in self.connectors:
-            connector_countries = {c.upper() for c in connector.settings.countries}
-            if countries and not countries.intersection(connector_countries):
+        active = [
+            connector
+            for connector in self.connectors
+            if not countries or countries.intersection({c.upper() for c in connector.settings.countries})
+        ]
+        if self.config.concurrency > 1:
+            outcomes = self._collect_concurrently(active)
+        else:
+            outcomes = (self._collect_one(connector) for connector in active)
+
+        # Outcomes are merged in connector order so the _score winner and the
+        # provenance ordering match the sequential path exactly.
+        for connector, outcome in zip(active, outcomes):
+            records = outcome.result() if isinstance(outcome, Future) else outcome
+            if isinstance(records, ConnectorError):
+                log_event("ingest", f"Connector {connector.settings.slug} failed: {records}", status="warning")
                 continue
-
-            queries = self._queries_for(connector)
-            try:
-                records = connector.collect(limit=self.config.limit, queries=queries)
-            except ConnectorError as exc:
-                log_event("ingest", f"Connector {connector.settings.slug} failed: {exc}", status="warning")
-                continue
-
-            for record in records:
-                metrics[f"source:{connector.settings.slug}"] += 1
-                metrics[f"country:{record.country}"] += 1
-                mode = "online" if record.extra.get("online") else "offline"
-                metrics[f"mode:{mode}"] += 1
-
-                existing = aggregated.get(record.code)
-                if existing is None or self._score(record) > self._score(existing):
-                    aggregated[record.code] = record
-
-                prov_entry = {
-                    "connector": connector.settings.slug,
-                    "source": record.source,
-                    "country": record.country,
-                    "online": bool(record.extra.get("online")),
-                    "query": record.extra.get("query"),
-                    "last_seen": record.last_seen,
-                }
-                provenance[record.code].append(prov_entry)
-
-                if len(aggregated) >= self.config.limit:
-                    break
-
-            if len(aggregated) >= self.config.limit:
+            if self._merge(connector, records, aggregated, provenance, metrics):
                 break
 
         return list(aggregated.values()), provenance, metrics
 
     # Helpers ----------------------------------------------------------------
+    def _collect_one(self, connector, executor: Optional[ThreadPoolExecutor] = None):
+        try:
+            return connector.collect(limit=self.config.limit, queries=self._queries_for(connector), executor=executor)
+        except ConnectorError as exc:
+            return exc
+
+    def _collect_concurrently(self, connectors) -> List[Future]:
+        limiter = HostLimiter(self.config.per_host)
+        for connector in connectors:
+            connector.host_limiter = limiter
+        # Connector threads only wait on their queries, which run on the
+        # bounded fetch pool, so the two pools can never deadlock each other.
+        with ThreadPoolExecutor(max_workers=self.config.concurrency, thread_name_prefix="ingest-fetch") as fetch_pool:
+            with ThreadPoolExecutor(
+                max_workers=max(1, len(connectors)), thread_name_prefix="ingest-connector"
+            ) as connector_pool:
+                futures = [connector_pool.submit(self._collect_one, connector, fetch_pool) for connector in connectors]
+            return futures
+
+    def _merge(
+        self,
+        connector,
+        records: Iterable[RawProduct],
+        aggregated: Dict[str, RawProduct],
+        provenance: Dict[str, List[dict]],
+        metrics: Counter,
+    ) -> bool:
+        """Fold one connector's records into the aggregate; True once the limit is hit."""
+
+        for record in records:
+            metrics[f"source:{connector.settings.slug}"] += 1
+            metrics[f"country:{record.country}"] += 1
+            mode = "online" if record.extra.get("online") else "offline"
+            metrics[f"mode:{mode}"] += 1
+
+            existing = aggregated.get(record.code)
+            if existing is None or self._score(record) > self._score(existing):
+                aggregated[record.code] = record
+
+            prov_entry = {
+                "connector": connector.settings.slug,
+                "source": record.source,
+                "country": record.country,
+                "online": bool(record.extra.get("online")),
+                "query": record.extra.get("query"),
+                "last_seen": record.last_seen,
+            }
+            provenance[record.code].append(prov_entry)
+
+            if len(aggregated) >= self.config.limit:
+                return True
+        return False
+
     def _queries_for(self, connector) -> Sequence[str]:
         slug = connector.settings.slug
         if slug in self.config.queries:
@@ -171,6 +224,11 @@ def run_ingest(config: IngestionConfig, *, output: Path = DEFAULT_OUTPUT) -> Ste
         artifacts={"csv": str(output)},
         logs=[f"Connector totals: {json_dumps(metrics_summary['source'])}"],
     )
+    if manager.cache is not None:
+        stats = manager.cache.stats
+        result.metrics["http_cache"] = {
+            name: stats[name] for name in ("hits", "misses", "revalidated", "stores", "evictions")
+        }
     log_event("ingest", f"Collected {total_written} products from connectors.", extra=result.metrics)
     return result
 
@@ -190,6 +248,20 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         action="store_true",
         help="Disable online collection and rely on bundled offline fixtures.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Online requests in flight across connectors (default: 1, sequential).",
+    )
+    parser.add_argument("--per-host", type=int, default=2, help="Maximum concurrent requests per host.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk HTTP response cache.")
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=3600.0,
+        help="Seconds a cached response is reused before revalidation (default: 3600).",
+    )
     parser.add_argument(
         "--out",
         type=Path,
@@ -202,6 +274,10 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         limit=args.limit,
         countries=[c.upper() for c in args.countries],
         prefer_online=None if not args.offline else False,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        cache_dir=None if args.no_cache else CACHE_DIR / "http",
+        cache_ttl=args.cache_ttl,
     )
     run_ingest(config, output=args.out)
     return 0
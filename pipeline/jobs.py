@@ -0,0 +1,210 @@
+"""Background queue for pipeline runs requested by the GUI backend."""
+
+from __future__ import annotations
+
+import collections
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+from . import log_event
+from .models import StepResult
+
+JOB_HISTORY = 50
+
+# Job and per-step states.
+QUEUED = "queued"
+RUNNING = "running"
+OK = "ok"
+ERROR = "error"
+CANCELLED = "cancelled"
+PENDING = "pending"
+SKIPPED = "skipped"
+
+FINISHED = (OK, ERROR, CANCELLED)
+
+
+@dataclass
+class Job:
+    id: str
+    slug: str
+    key: str
+    plan: List[Tuple[str, Dict[str, object]]]
+    status: str = QUEUED
+    progress: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    requests: int = 1
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        completed = sum(1 for info in self.progress.values() if info["status"] in (OK, ERROR, "empty"))
+        return {
+            "id": self.id,
+            "slug": self.slug,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "requests": self.requests,
+            "current": next((slug for slug, info in self.progress.items() if info["status"] == RUNNING), None),
+            "completed": completed,
+            "total": len(self.plan),
+            "steps": [dict(self.progress[slug], slug=slug) for slug, _ in self.plan],
+        }
+
+
+class JobQueue:
+    """Run pipeline actions one at a time on a background thread.
+
+    ``submit`` returns immediately. A request identical to a queued or
+    running job (same action and overrides) joins that job instead of
+    queueing another run. ``cancel`` drops a queued job; a running one stops
+    before its next step, since a step itself is never interrupted.
+    ``on_step`` is called with every finished step's result.
+    """
+
+    def __init__(
+        self,
+        runner,
+        *,
+        history: int = JOB_HISTORY,
+        on_step: Optional[Callable[[StepResult], None]] = None,
+    ) -> None:
+        self.runner = runner
+        self.history = history
+        self.on_step = on_step
+        self._lock = threading.Condition()
+        self._queue: Deque[Job] = collections.deque()
+        self._jobs: Dict[str, Job] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    # Public API ------------------------------------------------------------
+    def submit(self, slug: str, overrides: Optional[Mapping[str, object]] = None) -> Tuple[Job, bool]:
+        """Queue ``slug`` ("pipeline" or a step); return the job and whether it is new.
+
+        Raises ``KeyError`` for an unknown action.
+        """
+
+        overrides = dict(overrides or {})
+        plan = self._plan(slug, overrides)
+        key = json.dumps([slug, overrides], sort_keys=True, default=str)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.status in (QUEUED, RUNNING) and not job.cancel_requested:
+                    job.requests += 1
+                    return job, False
+            job = Job(id=uuid.uuid4().hex[:12], slug=slug, key=key, plan=plan)
+            job.progress = {step: {"status": PENDING} for step, _ in plan}
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._prune()
+            self._ensure_worker()
+            self._lock.notify()
+        log_event("jobs", f"Queued {slug} as job {job.id}.", extra={"job": job.id})
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created, reverse=True)
+
+    def active(self) -> Optional[Job]:
+        with self._lock:
+            return next((job for job in self._jobs.values() if job.status == RUNNING), None)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            job.cancel_requested = True
+            if job.status == QUEUED:
+                self._queue.remove(job)
+                self._finish(job, CANCELLED)
+        return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> bool:
+        job = self.get(job_id)
+        return job is not None and job.done.wait(timeout)
+
+    # Worker ----------------------------------------------------------------
+    def _plan(self, slug: str, overrides: Mapping[str, object]) -> List[Tuple[str, Dict[str, object]]]:
+        if slug == "pipeline":
+            return [
+                (step, dict(overrides.get(step) or {}) if isinstance(overrides.get(step), dict) else {})
+                for step in self.runner.order
+            ]
+        if slug not in self.runner.steps:
+            raise KeyError(f"Unknown step: {slug}")
+        return [(slug, dict(overrides))]
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._work, name="pipeline-jobs", daemon=True)
+            self._thread.start()
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._lock.wait()
+                job = self._queue.popleft()
+                job.status = RUNNING
+                job.started = time.time()
+            self._execute(job)
+
+    def _execute(self, job: Job) -> None:
+        for step, kwargs in job.plan:
+            with self._lock:
+                if job.cancel_requested:
+                    self._finish(job, CANCELLED)
+                    break
+                progress = job.progress[step]
+                progress.update(status=RUNNING, started=time.time())
+            try:
+                result = self.runner.run_step(step, **kwargs)
+            except Exception as exc:  # the job reports it; the worker keeps going
+                with self._lock:
+                    progress.update(status=ERROR, finished=time.time(), error=str(exc))
+                    job.error = f"{step}: {exc}"
+                    self._finish(job, ERROR)
+                log_event(step, f"Job {job.id} failed: {exc}", status="error", extra={"job": job.id})
+                break
+            with self._lock:
+                progress.update(status=result.status, finished=time.time())
+                wall = result.metrics.get("profile", {}).get("wall_s")
+                if wall is not None:
+                    progress["wall_s"] = wall
+            if self.on_step is not None:
+                self.on_step(result)
+        else:
+            with self._lock:
+                self._finish(job, OK)
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished = time.time()
+        for info in job.progress.values():
+            if info["status"] == PENDING:
+                info["status"] = CANCELLED if status == CANCELLED else SKIPPED
+        job.done.set()
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.status in FINISHED]
+        for job in sorted(finished, key=lambda job: job.created)[: max(0, len(finished) - self.history)]:
+            del self._jobs[job.id]
+
+
+__all__ = ["Job", "JobQueue", "JOB_HISTORY"]
@@ -9,7 +9,7 @@ from typing import Any, Dict, Iterable, List, Mapping, Optional
 ISO8601 = "%Y-%m-%dT%H:%M:%SZ"
 
 
-@dataclass
+@dataclass(slots=True)
 class RawProduct:
     code: str
     name: str
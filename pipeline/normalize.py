@@ -4,14 +4,17 @@ from __future__ import annotations
 
 import argparse
 import csv
+from collections import Counter
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from scripts.python.normalize_products import norm, split_qty
+from scripts.python.textnorm import cache_counters, cache_stats
 
 from . import WORKING_DIR, ensure_directories, log_event
 from .models import StepResult
+from .sharding import run_sharded
 
 CURRENCY_BY_COUNTRY = {
     "PT": "EUR",
@@ -55,9 +58,63 @@ def _normalize_price(value: str) -> Optional[str]:
         return None
 
 
-def normalize_file(input_path: Path, output_path: Path, fallback_country: str) -> int:
+def normalize_row(row: Dict[str, str], fallback_country: str) -> Dict[str, str]:
+    gtin = (row.get("code") or "").strip()
+    country = (row.get("country") or fallback_country).strip().upper() or fallback_country
+    qty, uom = split_qty(row.get("quantity", ""))
+    price_amount = _normalize_price(row.get("price", ""))
+    currency = row.get("currency") or CURRENCY_BY_COUNTRY.get(country, "EUR")
+    return {
+        "gtin": gtin,
+        "name": norm(row.get("product_name", "")),
+        "brand": norm(row.get("brands", "")),
+        "qty": qty,
+        "uom": uom,
+        "country": country,
+        "source": row.get("source", "INGEST"),
+        "source_type": row.get("source_type", "unknown"),
+        "confidence": row.get("confidence", ""),
+        "priority": row.get("priority", ""),
+        "url": row.get("url", ""),
+        "price_amount": price_amount or "",
+        "price_currency": currency,
+        "availability": row.get("availability", ""),
+        "last_seen": row.get("last_seen", ""),
+        "category_raw": norm(row.get("categories", "")),
+        "family": "",
+        "subfamily": "",
+        "provenance": row.get("provenance", ""),
+        "extra": row.get("extra", ""),
+    }
+
+
+def normalize_rows(rows: Iterable[Dict[str, str]], fallback_country: str = "PT") -> Iterator[Dict[str, str]]:
+    """Generator stage used by the streaming runner and :func:`normalize_file`."""
+
+    for row in rows:
+        yield normalize_row(row, fallback_country)
+
+
+def normalize_file(
+    input_path: Path,
+    output_path: Path,
+    fallback_country: str,
+    workers: int = 1,
+    stats: Optional[Counter] = None,
+) -> int:
     ensure_directories()
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    if workers > 1:
+        return run_sharded(
+            input_path,
+            output_path,
+            stage=normalize_rows,
+            stage_kwargs={"fallback_country": fallback_country},
+            fieldnames=FIELDNAMES,
+            workers=workers,
+            counters=cache_counters,
+            stats=stats,
+        )
 
     count = 0
     with input_path.open("r", newline="", encoding="utf-8") as src, output_path.open(
@@ -66,36 +123,8 @@ def normalize_file(input_path: Path, output_path: Path, fallback_country: str) -
         reader = csv.DictReader(src)
         writer = csv.DictWriter(dst, fieldnames=FIELDNAMES)
         writer.writeheader()
-        for row in reader:
-            gtin = (row.get("code") or "").strip()
-            country = (row.get("country") or fallback_country).strip().upper() or fallback_country
-            qty, uom = split_qty(row.get("quantity", ""))
-            price_amount = _normalize_price(row.get("price", ""))
-            currency = row.get("currency") or CURRENCY_BY_COUNTRY.get(country, "EUR")
-            writer.writerow(
-                {
-                    "gtin": gtin,
-                    "name": norm(row.get("product_name", "")),
-                    "brand": norm(row.get("brands", "")),
-                    "qty": qty,
-                    "uom": uom,
-                    "country": country,
-                    "source": row.get("source", "INGEST"),
-                    "source_type": row.get("source_type", "unknown"),
-                    "confidence": row.get("confidence", ""),
-                    "priority": row.get("priority", ""),
-                    "url": row.get("url", ""),
-                    "price_amount": price_amount or "",
-                    "price_currency": currency,
-                    "availability": row.get("availability", ""),
-                    "last_seen": row.get("last_seen", ""),
-                    "category_raw": norm(row.get("categories", "")),
-                    "family": "",
-                    "subfamily": "",
-                    "provenance": row.get("provenance", ""),
-                    "extra": row.get("extra", ""),
-                }
-            )
+        for row in normalize_rows(reader, fallback_country):
+            writer.writerow(row)
             count += 1
     return count
 
@@ -104,12 +133,16 @@ def run_normalize(
     input_path: Path = WORKING_DIR / "ingested.csv",
     output_path: Path = WORKING_DIR / "normalized.csv",
     fallback_country: str = "PT",
+    workers: int = 1,
 ) -> StepResult:
-    count = normalize_file(input_path, output_path, fallback_country)
+    before = cache_counters()
+    worker_lookups: Counter = Counter()
+    count = normalize_file(input_path, output_path, fallback_country, workers=workers, stats=worker_lookups)
+    lookups = cache_counters() - before + worker_lookups
     result = StepResult(
         name="normalize",
         status="ok" if count else "empty",
-        metrics={"normalized": count},
+        metrics={"normalized": count, "workers": workers, "text_cache": cache_stats(lookups)},
         artifacts={"csv": str(output_path)},
     )
     log_event("normalize", f"Normalized {count} rows.", extra=result.metrics)
@@ -133,9 +166,10 @@ def main(argv: List[str] | None = None) -> int:
         help="Output CSV path (default: artifacts/working/normalized.csv).",
     )
     parser.add_argument("--country", default="PT", help="Fallback country code used when missing in the source data.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for sharded execution (default: 1).")
     args = parser.parse_args(argv)
 
-    run_normalize(args.input_path, args.output_path, args.country.upper())
+    run_normalize(args.input_path, args.output_path, args.country.upper(), workers=args.workers)
     return 0
 
 
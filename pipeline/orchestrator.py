@@ -2,17 +2,28 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import Callable, Dict, Iterable, List, Mapping, Optional
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional
 
-from . import OUTPUTS_DIR, WORKING_DIR
+from scripts.python.classify_products_v2 import dictionaries_digest
+from scripts.python.textnorm import cache_counters as text_cache_counters
+from scripts.python.textnorm import cache_stats as text_cache_stats
+
+from . import OUTPUTS_DIR, WORKING_DIR, flush_events, log_event
 from .ingest import IngestionConfig, run_ingest
 from .models import PipelineState, StepResult
-from .normalize import run_normalize
-from .classify import run_classify
-from .validate import run_validate
-from .dedupe import run_dedupe
-from .publish import run_publish
+from .normalize import normalize_rows, run_normalize
+from .classify import classify_rows, run_classify
+from .validate import run_validate, validate_rows
+from .dedupe import group_keys, run_dedupe
+from .incremental import DELTA_NAME, STATE_NAME, ChangeTracker, Key
+from .profiling import StepProfiler, file_bytes, input_bytes
+from .publish import FINAL_CSV, run_publish
+from .streaming import RowCounter, checkpoint_rows, iter_csv_rows
 
 
 @dataclass
@@ -21,14 +32,27 @@ class StepDefinition:
     description: str
     runner: Callable[..., StepResult]
     default_kwargs: Mapping[str, object] = field(default_factory=dict)
+    # Row-wise steps expose a generator stage so ``run_all(streaming=True)`` can
+    # chain them in memory; ``stage_metric`` names the row count in the
+    # StepResult (also used for the rows/sec figure of every step).
+    stage: Optional[Callable[..., Iterator[Dict[str, str]]]] = None
+    stage_metric: str = "rows"
+    # Memo counters a streamed stage feeds and how to report their increase
+    # (e.g. text cache hit rates). Stages sharing ``stage_counters`` cannot be
+    # told apart inside one stream, so the first of them reports for all.
+    stage_counters: Optional[Callable[[], Counter]] = None
+    stage_stats: Optional[Callable[[Counter], Dict[str, object]]] = None
 
 
 DEFAULT_STEPS: List[StepDefinition] = [
     StepDefinition(
         slug="ingest",
         description="Collect supermarket and open-data sources.",
-        runner=lambda **kwargs: run_ingest(IngestionConfig(**kwargs)),
+        runner=lambda output=WORKING_DIR / "ingested.csv", **kwargs: run_ingest(
+            IngestionConfig(**kwargs), output=Path(output)
+        ),
         default_kwargs={"limit": 120, "countries": ("PT", "ANG", "CV"), "prefer_online": None},
+        stage_metric="total_records",
     ),
     StepDefinition(
         slug="normalize",
@@ -39,6 +63,10 @@ DEFAULT_STEPS: List[StepDefinition] = [
             "output_path": WORKING_DIR / "normalized.csv",
             "fallback_country": "PT",
         },
+        stage=lambda rows, **kwargs: normalize_rows(rows, kwargs.get("fallback_country", "PT")),
+        stage_metric="normalized",
+        stage_counters=text_cache_counters,
+        stage_stats=lambda lookups: {"text_cache": text_cache_stats(lookups)},
     ),
     StepDefinition(
         slug="classify",
@@ -48,6 +76,10 @@ DEFAULT_STEPS: List[StepDefinition] = [
             "input_path": WORKING_DIR / "normalized.csv",
             "output_path": WORKING_DIR / "classified.csv",
         },
+        stage=lambda rows, **kwargs: classify_rows(rows),
+        stage_metric="classified",
+        stage_counters=text_cache_counters,
+        stage_stats=lambda lookups: {"text_cache": text_cache_stats(lookups)},
     ),
     StepDefinition(
         slug="validate",
@@ -57,6 +89,8 @@ DEFAULT_STEPS: List[StepDefinition] = [
             "input_path": WORKING_DIR / "classified.csv",
             "output_path": WORKING_DIR / "validated.csv",
         },
+        stage=lambda rows, **kwargs: validate_rows(rows),
+        stage_metric="validated",
     ),
     StepDefinition(
         slug="dedupe",
@@ -67,6 +101,7 @@ DEFAULT_STEPS: List[StepDefinition] = [
             "output_path": WORKING_DIR / "unified.csv",
             "report_path": WORKING_DIR / "duplicates.csv",
         },
+        stage_metric="unified",
     ),
     StepDefinition(
         slug="publish",
@@ -83,27 +118,232 @@ DEFAULT_STEPS: List[StepDefinition] = [
 class SmartPipelineRunner:
     """Execute steps sequentially while capturing structured results."""
 
-    def __init__(self, steps: Iterable[StepDefinition] = DEFAULT_STEPS) -> None:
+    def __init__(self, steps: Iterable[StepDefinition] = DEFAULT_STEPS, *, trace_memory: bool = False) -> None:
         self.steps: Dict[str, StepDefinition] = {step.slug: step for step in steps}
         self.order: List[str] = [step.slug for step in steps]
         self.state = PipelineState()
+        self.trace_memory = trace_memory
 
-    def run_step(self, slug: str, **overrides) -> StepResult:
+    def _step_kwargs(self, slug: str, overrides: Mapping[str, object]) -> Dict[str, object]:
         if slug not in self.steps:
             raise KeyError(f"Unknown step: {slug}")
-        definition = self.steps[slug]
-        kwargs = dict(definition.default_kwargs)
+        kwargs = dict(self.steps[slug].default_kwargs)
         kwargs.update(overrides)
-        result = definition.runner(**kwargs)
+        return kwargs
+
+    def run_step(self, slug: str, **overrides) -> StepResult:
+        kwargs = self._step_kwargs(slug, overrides)
+        result = self._profiled(slug, kwargs)
         self.state.record(result)
+        flush_events()
+        return result
+
+    def _profiled(
+        self,
+        slug: str,
+        kwargs: Mapping[str, object],
+        *,
+        streamed: Iterable[str] = (),
+        read_bytes: Optional[int] = None,
+    ) -> StepResult:
+        """Run a step and attach timing/memory/throughput under ``metrics["profile"]``."""
+
+        if read_bytes is None:
+            read_bytes = input_bytes(kwargs)
+        with StepProfiler(trace_memory=self.trace_memory) as profiler:
+            result = self.steps[slug].runner(**kwargs)
+        rows = result.metrics.get(self.steps[slug].stage_metric)
+        profile = profiler.summary(
+            rows=rows if isinstance(rows, int) else None,
+            read_bytes=read_bytes,
+            written_bytes=file_bytes(result.artifacts.values()),
+        )
+        if streamed:
+            profile["includes"] = list(streamed)
+        result.metrics["profile"] = profile
+        log_event(slug, f"Finished in {profile['wall_s']}s (cpu {profile['cpu_s']}s).", extra={"profile": profile})
         return result
 
-    def run_all(self, overrides: Optional[Mapping[str, Mapping[str, object]]] = None) -> List[StepResult]:
+    def run_all(
+        self,
+        overrides: Optional[Mapping[str, Mapping[str, object]]] = None,
+        *,
+        streaming: bool = False,
+        checkpoint: bool = False,
+        incremental: bool = False,
+    ) -> List[StepResult]:
+        """Run every step in order.
+
+        With ``streaming`` enabled, consecutive steps exposing a ``stage`` are
+        chained as generators and handed to the next step as ``rows=`` instead
+        of round-tripping through working CSVs. ``checkpoint`` still writes
+        those intermediate CSVs for debugging.
+
+        With ``incremental`` enabled, only ingested rows whose fingerprint
+        changed since the last incremental run, plus the unchanged rows dedupe
+        merges with them, go through the remaining steps; publish then
+        replaces the published rows of those dedupe keys. The state and delta
+        live next to the ingested CSV, and the working files of such a run go
+        to ``*_delta`` paths.
+        """
+
         results: List[StepResult] = []
-        override_map = overrides or {}
+        override_map: Dict[str, Dict[str, object]] = {
+            slug: dict(values) for slug, values in (overrides or {}).items()
+        }
+        tracker: Optional[ChangeTracker] = None
+        pending: List[str] = []
         for slug in self.order:
-            step_overrides = override_map.get(slug, {}) if override_map else {}
-            results.append(self.run_step(slug, **step_overrides))
+            step_overrides = override_map.get(slug, {})
+            if streaming and self.steps[slug].stage is not None:
+                pending.append(slug)
+                continue
+            if pending:
+                results.extend(self._run_streamed(pending, slug, override_map, checkpoint=checkpoint))
+                pending = []
+                continue
+            result = self.run_step(slug, **step_overrides)
+            results.append(result)
+            if incremental and slug == "ingest":
+                tracker = self._select_changes(result, override_map)
+        for slug in pending:
+            results.append(self.run_step(slug, **override_map.get(slug, {})))
+        if tracker is not None:
+            tracker.commit()
+        flush_events()
+        return results
+
+    def _select_changes(self, ingest_result: StepResult, override_map: Dict[str, Dict[str, object]]) -> ChangeTracker:
+        ingested = Path(ingest_result.artifacts["csv"])
+        delta_path = ingested.parent / DELTA_NAME
+        tracker = ChangeTracker(ingested.parent / STATE_NAME, self._change_config(override_map))
+        publish_kwargs = self._step_kwargs("publish", override_map.get("publish", {}))
+        upsert = bool(tracker.previous) and (Path(publish_kwargs["output_dir"]) / FINAL_CSV).exists()
+        if not upsert:
+            # No previous state, one built under other dictionaries or settings,
+            # or no outputs to upsert into: rebuild from every row.
+            tracker.reset()
+        fuzzy = self._step_kwargs("dedupe", override_map.get("dedupe", {})).get("fuzzy_threshold") is not None
+        delta = tracker.write_delta(
+            ingested, delta_path, lambda rows: self._group_keys(rows, override_map), blocks=fuzzy
+        )
+        ingest_result.metrics["incremental"] = delta.metrics()
+        log_event(
+            "ingest",
+            f"Incremental run: {delta.changed} new/changed rows, {delta.related} related, "
+            f"{delta.removed} removed, {delta.unchanged} unchanged.",
+        )
+        override_map.setdefault("normalize", {})["input_path"] = delta_path
+        if upsert:
+            self._write_to_delta_paths(override_map)
+        override_map.setdefault("publish", {}).update(upsert=upsert, keys=delta.keys, order=delta.order)
+        return tracker
+
+    def _row_stages(self, override_map: Mapping[str, Mapping[str, object]]) -> List[tuple[str, Dict[str, object]]]:
+        """Row-wise steps between ingest and dedupe with the settings their stages take."""
+
+        stages = []
+        for slug in self.order[self.order.index("ingest") + 1 : self.order.index("dedupe")]:
+            kwargs = self._step_kwargs(slug, override_map.get(slug, {}))
+            for name in ("input_path", "output_path", "workers"):
+                kwargs.pop(name, None)
+            stages.append((slug, kwargs))
+        return stages
+
+    def _change_config(self, override_map: Mapping[str, Mapping[str, object]]) -> str:
+        """Digest of what shapes a published row besides the ingested row itself."""
+
+        fuzzy = self._step_kwargs("dedupe", override_map.get("dedupe", {})).get("fuzzy_threshold")
+        settings = json.dumps([self._row_stages(override_map), fuzzy], sort_keys=True, default=str)
+        digest = hashlib.sha256(dictionaries_digest().encode("utf-8"))
+        digest.update(settings.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _write_to_delta_paths(self, override_map: Dict[str, Dict[str, object]]) -> None:
+        """Send the working files of an upsert run to ``*_delta`` paths.
+
+        Those files only hold the delta, so writing them to the usual paths
+        would truncate what the last full run left there.
+        """
+
+        renamed: Dict[Path, Path] = {}
+        for slug in self.order[self.order.index("ingest") + 1 :]:
+            overrides = override_map.setdefault(slug, {})
+            kwargs = self._step_kwargs(slug, overrides)
+            if kwargs.get("input_path") is not None and Path(kwargs["input_path"]) in renamed:
+                overrides["input_path"] = renamed[Path(kwargs["input_path"])]
+            for name in ("output_path", "report_path"):
+                if kwargs.get(name) is not None:
+                    path = Path(kwargs[name])
+                    renamed[path] = overrides[name] = path.with_name(f"{path.stem}_delta{path.suffix}")
+
+    def _group_keys(
+        self, rows: List[Dict[str, str]], override_map: Mapping[str, Mapping[str, object]]
+    ) -> List[tuple[Key, tuple]]:
+        """Dedupe key and fuzzy block of ingested rows, via the row-wise stages before dedupe."""
+
+        stream: Iterable[Dict[str, str]] = rows
+        for slug, kwargs in self._row_stages(override_map):
+            stream = self.steps[slug].stage(stream, **kwargs)
+        return [group_keys(row) for row in stream]
+
+    def _run_streamed(
+        self,
+        stage_slugs: List[str],
+        consumer_slug: str,
+        override_map: Mapping[str, Mapping[str, object]],
+        *,
+        checkpoint: bool,
+    ) -> List[StepResult]:
+        first_kwargs = self._step_kwargs(stage_slugs[0], override_map.get(stage_slugs[0], {}))
+        first_input = Path(first_kwargs["input_path"])
+        rows: Iterable[Dict[str, str]] = iter_csv_rows(first_input)
+
+        stages: List[tuple[str, RowCounter, Optional[Path]]] = []
+        for slug in stage_slugs:
+            kwargs = self._step_kwargs(slug, override_map.get(slug, {}))
+            kwargs.pop("input_path", None)
+            output_path = kwargs.pop("output_path", None)
+            rows = self.steps[slug].stage(rows, **kwargs)
+            checkpoint_path = Path(output_path) if checkpoint and output_path else None
+            if checkpoint_path is not None:
+                rows = checkpoint_rows(rows, checkpoint_path)
+            counter = RowCounter(rows)
+            rows = counter
+            stages.append((slug, counter, checkpoint_path))
+
+        consumer_kwargs = self._step_kwargs(consumer_slug, override_map.get(consumer_slug, {}))
+        consumer_kwargs["rows"] = rows
+        snapshots = {
+            counters: counters()
+            for counters in {self.steps[slug].stage_counters for slug in stage_slugs}
+            if counters is not None
+        }
+        # The stages run lazily inside the consumer, so they share its profile.
+        consumer_result = self._profiled(
+            consumer_slug, consumer_kwargs, streamed=stage_slugs, read_bytes=file_bytes([first_input])
+        )
+
+        results: List[StepResult] = []
+        for slug, counter, checkpoint_path in stages:
+            definition = self.steps[slug]
+            metrics: Dict[str, object] = {definition.stage_metric: counter.count, "streamed": True}
+            counters = definition.stage_counters
+            if definition.stage_stats is not None and counters in snapshots:
+                # The stream (consumer included) is one measurement.
+                metrics.update(definition.stage_stats(counters() - snapshots.pop(counters)))
+                metrics["stats_includes"] = [*stage_slugs, consumer_slug]
+            result = StepResult(
+                name=slug,
+                status="ok" if counter.count else "empty",
+                metrics=metrics,
+                artifacts={"csv": str(checkpoint_path)} if checkpoint_path else {},
+            )
+            log_event(slug, f"Streamed {counter.count} rows into {consumer_slug}.", extra=result.metrics)
+            self.state.record(result)
+            results.append(result)
+        self.state.record(consumer_result)
+        results.append(consumer_result)
         return results
 
     def status(self) -> Dict[str, Dict[str, object]]:
@@ -0,0 +1,173 @@
+"""Read-only product queries over the published ``final.sqlite``."""
+
+from __future__ import annotations
+
+import base64
+import contextlib
+import functools
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import OUTPUTS_DIR
+from .publish import FINAL_SQLITE
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH = 1000
+POOL_SIZE = 8
+FILTERS = ("brand", "family", "subfamily")
+
+GET_SQL = "SELECT * FROM products WHERE gtin = ? LIMIT 1;"
+# One statement for any batch size: the GTINs travel as a JSON array.
+LOOKUP_SQL = "SELECT * FROM products WHERE gtin IN (SELECT value FROM json_each(?));"
+
+
+class ProductsUnavailable(RuntimeError):
+    """Raised when ``final.sqlite`` has not been published or cannot be opened."""
+
+
+@functools.lru_cache(maxsize=None)
+def _search_sql(filters: Tuple[str, ...], paged: bool) -> Tuple[str, Tuple[str, ...]]:
+    """Statement and keyset columns for one combination of filters.
+
+    Every shape walks an index in order: brand and family+subfamily scans
+    end in rowid, while a family-only scan is ordered by subfamily first.
+    """
+
+    keys = ("subfamily", "rowid") if filters == ("family",) else ("rowid",)
+    where = [f'"{name}" = ?' for name in filters]
+    if paged:
+        where.append(f"({', '.join(keys)}) > ({', '.join('?' * len(keys))})")
+    clause = f" WHERE {' AND '.join(where)}" if where else ""
+    return f"SELECT rowid, * FROM products{clause} ORDER BY {', '.join(keys)} LIMIT ?;", keys
+
+
+def _encode_cursor(values: List[object]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, size: int) -> List[object]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return values
+
+
+class ProductStore:
+    """Query ``final.sqlite`` through a small pool of read-only connections.
+
+    Each connection is opened with ``mode=ro`` and keeps its own prepared
+    statement cache, so repeated lookups only bind parameters. A connection
+    serves one request at a time. When publish swaps a new database into
+    place the idle connections are closed and later requests open the new
+    file.
+    """
+
+    def __init__(self, path: Path = OUTPUTS_DIR / FINAL_SQLITE, *, pool_size: int = POOL_SIZE) -> None:
+        self.path = Path(path)
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+        self._identity: Optional[Tuple[int, int]] = None
+
+    # Public API ------------------------------------------------------------
+    def get(self, gtin: str) -> Optional[dict]:
+        with self._connection() as conn:
+            row = conn.execute(GET_SQL, (gtin.strip(),)).fetchone()
+        return dict(row) if row is not None else None
+
+    def lookup(self, gtins: Iterable[str]) -> Dict[str, dict]:
+        """Products for every known GTIN in ``gtins`` (at most ``MAX_BATCH``), keyed by GTIN."""
+
+        wanted = list(dict.fromkeys(str(gtin).strip() for gtin in gtins))
+        if len(wanted) > MAX_BATCH:
+            raise ValueError(f"at most {MAX_BATCH} GTINs per lookup")
+        if not wanted:
+            return {}
+        with self._connection() as conn:
+            rows = conn.execute(LOOKUP_SQL, (json.dumps(wanted),)).fetchall()
+        found: Dict[str, dict] = {}
+        for row in rows:
+            found.setdefault(row["gtin"], dict(row))
+        return found
+
+    def search(
+        self,
+        *,
+        brand: Optional[str] = None,
+        family: Optional[str] = None,
+        subfamily: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: int = PAGE_SIZE,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """One page of products matching the filters and the cursor for the next page.
+
+        Raises ``ValueError`` for a bad ``limit`` or ``after`` cursor.
+        """
+
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        values = {"brand": brand, "family": family, "subfamily": subfamily}
+        filters = tuple(name for name in FILTERS if values[name] is not None)
+        sql, keys = _search_sql(filters, after is not None)
+        params: List[object] = [values[name] for name in filters]
+        if after is not None:
+            params.extend(_decode_cursor(after, len(keys)))
+        params.append(limit + 1)
+        with self._connection() as conn:
+            rows = [dict(row) for row in conn.execute(sql, params)]
+        cursor = _encode_cursor([rows[limit - 1][key] for key in keys]) if len(rows) > limit else None
+        for row in rows:
+            del row["rowid"]
+        return rows[:limit], cursor
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    # Internals ---------------------------------------------------------------
+    @contextlib.contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            raise ProductsUnavailable(f"{self.path.name} has not been published yet") from None
+        identity = (stat.st_dev, stat.st_ino)
+        with self._lock:
+            stale: List[sqlite3.Connection] = []
+            if identity != self._identity:
+                stale, self._idle, self._identity = self._idle, [], identity
+            conn = self._idle.pop() if self._idle else None
+        for old in stale:
+            old.close()
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                keep = identity == self._identity and len(self._idle) < self.pool_size
+                if keep:
+                    self._idle.append(conn)
+            if not keep:
+                conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        except sqlite3.Error as exc:
+            raise ProductsUnavailable(f"cannot open {self.path.name}: {exc}") from None
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+__all__ = ["MAX_BATCH", "MAX_PAGE_SIZE", "PAGE_SIZE", "ProductStore", "ProductsUnavailable"]
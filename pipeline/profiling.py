@@ -0,0 +1,121 @@
+"""Resource accounting around pipeline step execution."""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional
+
+try:  # pragma: no cover - not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore[assignment]
+
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def _reset_peak_rss() -> bool:
+    """Restart the kernel's RSS high-water mark (Linux only)."""
+
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        for line in _PROC_STATUS.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _children_cpu() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def file_bytes(paths: Iterable[object]) -> int:
+    total = 0
+    for value in paths:
+        try:
+            path = Path(str(value))
+            if path.is_file():
+                total += path.stat().st_size
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+def input_bytes(kwargs: Mapping[str, object]) -> int:
+    """Size of the files a step reads, taken from its ``*input_path`` kwargs."""
+
+    return file_bytes(value for key, value in kwargs.items() if key.endswith("input_path") and value)
+
+
+class StepProfiler:
+    """Measure wall time, CPU time and peak memory of the enclosed block.
+
+    CPU time includes worker processes that exited during the block (the
+    sharded steps' pools). ``peak_rss_mb`` is the step's own high-water mark
+    where the kernel can reset it and the process-wide one otherwise.
+    ``trace_memory`` also records the tracemalloc peak of Python
+    allocations, at a noticeable runtime cost.
+    """
+
+    def __init__(self, *, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.metrics: Dict[str, object] = {}
+
+    def __enter__(self) -> "StepProfiler":
+        self._rss_scoped = _reset_peak_rss()
+        self._owns_trace = self.trace_memory and not tracemalloc.is_tracing()
+        if self._owns_trace:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._children = _children_cpu()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu + _children_cpu() - self._children
+        self.metrics = {
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "peak_rss_mb": _peak_rss_mb(),
+            "peak_rss_scope": "step" if self._rss_scoped else "process",
+        }
+        if self.trace_memory:
+            self.metrics["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            if self._owns_trace:
+                tracemalloc.stop()
+
+    def summary(self, *, rows: Optional[int], read_bytes: int, written_bytes: int) -> Dict[str, object]:
+        metrics = dict(self.metrics)
+        metrics["input_bytes"] = read_bytes
+        metrics["output_bytes"] = written_bytes
+        if rows is not None:
+            metrics["rows"] = rows
+            wall = metrics["wall_s"]
+            metrics["rows_per_s"] = round(rows / wall, 1) if wall else None
+        return metrics
+
+
+__all__ = ["StepProfiler", "file_bytes", "input_bytes"]
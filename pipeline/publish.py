@@ -4,10 +4,24 @@ from __future__ import annotations
 
 import argparse
 import csv
+import heapq
+import itertools
 import json
+import os
+import queue
 import sqlite3
+import threading
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+try:  # pragma: no cover - optional dependency for the Parquet output
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None  # type: ignore[assignment]
+    pq = None  # type: ignore[assignment]
+
+from scripts.python.dedupe_unify import make_key
 
 from . import OUTPUTS_DIR, ensure_directories, log_event
 from .models import StepResult
@@ -15,6 +29,11 @@ from .models import StepResult
 FINAL_CSV = "final.csv"
 FINAL_JSONL = "final.jsonl"
 FINAL_SQLITE = "final.sqlite"
+FINAL_PARQUET = "final.parquet"
+
+Key = Tuple[str, str]
+# Columns read by ``make_key``: upserts replace published rows by dedupe key.
+KEY_FIELDS = ("gtin", "gtin_valid", "gtin14", "name", "brand", "qty", "uom")
 
 
 def load_rows(unified_path: Path) -> List[dict]:
@@ -24,18 +43,77 @@ def load_rows(unified_path: Path) -> List[dict]:
     return rows
 
 
-def export_csv(rows: List[dict], columns: List[str], output_path: Path) -> None:
-    with output_path.open("w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=columns)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+class Sink:
+    """Destination for published rows.
 
+    ``open`` receives the column list and ``write`` is called once per row in
+    input order. ``close`` finishes a staged copy next to ``path`` and
+    ``commit`` renames it into place, which only happens once every sink has
+    closed cleanly; ``abort`` discards the staged copy instead. Rows are
+    shared between sinks, so implementations must not mutate them.
+    """
 
-def export_jsonl(rows: List[dict], output_path: Path) -> None:
-    with output_path.open("w", encoding="utf-8") as fh:
-        for row in rows:
-            fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+    name = ""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.staging = path.with_name(f".{path.name}.building")
+
+    def open(self, columns: List[str]) -> None:
+        raise NotImplementedError
+
+    def write(self, row: dict) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def commit(self) -> None:
+        os.replace(self.staging, self.path)
+
+    def abort(self) -> None:
+        for leftover in self._staged_files():
+            if leftover.exists():
+                leftover.unlink()
+
+    def _staged_files(self) -> List[Path]:
+        return [self.staging]
+
+
+class CsvSink(Sink):
+    name = "csv"
+
+    def open(self, columns: List[str]) -> None:
+        self._fh = self.staging.open("w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._fh, fieldnames=columns)
+        self._writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        self._writer.writerow(row)
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def abort(self) -> None:
+        self._fh.close()
+        super().abort()
+
+
+class JsonlSink(Sink):
+    name = "jsonl"
+
+    def open(self, columns: List[str]) -> None:
+        self._fh = self.staging.open("w", encoding="utf-8")
+
+    def write(self, row: dict) -> None:
+        self._fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def abort(self) -> None:
+        self._fh.close()
+        super().abort()
 
 
 TYPE_OVERRIDES = {
@@ -45,31 +123,440 @@ TYPE_OVERRIDES = {
 }
 
 
-def export_sqlite(rows: List[dict], columns: List[str], output_path: Path) -> None:
-    conn = sqlite3.connect(output_path)
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_products_gtin ON products(gtin);",
+    "CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand);",
+    "CREATE INDEX IF NOT EXISTS idx_products_family ON products(family, subfamily);",
+)
+
+SQLITE_BATCH_SIZE = 5000
+
+
+def _insert_sql(columns: List[str]) -> str:
+    quoted = ", ".join(f'"{col}"' for col in columns)
+    placeholders = ", ".join(["?"] * len(columns))
+    return f"INSERT INTO products ({quoted}) VALUES ({placeholders});"
+
+
+class SqliteSink(Sink):
+    """Build the database from scratch for an atomic swap into place.
+
+    The staged database uses WAL and relaxed sync, is loaded in batches
+    inside a single transaction and indexed after the load, then switched
+    back to a rollback journal before ``commit`` renames it over the old
+    file, so readers only ever see a complete ``final.sqlite``.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path, *, batch_size: int = SQLITE_BATCH_SIZE) -> None:
+        super().__init__(path)
+        self.batch_size = batch_size
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _staged_files(self) -> List[Path]:
+        return [self.staging, Path(f"{self.staging}-wal"), Path(f"{self.staging}-shm")]
+
+    def open(self, columns: List[str]) -> None:
+        Sink.abort(self)
+        self.columns = columns
+        self._batch: List[list] = []
+        self._conn = sqlite3.connect(self.staging, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=OFF;")
+        self._conn.execute("PRAGMA temp_store=MEMORY;")
+        col_defs = [f'"{col}" {TYPE_OVERRIDES.get(col, "TEXT")}' for col in columns]
+        self._conn.execute("BEGIN;")
+        self._conn.execute(f"CREATE TABLE products ({', '.join(col_defs)});")
+        self._insert = _insert_sql(columns) if columns else ""
+
+    def write(self, row: dict) -> None:
+        self._batch.append([row.get(col, "") for col in self.columns])
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._batch and self._insert:
+            self._conn.executemany(self._insert, self._batch)
+        self._batch = []
+
+    def close(self) -> None:
+        try:
+            self._flush()
+            if self.columns:
+                for statement in INDEXES:
+                    self._conn.execute(statement)
+            self._conn.execute("COMMIT;")
+            self._conn.execute("PRAGMA journal_mode=DELETE;")
+        finally:
+            self._disconnect()
+
+    def abort(self) -> None:
+        self._disconnect()
+        super().abort()
+
+    def _disconnect(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+PARQUET_ROW_GROUP = 65536
+PARQUET_COMPRESSION = "zstd"
+
+
+def _parquet_value(value: object, kind: str) -> object:
+    if value is None or value == "":
+        return None
     try:
-        col_defs = []
-        for col in columns:
-            col_type = TYPE_OVERRIDES.get(col, "TEXT")
-            col_defs.append(f'"{col}" {col_type}')
-        conn.execute(f"CREATE TABLE IF NOT EXISTS products ({', '.join(col_defs)});")
-        conn.execute("DELETE FROM products;")
-        if rows:
-            placeholders = ", ".join(["?"] * len(columns))
-            conn.executemany(
-                f"INSERT INTO products ({', '.join(columns)}) VALUES ({placeholders});",
-                [[row.get(col, "") for col in columns] for row in rows],
+        if kind == "REAL":
+            return float(value)
+        if kind == "INTEGER":
+            return int(float(value))
+    except (TypeError, ValueError):
+        return None
+    return value
+
+
+class ParquetSink(Sink):
+    """Typed, compressed Parquet copy of the dataset for dataframe readers.
+
+    Columns listed in ``TYPE_OVERRIDES`` are stored as float64/int64 (values
+    that do not parse become nulls) and everything else as strings. Rows are
+    buffered column-wise and flushed one row group at a time.
+    """
+
+    name = "parquet"
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        row_group_size: int = PARQUET_ROW_GROUP,
+        compression: str = PARQUET_COMPRESSION,
+    ) -> None:
+        if pq is None:
+            raise RuntimeError("pyarrow is required for the Parquet output (pip install pyarrow)")
+        super().__init__(path)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._writer = None
+
+    def open(self, columns: List[str]) -> None:
+        arrow_types = {"REAL": pa.float64(), "INTEGER": pa.int64()}
+        self.columns = columns
+        self._kinds = [TYPE_OVERRIDES.get(col, "TEXT") for col in columns]
+        self._schema = pa.schema([(col, arrow_types.get(kind, pa.string())) for col, kind in zip(columns, self._kinds)])
+        self._buffer: List[list] = [[] for _ in columns]
+        self._pending = 0
+        self._writer = pq.ParquetWriter(str(self.staging), self._schema, compression=self.compression)
+
+    def write(self, row: dict) -> None:
+        for values, col, kind in zip(self._buffer, self.columns, self._kinds):
+            values.append(_parquet_value(row.get(col, ""), kind))
+        self._pending += 1
+        if self._pending >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            table = pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(self._buffer, self._schema)],
+                schema=self._schema,
             )
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_products_gtin ON products(gtin);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_products_family ON products(family, subfamily);")
-        conn.commit()
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+        self._buffer = [[] for _ in self.columns]
+        self._pending = 0
+
+    def close(self) -> None:
+        try:
+            self._flush()
+        finally:
+            self._writer.close()
+            self._writer = None
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        super().abort()
+
+
+_DONE = object()
+_ABORT = object()
+
+
+class ThreadedSink(Sink):
+    """Run another sink on its own writer thread behind a bounded queue.
+
+    Rows are handed over in batches to keep queue overhead low. The wrapped
+    sink is opened, fed and closed entirely on the writer thread (SQLite
+    connections are bound to the thread that created them); an error there
+    is re-raised from the next ``write`` or from ``close``.
+    """
+
+    def __init__(self, sink: Sink, *, batch_size: int = 256, max_pending: int = 64) -> None:
+        super().__init__(sink.path)
+        self.sink = sink
+        self.name = sink.name
+        self.batch_size = batch_size
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._batch: List[dict] = []
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self, columns: List[str]) -> None:
+        self._thread = threading.Thread(target=self._run, args=(columns,), name=f"publish-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self, columns: List[str]) -> None:
+        item = None
+        try:
+            self.sink.open(columns)
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    self.sink.close()
+                    return
+                if item is _ABORT:
+                    self.sink.abort()
+                    return
+                for row in item:
+                    self.sink.write(row)
+        except BaseException as exc:  # surfaced to the publishing thread
+            self._error = exc
+            if item is not _ABORT:
+                try:
+                    self.sink.abort()
+                except Exception:
+                    pass
+            # Keep consuming so the producer never blocks on a full queue.
+            while item is not _DONE and item is not _ABORT:
+                item = self._queue.get()
+
+    def write(self, row: dict) -> None:
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            if self._error is not None:
+                raise self._error
+            self._queue.put(self._batch)
+            self._batch = []
+
+    def close(self) -> None:
+        if self._batch:
+            self._queue.put(self._batch)
+            self._batch = []
+        self._queue.put(_DONE)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def commit(self) -> None:
+        self.sink.commit()
+
+    def abort(self) -> None:
+        self._batch = []
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_ABORT)
+            self._thread.join()
+        self.sink.abort()
+
+
+def default_sinks(output_dir: Path) -> List[Sink]:
+    return [
+        CsvSink(output_dir / FINAL_CSV),
+        JsonlSink(output_dir / FINAL_JSONL),
+        SqliteSink(output_dir / FINAL_SQLITE),
+    ]
+
+
+def fan_out(rows: Iterable[dict], columns: List[str], sinks: Sequence[Sink]) -> int:
+    """Write every row of ``rows`` to all ``sinks`` in a single pass.
+
+    The artifacts are only swapped into place once every sink has finished,
+    so a failure anywhere leaves all previous outputs untouched.
+    """
+
+    opened: List[Sink] = []
+    count = 0
+    try:
+        for sink in sinks:
+            sink.open(columns)
+            opened.append(sink)
+        for row in rows:
+            for sink in sinks:
+                sink.write(row)
+            count += 1
+        for sink in sinks:
+            sink.close()
+    except BaseException:
+        for sink in opened:
+            try:
+                sink.abort()
+            except Exception:
+                pass
+        raise
+    for sink in sinks:
+        sink.commit()
+    return count
+
+
+def export_csv(rows: Iterable[dict], columns: List[str], output_path: Path) -> None:
+    fan_out(rows, columns, [CsvSink(output_path)])
+
+
+def export_jsonl(rows: Iterable[dict], output_path: Path) -> None:
+    fan_out(rows, [], [JsonlSink(output_path)])
+
+
+def export_sqlite(
+    rows: Iterable[dict],
+    columns: List[str],
+    output_path: Path,
+    *,
+    batch_size: int = SQLITE_BATCH_SIZE,
+) -> int:
+    return fan_out(rows, columns, [SqliteSink(output_path, batch_size=batch_size)])
+
+
+def _merge_columns(existing: List[str], columns: List[str]) -> List[str]:
+    merged = list(existing)
+    for col in columns:
+        if col not in merged:
+            merged.append(col)
+    return merged
+
+
+def _replaced_keys(rows: List[dict], keys: Optional[Iterable[Key]]) -> Set[Key]:
+    return set(keys) if keys is not None else {make_key(row) for row in rows}
+
+
+def _in_order(kept: Iterable[dict], rows: List[dict], order: Optional[Mapping[Key, int]]) -> Iterator[dict]:
+    """Kept rows then the new ones, or both interleaved by each key's ``order``."""
+
+    if order is None:
+        return itertools.chain(kept, rows)
+    last = len(order)
+    return heapq.merge(kept, rows, key=lambda row: order.get(make_key(row), last))
+
+
+def upsert_csv(
+    rows: List[dict],
+    columns: List[str],
+    output_path: Path,
+    *,
+    keys: Optional[Iterable[Key]] = None,
+    order: Optional[Mapping[Key, int]] = None,
+) -> int:
+    """Replace every row whose dedupe key is in ``keys`` with ``rows``; return how many went.
+
+    ``keys`` defaults to the keys of ``rows``. With ``order`` (the first
+    ingest position of each key) the new rows are merged in where a full
+    run would have written them instead of being appended.
+    """
+
+    if not output_path.exists():
+        export_csv(rows, columns, output_path)
+        return 0
+    replaced = _replaced_keys(rows, keys)
+    if not rows and not replaced:
+        return 0
+    removed = 0
+    tmp = output_path.with_suffix(".tmp")
+    with output_path.open("r", newline="", encoding="utf-8") as src, tmp.open("w", newline="", encoding="utf-8") as dst:
+        reader = csv.DictReader(src)
+        merged = _merge_columns(list(reader.fieldnames or []), columns)
+        writer = csv.DictWriter(dst, fieldnames=merged)
+        writer.writeheader()
+
+        def kept() -> Iterator[dict]:
+            nonlocal removed
+            for row in reader:
+                if make_key(row) in replaced:
+                    removed += 1
+                    continue
+                yield row
+
+        writer.writerows(_in_order(kept(), rows, order))
+    os.replace(tmp, output_path)
+    return removed
+
+
+def upsert_jsonl(
+    rows: List[dict],
+    output_path: Path,
+    *,
+    keys: Optional[Iterable[Key]] = None,
+    order: Optional[Mapping[Key, int]] = None,
+) -> int:
+    """JSONL counterpart of :func:`upsert_csv`."""
+
+    if not output_path.exists():
+        export_jsonl(rows, output_path)
+        return 0
+    replaced = _replaced_keys(rows, keys)
+    if not rows and not replaced:
+        return 0
+    removed = 0
+    tmp = output_path.with_suffix(".tmp")
+    with output_path.open("r", encoding="utf-8") as src, tmp.open("w", encoding="utf-8") as dst:
+
+        def kept() -> Iterator[dict]:
+            nonlocal removed
+            for line in src:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if make_key(row) in replaced:
+                    removed += 1
+                    continue
+                yield row
+
+        for row in _in_order(kept(), rows, order):
+            dst.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(tmp, output_path)
+    return removed
+
+
+def upsert_sqlite(
+    rows: List[dict],
+    columns: List[str],
+    output_path: Path,
+    *,
+    keys: Optional[Iterable[Key]] = None,
+) -> int:
+    """SQLite counterpart of :func:`upsert_csv`; new rows are appended."""
+
+    if not output_path.exists():
+        export_sqlite(rows, columns, output_path)
+        return 0
+    replaced = _replaced_keys(rows, keys)
+    if not rows and not replaced:
+        return 0
+    conn = sqlite3.connect(output_path)
+    try:
+        existing = [info[1] for info in conn.execute("PRAGMA table_info(products);")]
+        key_columns = [col for col in KEY_FIELDS if col in existing]
+        selected = ", ".join(["rowid"] + [f'"{col}"' for col in key_columns])
+        stale = [
+            (values[0],)
+            for values in conn.execute(f"SELECT {selected} FROM products;")
+            if make_key({col: value or "" for col, value in zip(key_columns, values[1:])}) in replaced
+        ]
+        with conn:
+            for col in columns:
+                if col not in existing:
+                    conn.execute(f'ALTER TABLE products ADD COLUMN "{col}" {TYPE_OVERRIDES.get(col, "TEXT")};')
+            conn.executemany("DELETE FROM products WHERE rowid = ?;", stale)
+            if columns and rows:
+                conn.executemany(_insert_sql(columns), [[row.get(col, "") for col in columns] for row in rows])
     finally:
         conn.close()
+    return len(stale)
 
 
 def main(argv: List[str] | None = None) -> int:
-    parser = argparse.ArgumentParser(description="Publish the unified dataset to CSV/JSONL/SQLite artifacts.")
+    parser = argparse.ArgumentParser(description="Publish the unified dataset to CSV/JSONL/SQLite/Parquet artifacts.")
     parser.add_argument(
         "--in",
         dest="input_path",
@@ -84,40 +571,87 @@ def main(argv: List[str] | None = None) -> int:
         default=OUTPUTS_DIR,
         help="Output directory for final artifacts.",
     )
+    parser.add_argument(
+        "--upsert",
+        action="store_true",
+        help="Update rows in existing final artifacts by GTIN instead of rebuilding them.",
+    )
+    parser.add_argument(
+        "--threaded",
+        action="store_true",
+        help="Run each output writer on its own thread.",
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write a typed, compressed final.parquet (requires pyarrow).",
+    )
     args = parser.parse_args(argv)
 
-    run_publish(args.input_path, args.output_dir)
+    run_publish(args.input_path, args.output_dir, upsert=args.upsert, threaded=args.threaded, parquet=args.parquet)
     return 0
 
 
 def run_publish(
     input_path: Path = Path("artifacts/working/unified.csv"),
     output_dir: Path = OUTPUTS_DIR,
+    upsert: bool = False,
+    threaded: bool = False,
+    sinks: Optional[Sequence[Sink]] = None,
+    parquet: bool = False,
+    keys: Optional[Iterable[Key]] = None,
+    order: Optional[Mapping[Key, int]] = None,
 ) -> StepResult:
+    """Publish ``input_path`` to the final artifacts.
+
+    A full publish streams the input once and fans every row out to
+    ``sinks`` (CSV, JSONL and SQLite by default, plus Parquet with
+    ``parquet``); with ``threaded`` each sink runs on its own writer thread.
+    Upserts replace the published rows sharing a dedupe key with the input
+    (``keys``/``order`` as in :func:`upsert_csv`), then rebuild the Parquet
+    copy from the updated ``final.csv`` since Parquet files cannot be patched.
+    """
+
     ensure_directories()
     output_dir.mkdir(parents=True, exist_ok=True)
-    rows = load_rows(input_path)
-    columns = list(rows[0].keys()) if rows else []
-
-    csv_path = output_dir / FINAL_CSV
-    jsonl_path = output_dir / FINAL_JSONL
-    sqlite_path = output_dir / FINAL_SQLITE
-
-    export_csv(rows, columns, csv_path)
-    export_jsonl(rows, jsonl_path)
-    export_sqlite(rows, columns, sqlite_path)
-
-    result = StepResult(
-        name="publish",
-        status="ok",
-        metrics={"rows": len(rows)},
-        artifacts={
-            "csv": str(csv_path),
-            "jsonl": str(jsonl_path),
-            "sqlite": str(sqlite_path),
-        },
-    )
-    log_event("publish", f"Published {len(rows)} rows to final artifacts.", extra=result.metrics)
+
+    if upsert:
+        rows = load_rows(input_path)
+        columns = list(rows[0].keys()) if rows else []
+        csv_path = output_dir / FINAL_CSV
+        jsonl_path = output_dir / FINAL_JSONL
+        sqlite_path = output_dir / FINAL_SQLITE
+        keys = _replaced_keys(rows, keys)
+        removed = upsert_csv(rows, columns, csv_path, keys=keys, order=order)
+        upsert_jsonl(rows, jsonl_path, keys=keys, order=order)
+        upsert_sqlite(rows, columns, sqlite_path, keys=keys)
+        count = len(rows)
+        artifacts = {"csv": str(csv_path), "jsonl": str(jsonl_path), "sqlite": str(sqlite_path)}
+        if parquet:
+            parquet_sink = ParquetSink(output_dir / FINAL_PARQUET)
+            with csv_path.open("r", newline="", encoding="utf-8") as fh:
+                reader = csv.DictReader(fh)
+                fan_out(reader, list(reader.fieldnames or []), [parquet_sink])
+            artifacts["parquet"] = str(parquet_sink.path)
+    else:
+        targets = list(sinks) if sinks is not None else default_sinks(output_dir)
+        if parquet:
+            targets.append(ParquetSink(output_dir / FINAL_PARQUET))
+        if threaded:
+            targets = [ThreadedSink(sink) for sink in targets]
+        with input_path.open("r", newline="", encoding="utf-8") as fh:
+            reader = csv.DictReader(fh)
+            count = fan_out(reader, list(reader.fieldnames or []), targets)
+        artifacts = {sink.name: str(sink.path) for sink in targets}
+
+    metrics: Dict[str, object] = {"rows": count, "mode": "upsert" if upsert else "full"}
+    if upsert:
+        metrics["replaced"] = removed
+    if threaded and not upsert:
+        metrics["threaded"] = True
+    result = StepResult(name="publish", status="ok", metrics=metrics, artifacts=artifacts)
+    verb = "Upserted" if upsert else "Published"
+    log_event("publish", f"{verb} {count} rows to final artifacts.", extra=result.metrics)
     return result
 
 
@@ -0,0 +1,189 @@
+"""Compact row representation for steps that hold many rows in memory."""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import MutableMapping
+from itertools import compress, repeat
+from operator import is_not, itemgetter
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+# Columns with few distinct values: one shared string per value instead of a
+# fresh copy from every parsed CSV line.
+INTERNED_FIELDS = frozenset(
+    {
+        "gtin_valid",
+        "brand",
+        "uom",
+        "country",
+        "source",
+        "source_type",
+        "confidence",
+        "priority",
+        "price_currency",
+        "availability",
+        "family",
+        "subfamily",
+    }
+)
+
+_ABSENT: Any = object()
+
+
+class RowSchema:
+    """Column positions shared by every :class:`Row` built from it.
+
+    Interned columns are laid out first so :meth:`row` can fetch and intern
+    them in one pass. Unknown columns are appended the first time a row
+    carries them, so a schema can start from ``ORDERED_FIELDS`` and still
+    accept extra columns (which are stored as is).
+    """
+
+    __slots__ = ("fields", "index", "interned", "_leading", "_interned_getter", "_plain_getter", "_pickers")
+
+    def __init__(self, fields: Iterable[str] = (), interned: Iterable[str] = INTERNED_FIELDS) -> None:
+        self.fields: List[str] = []
+        self.index: dict = {}
+        fields = list(dict.fromkeys(fields))
+        interned = frozenset(interned)
+        leading = [name for name in fields if name in interned]
+        self.interned = frozenset(leading)
+        self._leading = len(leading)
+        self._interned_getter = _getter(leading)
+        self._plain_getter: Any = None
+        self._pickers: dict = {}
+        for name in leading + [name for name in fields if name not in self.interned]:
+            self.add(name)
+
+    def add(self, name: str) -> int:
+        position = self.index.get(name)
+        if position is None:
+            position = self.index[name] = len(self.fields)
+            self.fields.append(name)
+            self._plain_getter = _getter(self.fields[self._leading:])
+        return position
+
+    def row(self, mapping: Mapping[str, Any]) -> "Row":
+        """Copy ``mapping`` into a new row, interning low-cardinality values."""
+
+        if isinstance(mapping, Row) and mapping._schema is self:
+            return mapping.copy()
+        try:
+            # Rows from one CSV reader carry every column: fetch them in one go.
+            values = [*map(sys.intern, self._interned_getter(mapping)), *self._plain_getter(mapping)]
+            missing = 0
+        except (KeyError, TypeError):
+            get = mapping.get
+            values = [get(name, _ABSENT) for name in self.fields]
+            missing = values.count(_ABSENT)
+            for position in range(self._leading):
+                value = values[position]
+                if value.__class__ is str:
+                    values[position] = sys.intern(value)
+        if len(mapping) > len(values) - missing:
+            for name, value in mapping.items():
+                if name not in self.index:
+                    self.add(name)
+                    values.append(value)
+        return Row(self, values)
+
+    def picker(self, names: Tuple[str, ...]) -> Any:
+        """``itemgetter`` over the positions of ``names`` (None if one is unknown)."""
+
+        picker = self._pickers.get(names, _ABSENT)
+        if picker is _ABSENT:
+            positions = [self.index.get(name) for name in names]
+            picker = None if None in positions or len(positions) < 2 else itemgetter(*positions)
+            self._pickers[names] = picker
+        return picker
+
+
+def _getter(names: List[str]) -> Any:
+    # itemgetter returns a bare value, not a tuple, for a single name.
+    return itemgetter(*names) if len(names) > 1 else None
+
+
+class Row(MutableMapping):
+    """Mutable mapping over a list of values laid out by a :class:`RowSchema`.
+
+    It behaves like the ``Dict[str, str]`` rows elsewhere in the pipeline
+    (``get``, item access, ``items``, ``copy``, ``csv.DictWriter``), but
+    carries no per-row hash table or key strings.
+    """
+
+    __slots__ = ("_schema", "_values")
+
+    def __init__(self, schema: RowSchema, values: List[Any]) -> None:
+        self._schema = schema
+        self._values = values
+
+    def _position(self, key: str) -> Optional[int]:
+        position = self._schema.index.get(key)
+        if position is None or position >= len(self._values) or self._values[position] is _ABSENT:
+            return None
+        return position
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._position(key)
+        if position is None:
+            raise KeyError(key)
+        return self._values[position]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self._values[self._schema.index[key]]
+        except (KeyError, IndexError):
+            return default
+        return default if value is _ABSENT else value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._position(key) is not None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        position = self._schema.add(key)
+        values = self._values
+        if position >= len(values):
+            values.extend([_ABSENT] * (position + 1 - len(values)))
+        values[position] = value
+
+    def __delitem__(self, key: str) -> None:
+        position = self._position(key)
+        if position is None:
+            raise KeyError(key)
+        self._values[position] = _ABSENT
+
+    def __iter__(self) -> Iterator[str]:
+        fields = self._schema.fields
+        for position, value in enumerate(self._values):
+            if value is not _ABSENT:
+                yield fields[position]
+
+    def __len__(self) -> int:
+        return sum(1 for value in self._values if value is not _ABSENT)
+
+    def items(self):  # type: ignore[override]
+        values = self._values
+        return compress(zip(self._schema.fields, values), map(is_not, values, repeat(_ABSENT)))
+
+    def pick(self, names: Tuple[str, ...], default: Any = "") -> Sequence[Any]:
+        """Values for ``names`` in order, e.g. for ``csv.writer``."""
+
+        picker = self._schema.picker(names)
+        values = self._values
+        if picker is not None and len(values) == len(self._schema.fields):
+            picked = picker(values)
+            if _ABSENT not in picked:
+                return picked
+        return [self.get(name, default) for name in names]
+
+    def copy(self) -> "Row":
+        return Row(self._schema, list(self._values))
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"Row({self.to_dict()!r})"
+
+
+__all__ = ["INTERNED_FIELDS", "Row", "RowSchema"]
@@ -3,22 +3,43 @@
 from __future__ import annotations
 
 import argparse
-from typing import List, Sequence
+from typing import List, Optional, Sequence
 
-from . import OUTPUTS_DIR, WORKING_DIR, log_event
+from . import OUTPUTS_DIR, WORKING_DIR, flush_events, log_event
 from .orchestrator import SmartPipelineRunner
 
 
-def run_all(limit: int, countries: Sequence[str], offline: bool = False) -> None:
-    runner = SmartPipelineRunner()
+def run_all(
+    limit: int,
+    countries: Sequence[str],
+    offline: bool = False,
+    *,
+    stream: bool = False,
+    checkpoint: bool = False,
+    concurrency: int = 1,
+    incremental: bool = False,
+    workers: int = 1,
+    dedupe_memory_mb: Optional[float] = None,
+    fuzzy_threshold: Optional[float] = None,
+    threaded_publish: bool = False,
+    parquet: bool = False,
+    trace_memory: bool = False,
+) -> None:
+    runner = SmartPipelineRunner(trace_memory=trace_memory)
     overrides = {
         "ingest": {
             "limit": limit,
             "countries": tuple(c.upper() for c in countries),
             "prefer_online": False if offline else None,
-        }
+            "concurrency": concurrency,
+        },
+        "normalize": {"workers": workers},
+        "classify": {"workers": workers},
+        "validate": {"workers": workers},
+        "dedupe": {"memory_budget_mb": dedupe_memory_mb, "fuzzy_threshold": fuzzy_threshold},
+        "publish": {"threaded": threaded_publish, "parquet": parquet},
     }
-    runner.run_all(overrides=overrides)
+    runner.run_all(overrides=overrides, streaming=stream, checkpoint=checkpoint, incremental=incremental)
     log_event(
         "pipeline",
         "Pipeline completed successfully.",
@@ -27,6 +48,7 @@ def run_all(limit: int, countries: Sequence[str], offline: bool = False) -> None
             "final_csv": str(OUTPUTS_DIR / "final.csv"),
         },
     )
+    flush_events()
 
 
 def main(argv: List[str] | None = None) -> int:
@@ -40,9 +62,77 @@ def main(argv: List[str] | None = None) -> int:
         help="Countries to include during ingestion (repeat for multiples).",
     )
     parser.add_argument("--offline", action="store_true", help="Disable online fetching during ingestion.")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Chain normalize/classify/validate in memory instead of via working CSVs.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="With --stream, still write the intermediate working CSVs for debugging.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Online ingest requests in flight across connectors (default: 1, sequential).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only reprocess new/changed ingested rows and upsert them into the final artifacts.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for normalize/classify/validate (file handoff mode only).",
+    )
+    parser.add_argument(
+        "--dedupe-memory-mb",
+        type=float,
+        default=None,
+        help="Run dedupe with spill-to-disk partitions capped at this memory budget.",
+    )
+    parser.add_argument(
+        "--fuzzy-threshold",
+        type=float,
+        default=None,
+        help="Merge GTIN-less near-duplicates at this name similarity (0-1) during dedupe.",
+    )
+    parser.add_argument(
+        "--threaded-publish",
+        action="store_true",
+        help="Write the CSV/JSONL/SQLite outputs on parallel writer threads.",
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also publish a typed final.parquet for dataframe consumers (requires pyarrow).",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record the tracemalloc peak of each step (slower).",
+    )
     args = parser.parse_args(argv)
 
-    run_all(args.limit, [c.upper() for c in args.countries], offline=args.offline)
+    run_all(
+        args.limit,
+        [c.upper() for c in args.countries],
+        offline=args.offline,
+        stream=args.stream,
+        checkpoint=args.checkpoint,
+        concurrency=args.concurrency,
+        incremental=args.incremental,
+        workers=args.workers,
+        dedupe_memory_mb=args.dedupe_memory_mb,
+        fuzzy_threshold=args.fuzzy_threshold,
+        threaded_publish=args.threaded_publish,
+        parquet=args.parquet,
+        trace_memory=args.trace_memory,
+    )
     return 0
 
 
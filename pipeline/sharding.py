@@ -0,0 +1,128 @@
+"""Multiprocess execution of row-wise steps over byte-range CSV chunks."""
+
+from __future__ import annotations
+
+import csv
+import io
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+MIN_CHUNK_BYTES = 1 << 20
+MAX_CHUNK_BYTES = 64 << 20
+CHUNKS_PER_WORKER = 4
+
+RowStage = Callable[..., Iterator[Dict[str, str]]]
+
+
+def read_header(path: Path) -> Tuple[bytes, List[str]]:
+    with path.open("rb") as fh:
+        header = fh.readline()
+    fieldnames = next(csv.reader([header.decode("utf-8")]), [])
+    return header, fieldnames
+
+
+def plan_chunks(path: Path, chunks: int) -> List[Tuple[int, int]]:
+    """Split the rows of ``path`` into roughly ``chunks`` byte ranges.
+
+    Boundaries only fall after a newline where the running count of quote
+    characters is even, so quoted fields containing newlines stay whole.
+    """
+
+    size = path.stat().st_size
+    ranges: List[Tuple[int, int]] = []
+    with path.open("rb") as fh:
+        start = len(fh.readline())
+        target = max(1, (size - start) // max(1, chunks))
+        chunk_start = pos = start
+        quotes = 0
+        for line in fh:
+            pos += len(line)
+            quotes += line.count(b'"')
+            if quotes % 2 == 0 and pos - chunk_start >= target:
+                ranges.append((chunk_start, pos))
+                chunk_start = pos
+        if chunk_start < pos:
+            ranges.append((chunk_start, pos))
+    return ranges
+
+
+def _process_chunk(task: tuple) -> Tuple[int, Optional[Counter]]:
+    input_path, start, end, header, output_path, stage, stage_kwargs, fieldnames, counters = task
+    before = counters() if counters is not None else None
+    with open(input_path, "rb") as fh:
+        fh.seek(start)
+        data = fh.read(end - start)
+    reader = csv.DictReader(io.StringIO((header + data).decode("utf-8"), newline=""))
+    count = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as dst:
+        writer = csv.DictWriter(dst, fieldnames=fieldnames)
+        for row in stage(reader, **stage_kwargs):
+            writer.writerow(row)
+            count += 1
+    return count, (counters() - before if counters is not None else None)
+
+
+def run_sharded(
+    input_path: Path,
+    output_path: Path,
+    *,
+    stage: RowStage,
+    fieldnames: Sequence[str],
+    workers: int,
+    stage_kwargs: Optional[Mapping[str, object]] = None,
+    initializer: Optional[Callable[[], None]] = None,
+    counters: Optional[Callable[[], Counter]] = None,
+    stats: Optional[Counter] = None,
+) -> int:
+    """Run ``stage`` over ``input_path`` on ``workers`` processes.
+
+    Each chunk is written to its own temporary file and the pieces are
+    concatenated in input order, so the output matches a serial run. The
+    ``initializer`` runs once per worker process (e.g. to load dictionaries).
+    With ``counters`` (a module-level snapshot function such as the text
+    memo counters) each chunk's increase is summed into ``stats``.
+    """
+
+    header, _ = read_header(input_path)
+    size = input_path.stat().st_size
+    chunk_count = max(workers * CHUNKS_PER_WORKER, size // MAX_CHUNK_BYTES)
+    chunk_count = max(1, min(chunk_count, size // MIN_CHUNK_BYTES or 1))
+    ranges = plan_chunks(input_path, chunk_count)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    scratch = Path(tempfile.mkdtemp(prefix=f".{output_path.stem}-", dir=output_path.parent))
+    try:
+        tasks = [
+            (
+                str(input_path),
+                start,
+                end,
+                header,
+                str(scratch / f"{index:05d}.csv"),
+                stage,
+                dict(stage_kwargs or {}),
+                list(fieldnames),
+                counters if stats is not None else None,
+            )
+            for index, (start, end) in enumerate(ranges)
+        ]
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+            results = list(pool.map(_process_chunk, tasks))
+        with output_path.open("w", newline="", encoding="utf-8") as dst:
+            csv.DictWriter(dst, fieldnames=list(fieldnames)).writeheader()
+            for task in tasks:
+                with open(task[4], "r", newline="", encoding="utf-8") as part:
+                    shutil.copyfileobj(part, dst)
+        for _, delta in results:
+            if stats is not None and delta is not None:
+                stats.update(delta)
+        return sum(count for count, _ in results)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+__all__ = ["plan_chunks", "read_header", "run_sharded"]
@@ -3,9 +3,14 @@
 from __future__ import annotations
 
 import json
+import math
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Set
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+from urllib.parse import urlparse
 
 try:  # pragma: no cover - allow running in offline environments without requests
     import requests
@@ -13,6 +18,7 @@ except ImportError:  # pragma: no cover - fallback for tests/offline usage
     requests = None  # type: ignore[assignment]
 
 from ..models import RawProduct, ensure_iso8601
+from .cache import ResponseCache
 
 USER_AGENT = "barcode-datacenter/1.0 (+https://github.com/barcode-datacenter)"
 
@@ -33,10 +39,50 @@ class ConnectorSettings:
     offline_file: Optional[str] = None
     prefer_online: bool = True
     per_query_limit: int = 25
+    max_pages: int = 50
+
+
+class HostLimiter:
+    """Cap the number of concurrent online requests issued to each host."""
+
+    def __init__(self, per_host: int = 2) -> None:
+        self.per_host = max(1, per_host)
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.Semaphore(self.per_host)
+                self._semaphores[host] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        semaphore = self._semaphore(urlparse(url).netloc or url)
+        with semaphore:
+            yield
+
+
+class _Budget:
+    """Records a concurrent :meth:`BaseConnector.collect` still needs.
+
+    The consumer lowers ``remaining`` after each query, so prefetches still
+    paging through later queries stop once the earlier ones filled the budget.
+    """
+
+    __slots__ = ("remaining",)
+
+    def __init__(self, remaining: int) -> None:
+        self.remaining = remaining
 
 
 class BaseConnector:
     settings: ConnectorSettings
+    API_URL: str = ""
+    host_limiter: Optional[HostLimiter] = None
+    response_cache: Optional[ResponseCache] = None
 
     def __init__(
         self,
@@ -56,19 +102,40 @@ class BaseConnector:
             self.settings = dataclass_replace(self.settings, prefer_online=prefer_online)
 
     # API -----------------------------------------------------------------
-    def collect(self, *, limit: int, queries: Optional[Sequence[str]] = None) -> List[RawProduct]:
+    def collect(
+        self,
+        *,
+        limit: int,
+        queries: Optional[Sequence[str]] = None,
+        executor: Optional[Executor] = None,
+    ) -> List[RawProduct]:
+        """Collect up to ``limit`` records, online first and offline as fallback.
+
+        When an ``executor`` is given every query is fetched concurrently; the
+        responses are still consumed in query order, each cut to the budget the
+        sequential loop would have asked for, so both paths return the same records.
+        The prefetches share that budget and stop paging once it is spent.
+        """
+
         queries = list(queries or self.settings.default_queries)
         results: List[RawProduct] = []
         seen_codes: Set[str] = set()
         errors: List[str] = []
 
         if self.settings.prefer_online:
-            for query in queries:
-                if len(results) >= limit:
+            prefetched = None
+            budget = _Budget(limit)
+            if executor is not None:
+                prefetched = [executor.submit(self._fetch_limited, query, limit, budget) for query in queries]
+            for index, query in enumerate(queries):
+                remaining = budget.remaining = max(0, limit - len(results))
+                if not remaining:
                     break
-                remaining = max(0, limit - len(results))
                 try:
-                    online_records = self._fetch_online(query, remaining)
+                    if prefetched is not None:
+                        online_records = prefetched[index].result()[:remaining]
+                    else:
+                        online_records = self._fetch_limited(query, remaining)
                 except ConnectorError as exc:
                     errors.append(str(exc))
                     continue
@@ -79,6 +146,9 @@ class BaseConnector:
                     results.append(record)
                     if len(results) >= limit:
                         break
+            if prefetched is not None:
+                for future in prefetched:
+                    future.cancel()
 
         if len(results) < limit:
             offline_records = self._load_offline()
@@ -97,10 +167,102 @@ class BaseConnector:
 
         return results
 
+    def _fetch_limited(self, query: str, limit: int, budget: Optional[_Budget] = None) -> List[RawProduct]:
+        limiter = self.host_limiter
+        with limiter.slot(self.API_URL or self.settings.slug) if limiter is not None else nullcontext():
+            if budget is not None and not budget.remaining:
+                # Earlier queries filled the budget while this one was queued.
+                return []
+            return self._fetch_online(query, limit, budget)
+
     # Hooks ---------------------------------------------------------------
-    def _fetch_online(self, query: str, limit: int) -> List[RawProduct]:
+    def _fetch_online(self, query: str, limit: int, budget: Optional[_Budget] = None) -> List[RawProduct]:
+        if getattr(self, "session", None) is None:
+            raise ConnectorError("requests não disponível para recolha online")
+        results: List[RawProduct] = []
+        for items in self._iter_pages(query, limit, budget):
+            for item in items:
+                record = self._convert_item(item, query)
+                if record is None:
+                    continue
+                results.append(record)
+                if len(results) >= limit:
+                    return results
+        if not results:
+            raise ConnectorError(f"{self.settings.slug} returned no products")
+        return results
+
+    def _fetch_page(self, query: str, page: int, page_size: int) -> List[dict]:
         raise ConnectorError(f"{self.settings.slug}: online collection not implemented")
 
+    def _convert_item(self, item: dict, query: str) -> Optional[RawProduct]:
+        raise NotImplementedError
+
+    def _get_json(self, query: str, page: int, params: dict, headers: dict) -> dict:
+        """GET ``API_URL`` through the response cache, revalidating stale entries."""
+
+        cache = self.response_cache
+        key = json.dumps([self.settings.slug, query, page, params], sort_keys=True, default=str)
+        entry = cache.get(key) if cache is not None else None
+        if entry is not None and cache.is_fresh(entry):
+            cache.count("hits")
+            return entry.payload
+        if entry is not None:
+            headers = {**headers, **entry.conditional_headers()}
+
+        resp = self.session.get(self.API_URL, params=params, headers=headers, timeout=15)
+        if resp.status_code == 304 and entry is not None:
+            cache.count("revalidated")
+            cache.refresh(key, entry)
+            return entry.payload
+        if resp.status_code != 200:
+            raise ConnectorError(f"{self.settings.slug} online request failed: {resp.status_code}")
+        data = resp.json()
+        if cache is not None:
+            cache.count("misses")
+            response_headers = getattr(resp, "headers", None) or {}
+            cache.put(
+                key,
+                data,
+                etag=response_headers.get("ETag"),
+                last_modified=response_headers.get("Last-Modified"),
+            )
+        return data
+
+    def _iter_pages(self, query: str, limit: int, budget: Optional[_Budget] = None) -> Iterator[List[dict]]:
+        """Yield raw result pages until ``limit`` items are seen or results run out.
+
+        The next page is requested on a helper thread while the caller converts
+        the current one, unless a shared ``budget`` says the pages already
+        fetched cover what is still needed. Failures after the first page end
+        the iteration early so partial results are kept.
+        """
+
+        page_size = max(1, min(limit or self.settings.per_query_limit, self.settings.per_query_limit))
+        last_page = min(self.settings.max_pages, max(1, math.ceil((limit or page_size) / page_size)))
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.settings.slug}-page") as prefetch:
+            pending = prefetch.submit(self._fetch_page, query, 1, page_size)
+            page = 1
+            try:
+                while pending is not None:
+                    try:
+                        items = pending.result()
+                    except ConnectorError:
+                        if page == 1:
+                            raise
+                        return
+                    exhausted = (
+                        len(items) < page_size
+                        or page >= last_page
+                        or (budget is not None and page * page_size >= budget.remaining)
+                    )
+                    pending = None if exhausted else prefetch.submit(self._fetch_page, query, page + 1, page_size)
+                    page += 1
+                    yield items
+            finally:
+                if pending is not None:
+                    pending.cancel()
+
     def _load_offline(self) -> List[RawProduct]:
         if not self.settings.offline_file:
             return []
@@ -168,5 +330,6 @@ __all__ = [
     "BaseConnector",
     "ConnectorError",
     "ConnectorSettings",
+    "HostLimiter",
     "USER_AGENT",
 ]
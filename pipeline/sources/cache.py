@@ -0,0 +1,135 @@
+"""Persistent HTTP response cache shared by the source connectors."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class CachedResponse:
+    payload: Any
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """JSON response cache on disk with a TTL and an LRU cap on total size.
+
+    Each entry is one file named after the SHA-1 of its key. File mtimes
+    double as the LRU clock, so recency survives between runs.
+    """
+
+    def __init__(self, root: Path, *, ttl: float = 3600.0, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        entries = sorted(self.root.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for path in entries:
+            size = path.stat().st_size
+            self._index[path.name] = size
+            self._total += size
+
+    # Lookup ----------------------------------------------------------------
+    def get(self, key: str) -> Optional[CachedResponse]:
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("key") != key:
+            return None
+        with self._lock:
+            self._mark_used(path)
+        return CachedResponse(
+            payload=data.get("payload"),
+            stored_at=float(data.get("stored_at", 0.0)),
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+        )
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.stored_at < self.ttl
+
+    def count(self, name: str) -> None:
+        """Increment ``stats[name]``; connectors on the ingest thread pool share the cache."""
+
+        with self._lock:
+            self.stats[name] += 1
+
+    # Updates ---------------------------------------------------------------
+    def put(self, key: str, payload: Any, *, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        path = self._path(key)
+        body = json.dumps(
+            {
+                "key": key,
+                "stored_at": time.time(),
+                "etag": etag,
+                "last_modified": last_modified,
+                "payload": payload,
+            },
+            ensure_ascii=False,
+        )
+        # Unique per writer, so two processes or threads storing one key never
+        # interleave their bytes; the last os.replace wins.
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, path)
+        with self._lock:
+            self._total -= self._index.pop(path.name, 0)
+            size = path.stat().st_size
+            self._index[path.name] = size
+            self._total += size
+            self.stats["stores"] += 1
+            self._evict()
+
+    def refresh(self, key: str, entry: CachedResponse) -> None:
+        """Restart the TTL of ``entry`` after a 304 Not Modified response."""
+
+        self.put(key, entry.payload, etag=entry.etag, last_modified=entry.last_modified)
+
+    # Internals -------------------------------------------------------------
+    def _path(self, key: str) -> Path:
+        return self.root / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def _mark_used(self, path: Path) -> None:
+        if path.name in self._index:
+            self._index.move_to_end(path.name)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and len(self._index) > 1:
+            name, size = self._index.popitem(last=False)
+            self._total -= size
+            try:
+                (self.root / name).unlink()
+            except OSError:
+                pass
+            self.stats["evictions"] += 1
+
+
+__all__ = ["CachedResponse", "ResponseCache"]
@@ -11,7 +11,8 @@ try:  # pragma: no cover - optional dependency
 except ImportError:  # pragma: no cover
     requests = None  # type: ignore[assignment]
 
-from .base import BaseConnector, ConnectorError, ConnectorSettings, USER_AGENT, dataclass_replace
+from .base import BaseConnector, ConnectorSettings, USER_AGENT, dataclass_replace
+from .cache import ResponseCache
 from ..models import RawProduct
 
 DATA_FOLDER = "supermarkets"
@@ -51,58 +52,47 @@ class ContinentePTConnector(BaseConnector):
         per_query_limit=30,
     )
 
-    def _fetch_online(self, query: str, limit: int) -> List[RawProduct]:
-        if getattr(self, "session", None) is None:
-            raise ConnectorError("requests não disponível para recolha online")
+    def _fetch_page(self, query: str, page: int, page_size: int) -> List[dict]:
         params = {
             "text": query,
-            "page": 1,
-            "pageSize": min(limit or self.settings.per_query_limit, self.settings.per_query_limit),
+            "page": page,
+            "pageSize": page_size,
             "sortBy": "relevance",
         }
         headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-        resp = self.session.get(self.API_URL, params=params, headers=headers, timeout=15)
-        if resp.status_code != 200:
-            raise ConnectorError(f"continente_pt online request failed: {resp.status_code}")
-        data = resp.json()
-        items = data.get("products") or data.get("items") or []
-        results: List[RawProduct] = []
-        for item in items:
-            code = item.get("ean") or item.get("gtin") or item.get("code") or item.get("id")
-            if not code:
-                continue
-            name = item.get("name") or item.get("description") or ""
-            brand = item.get("brand") or item.get("brandName") or ""
-            quantity = item.get("packaging") or item.get("size") or item.get("unit") or ""
-            categories = item.get("categories") or item.get("breadcrumbs") or []
-            if isinstance(categories, str):
-                categories = [c.strip() for c in categories.split(">") if c.strip()]
-            price = _price_from_payload(item, "price", "price.current")
-            url = item.get("url") or item.get("productUrl") or ""
-            availability = item.get("stockStatus") or item.get("availability") or ""
-            last_seen = item.get("lastUpdated") or item.get("lastSeen") or datetime.utcnow().isoformat() + "Z"
-            product = self._make_product(
-                code=code,
-                name=name,
-                brand=brand,
-                quantity=quantity,
-                categories=categories,
-                country="PT",
-                url=url or f"https://www.continente.pt/pesquisa/?q={query}",
-                confidence=0.9,
-                priority=self.settings.priority,
-                price=price,
-                currency="EUR",
-                availability=availability,
-                last_seen=last_seen,
-                extra={"query": query, "online": True},
-            )
-            results.append(product)
-            if len(results) >= limit:
-                break
-        if not results:
-            raise ConnectorError("continente_pt returned no products")
-        return results
+        data = self._get_json(query, page, params, headers)
+        return data.get("products") or data.get("items") or []
+
+    def _convert_item(self, item: dict, query: str) -> Optional[RawProduct]:
+        code = item.get("ean") or item.get("gtin") or item.get("code") or item.get("id")
+        if not code:
+            return None
+        name = item.get("name") or item.get("description") or ""
+        brand = item.get("brand") or item.get("brandName") or ""
+        quantity = item.get("packaging") or item.get("size") or item.get("unit") or ""
+        categories = item.get("categories") or item.get("breadcrumbs") or []
+        if isinstance(categories, str):
+            categories = [c.strip() for c in categories.split(">") if c.strip()]
+        price = _price_from_payload(item, "price", "price.current")
+        url = item.get("url") or item.get("productUrl") or ""
+        availability = item.get("stockStatus") or item.get("availability") or ""
+        last_seen = item.get("lastUpdated") or item.get("lastSeen") or datetime.utcnow().isoformat() + "Z"
+        return self._make_product(
+            code=code,
+            name=name,
+            brand=brand,
+            quantity=quantity,
+            categories=categories,
+            country="PT",
+            url=url or f"https://www.continente.pt/pesquisa/?q={query}",
+            confidence=0.9,
+            priority=self.settings.priority,
+            price=price,
+            currency="EUR",
+            availability=availability,
+            last_seen=last_seen,
+            extra={"query": query, "online": True},
+        )
 
     def _convert_payload(self, payload: dict) -> Optional[RawProduct]:
         code = payload.get("code")
@@ -142,48 +132,37 @@ class ShopriteAngolaConnector(BaseConnector):
         per_query_limit=30,
     )
 
-    def _fetch_online(self, query: str, limit: int) -> List[RawProduct]:
-        if getattr(self, "session", None) is None:
-            raise ConnectorError("requests não disponível para recolha online")
+    def _fetch_page(self, query: str, page: int, page_size: int) -> List[dict]:
         params = {
             "q": query,
-            "page": 1,
-            "pageSize": min(limit or self.settings.per_query_limit, self.settings.per_query_limit),
+            "page": page,
+            "pageSize": page_size,
         }
         headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-        resp = self.session.get(self.API_URL, params=params, headers=headers, timeout=15)
-        if resp.status_code != 200:
-            raise ConnectorError(f"shoprite_ao online request failed: {resp.status_code}")
-        data = resp.json()
-        items = data.get("items") or data.get("products") or []
-        results: List[RawProduct] = []
-        for item in items:
-            code = item.get("ean") or item.get("barcode") or item.get("code")
-            if not code:
-                continue
-            price = _price_from_payload(item, "price", "price.value", "price.current")
-            product = self._make_product(
-                code=code,
-                name=item.get("name", ""),
-                brand=item.get("brand", ""),
-                quantity=item.get("unit", ""),
-                categories=item.get("breadcrumbs", []) or item.get("categories", []),
-                country="ANG",
-                url=item.get("url", "") or f"https://www.shoprite.co.ao/search?q={query}",
-                confidence=0.88,
-                priority=self.settings.priority,
-                price=price,
-                currency="AOA",
-                availability=item.get("availability", ""),
-                last_seen=item.get("updated_at") or item.get("last_seen"),
-                extra={"query": query, "online": True},
-            )
-            results.append(product)
-            if len(results) >= limit:
-                break
-        if not results:
-            raise ConnectorError("shoprite_ao returned no products")
-        return results
+        data = self._get_json(query, page, params, headers)
+        return data.get("items") or data.get("products") or []
+
+    def _convert_item(self, item: dict, query: str) -> Optional[RawProduct]:
+        code = item.get("ean") or item.get("barcode") or item.get("code")
+        if not code:
+            return None
+        price = _price_from_payload(item, "price", "price.value", "price.current")
+        return self._make_product(
+            code=code,
+            name=item.get("name", ""),
+            brand=item.get("brand", ""),
+            quantity=item.get("unit", ""),
+            categories=item.get("breadcrumbs", []) or item.get("categories", []),
+            country="ANG",
+            url=item.get("url", "") or f"https://www.shoprite.co.ao/search?q={query}",
+            confidence=0.88,
+            priority=self.settings.priority,
+            price=price,
+            currency="AOA",
+            availability=item.get("availability", ""),
+            last_seen=item.get("updated_at") or item.get("last_seen"),
+            extra={"query": query, "online": True},
+        )
 
     def _convert_payload(self, payload: dict) -> Optional[RawProduct]:
         code = payload.get("code")
@@ -223,44 +202,33 @@ class NosSuperCVConnector(BaseConnector):
         per_query_limit=30,
     )
 
-    def _fetch_online(self, query: str, limit: int) -> List[RawProduct]:
-        if getattr(self, "session", None) is None:
-            raise ConnectorError("requests não disponível para recolha online")
-        params = {"q": query, "page": 1, "pageSize": min(limit or 30, 30)}
+    def _fetch_page(self, query: str, page: int, page_size: int) -> List[dict]:
+        params = {"q": query, "page": page, "pageSize": page_size}
         headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-        resp = self.session.get(self.API_URL, params=params, headers=headers, timeout=15)
-        if resp.status_code != 200:
-            raise ConnectorError(f"nossuper_cv online request failed: {resp.status_code}")
-        data = resp.json()
-        items = data.get("products") or data.get("items") or []
-        results: List[RawProduct] = []
-        for item in items:
-            code = item.get("ean") or item.get("barcode") or item.get("code")
-            if not code:
-                continue
-            price = _price_from_payload(item, "price", "price.value")
-            product = self._make_product(
-                code=code,
-                name=item.get("name", ""),
-                brand=item.get("brand", ""),
-                quantity=item.get("unit", ""),
-                categories=item.get("categories", []),
-                country="CV",
-                url=item.get("url", "") or f"https://www.nossuper.cv/pesquisa?q={query}",
-                confidence=0.85,
-                priority=self.settings.priority,
-                price=price,
-                currency="CVE",
-                availability=item.get("availability", ""),
-                last_seen=item.get("updated_at") or item.get("last_seen"),
-                extra={"query": query, "online": True},
-            )
-            results.append(product)
-            if len(results) >= limit:
-                break
-        if not results:
-            raise ConnectorError("nossuper_cv returned no products")
-        return results
+        data = self._get_json(query, page, params, headers)
+        return data.get("products") or data.get("items") or []
+
+    def _convert_item(self, item: dict, query: str) -> Optional[RawProduct]:
+        code = item.get("ean") or item.get("barcode") or item.get("code")
+        if not code:
+            return None
+        price = _price_from_payload(item, "price", "price.value")
+        return self._make_product(
+            code=code,
+            name=item.get("name", ""),
+            brand=item.get("brand", ""),
+            quantity=item.get("unit", ""),
+            categories=item.get("categories", []),
+            country="CV",
+            url=item.get("url", "") or f"https://www.nossuper.cv/pesquisa?q={query}",
+            confidence=0.85,
+            priority=self.settings.priority,
+            price=price,
+            currency="CVE",
+            availability=item.get("availability", ""),
+            last_seen=item.get("updated_at") or item.get("last_seen"),
+            extra={"query": query, "online": True},
+        )
 
     def _convert_payload(self, payload: dict) -> Optional[RawProduct]:
         code = payload.get("code")
@@ -300,55 +268,45 @@ class OpenFoodFactsFallback(BaseConnector):
         per_query_limit=100,
     )
 
-    def _fetch_online(self, query: str, limit: int) -> List[RawProduct]:
-        if getattr(self, "session", None) is None:
-            raise ConnectorError("requests não disponível para recolha online")
+    def _fetch_page(self, query: str, page: int, page_size: int) -> List[dict]:
         params = {
             "search_terms": query,
             "search_simple": 1,
             "json": 1,
-            "page_size": min(limit or self.settings.per_query_limit, self.settings.per_query_limit),
+            "page": page,
+            "page_size": page_size,
             "fields": "code,product_name,brands,quantity,categories,countries,url,last_modified_t",
         }
-        resp = self.session.get(self.API_URL, params=params, headers={"User-Agent": USER_AGENT}, timeout=15)
-        if resp.status_code != 200:
-            raise ConnectorError(f"openfoodfacts online request failed: {resp.status_code}")
-        data = resp.json()
-        items = data.get("products") or []
-        results: List[RawProduct] = []
-        for item in items:
-            code = item.get("code")
-            if not code:
-                continue
-            categories = (item.get("categories") or "").split(",")
-            countries = (item.get("countries") or "").upper()
-            country = "PT"
-            if "ANGOLA" in countries:
-                country = "ANG"
-            elif "CABO VERDE" in countries or "CAPE VERDE" in countries:
-                country = "CV"
-            product = self._make_product(
-                code=code,
-                name=item.get("product_name", ""),
-                brand=item.get("brands", ""),
-                quantity=item.get("quantity", ""),
-                categories=[c.strip() for c in categories if c.strip()],
-                country=country,
-                url=item.get("url", ""),
-                confidence=0.6,
-                priority=self.settings.priority,
-                price=None,
-                currency=None,
-                availability=None,
-                last_seen=None,
-                extra={"query": query, "online": True},
-            )
-            results.append(product)
-            if len(results) >= limit:
-                break
-        if not results:
-            raise ConnectorError("openfoodfacts returned no products")
-        return results
+        data = self._get_json(query, page, params, {"User-Agent": USER_AGENT})
+        return data.get("products") or []
+
+    def _convert_item(self, item: dict, query: str) -> Optional[RawProduct]:
+        code = item.get("code")
+        if not code:
+            return None
+        categories = (item.get("categories") or "").split(",")
+        countries = (item.get("countries") or "").upper()
+        country = "PT"
+        if "ANGOLA" in countries:
+            country = "ANG"
+        elif "CABO VERDE" in countries or "CAPE VERDE" in countries:
+            country = "CV"
+        return self._make_product(
+            code=code,
+            name=item.get("product_name", ""),
+            brand=item.get("brands", ""),
+            quantity=item.get("quantity", ""),
+            categories=[c.strip() for c in categories if c.strip()],
+            country=country,
+            url=item.get("url", ""),
+            confidence=0.6,
+            priority=self.settings.priority,
+            price=None,
+            currency=None,
+            availability=None,
+            last_seen=None,
+            extra={"query": query, "online": True},
+        )
 
     def _convert_payload(self, payload: dict) -> Optional[RawProduct]:
         code = payload.get("code")
@@ -392,6 +350,7 @@ def build_default_connectors(
     *,
     session: Optional[object] = None,
     prefer_online: Optional[bool] = None,
+    response_cache: Optional[ResponseCache] = None,
 ) -> List[BaseConnector]:
     if session is None and requests is not None:
         session = requests.Session()
@@ -401,8 +360,9 @@ def build_default_connectors(
         NosSuperCVConnector(data_root, session=session, prefer_online=True),
         OpenFoodFactsFallback(data_root, session=session, prefer_online=False),
     ]
-    if prefer_online is not None:
-        for connector in connectors:
+    for connector in connectors:
+        connector.response_cache = response_cache
+        if prefer_online is not None:
             connector.settings = dataclass_replace(connector.settings, prefer_online=prefer_online)
     return connectors
 
@@ -0,0 +1,44 @@
+"""Helpers for chaining row-wise steps as in-memory generator stages."""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+
+def iter_csv_rows(path: Path) -> Iterator[Dict[str, str]]:
+    """Yield rows from ``path`` lazily, closing the file once exhausted."""
+
+    with path.open("r", newline="", encoding="utf-8") as fh:
+        yield from csv.DictReader(fh)
+
+
+def checkpoint_rows(rows: Iterable[Dict[str, str]], path: Path) -> Iterator[Dict[str, str]]:
+    """Pass rows through unchanged while mirroring them to a CSV checkpoint."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer: Optional[csv.DictWriter] = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(fh, fieldnames=list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
+            yield row
+
+
+class RowCounter:
+    """Count rows flowing through a stage without materialising them."""
+
+    def __init__(self, rows: Iterable[Dict[str, str]]) -> None:
+        self._rows = rows
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for row in self._rows:
+            self.count += 1
+            yield row
+
+
+__all__ = ["iter_csv_rows", "checkpoint_rows", "RowCounter"]
@@ -4,32 +4,58 @@ from __future__ import annotations
 
 import argparse
 import csv
+from itertools import islice
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List
 
-from scripts.python.validate_gtin import valid_gtin
+from scripts.python.validate_gtin import BATCH_SIZE, mark_gtins
 
 from . import WORKING_DIR, ensure_directories, log_event
 from .models import StepResult
+from .sharding import read_header, run_sharded
 
 
-def validate_file(input_path: Path, output_path: Path) -> int:
+# Added by this step: the validity flag and the zero-padded GTIN-14 that
+# dedupe keys on, so UPC-12/EAN-13/GTIN-14 spellings of a code collide.
+ADDED_FIELDS = ("gtin_valid", "gtin14")
+
+
+def _output_fields(fieldnames: List[str]) -> List[str]:
+    return fieldnames + [field for field in ADDED_FIELDS if field not in fieldnames]
+
+
+def validate_rows(rows: Iterable[Dict[str, str]], batch_size: int = BATCH_SIZE) -> Iterator[Dict[str, str]]:
+    """Generator stage used by the streaming runner and :func:`validate_file`.
+
+    Rows are checked ``batch_size`` at a time through :func:`mark_gtins`.
+    """
+
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, batch_size))
+        if not chunk:
+            return
+        mark_gtins(chunk)
+        yield from chunk
+
+
+def validate_file(input_path: Path, output_path: Path, workers: int = 1) -> int:
     ensure_directories()
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    if workers > 1:
+        _, fieldnames = read_header(input_path)
+        return run_sharded(
+            input_path, output_path, stage=validate_rows, fieldnames=_output_fields(fieldnames), workers=workers
+        )
 
     count = 0
     with input_path.open("r", newline="", encoding="utf-8") as src, output_path.open(
         "w", newline="", encoding="utf-8"
     ) as dst:
         reader = csv.DictReader(src)
-        fieldnames = list(reader.fieldnames or [])
-        if "gtin_valid" not in fieldnames:
-            fieldnames.append("gtin_valid")
-        writer = csv.DictWriter(dst, fieldnames=fieldnames)
+        writer = csv.DictWriter(dst, fieldnames=_output_fields(list(reader.fieldnames or [])))
         writer.writeheader()
-        for row in reader:
-            gtin = (row.get("gtin") or "").strip()
-            row["gtin_valid"] = "1" if gtin and valid_gtin(gtin) else "0"
+        for row in validate_rows(reader):
             writer.writerow(row)
             count += 1
     return count
@@ -38,12 +64,13 @@ def validate_file(input_path: Path, output_path: Path) -> int:
 def run_validate(
     input_path: Path = WORKING_DIR / "classified.csv",
     output_path: Path = WORKING_DIR / "validated.csv",
+    workers: int = 1,
 ) -> StepResult:
-    count = validate_file(input_path, output_path)
+    count = validate_file(input_path, output_path, workers=workers)
     result = StepResult(
         name="validate",
         status="ok" if count else "empty",
-        metrics={"validated": count},
+        metrics={"validated": count, "workers": workers},
         artifacts={"csv": str(output_path)},
     )
     log_event("validate", f"Validated {count} rows.", extra=result.metrics)
@@ -51,7 +78,7 @@ def run_validate(
 
 
 def main(argv: List[str] | None = None) -> int:
-    parser = argparse.ArgumentParser(description="Validate GTIN codes and add gtin_valid column.")
+    parser = argparse.ArgumentParser(description="Validate GTIN codes and add gtin_valid/gtin14 columns.")
     parser.add_argument(
         "--in",
         dest="input_path",
@@ -66,9 +93,10 @@ def main(argv: List[str] | None = None) -> int:
         default=WORKING_DIR / "validated.csv",
         help="Output CSV path (default: artifacts/working/validated.csv).",
     )
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for sharded execution (default: 1).")
     args = parser.parse_args(argv)
 
-    run_validate(args.input_path, args.output_path)
+    run_validate(args.input_path, args.output_path, workers=args.workers)
     return 0
 
 
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark the compiled keyword matcher against the linear rule scan."""
+import argparse, json, random, string, time
+
+from scripts.python import classify_products_v2 as cp
+
+
+def linear_classify(fam_rules, sub_rules, txt, country):
+    """Reference first-match-wins scan (the pre-compiled implementation)."""
+    fam = None
+    sub = None
+    for r in fam_rules:
+        if r.get("COUNTRY") in (country, "") and r.get("KEYWORD") and r["KEYWORD"] in txt:
+            fam = r["FAMILY"]
+            break
+    if fam:
+        for r in sub_rules:
+            if r.get("COUNTRY") in (country, "") and r.get("FAMILY") == fam and r.get("KEYWORD") and r["KEYWORD"] in txt:
+                sub = r["SUBFAMILY"]
+                break
+    if not fam:
+        if "ARROZ" in txt:
+            fam = "MERCEARIA"
+        elif "MASSA" in txt or "ESPAGUETE" in txt or "ESPAGUETI" in txt:
+            fam = "MERCEARIA"
+        elif "AGUA" in txt:
+            fam = "BEBIDAS"
+    if not sub and fam:
+        if fam == "MERCEARIA" and "ARROZ" in txt:
+            sub = "ARROZ"
+        elif fam == "MERCEARIA" and ("MASSA" in txt or "ESPAGUETE" in txt or "ESPAGUETI" in txt):
+            sub = "MASSAS"
+        elif fam == "BEBIDAS" and "AGUA" in txt:
+            sub = "AGUAS"
+    return (fam or "UNMAPPED", sub or "UNMAPPED")
+
+
+def synthetic_rules(count, seed=7):
+    rng = random.Random(seed)
+    fam_rules, sub_rules = [], []
+    for i in range(count):
+        keyword = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(4, 9)))
+        country = rng.choice(["PT", "ANG", "CV", ""])
+        family = f"FAM{i % 40}"
+        fam_rules.append({"COUNTRY": country, "KEYWORD": keyword, "FAMILY": family})
+        sub_rules.append({"COUNTRY": country, "FAMILY": family, "KEYWORD": keyword, "SUBFAMILY": f"SUB{i}"})
+    return fam_rules, sub_rules
+
+
+def synthetic_texts(fam_rules, count, seed=11):
+    rng = random.Random(seed)
+    words = [r["KEYWORD"] for r in fam_rules] or ["ARROZ"]
+    texts = []
+    for _ in range(count):
+        filler = " ".join("".join(rng.choice(string.ascii_uppercase) for _ in range(6)) for _ in range(5))
+        hit = rng.choice(words) if rng.random() < 0.7 else ""
+        texts.append(f"{filler} {hit} 1KG")
+    return texts
+
+
+def bench(rule_count, row_count):
+    fam_rules, sub_rules = synthetic_rules(rule_count)
+    texts = synthetic_texts(fam_rules, row_count)
+    saved = cp.dictionaries()
+    cp.set_dictionaries(saved.uom_syn, saved.brand_map, fam_rules, sub_rules)
+    try:
+        start = time.perf_counter()
+        linear = [linear_classify(fam_rules, sub_rules, t, "PT") for t in texts]
+        linear_s = time.perf_counter() - start
+        start = time.perf_counter()
+        compiled = [cp.classify(t, "", "PT") for t in texts]
+        compiled_s = time.perf_counter() - start
+    finally:
+        cp.set_dictionaries(*saved)
+    return {
+        "rules": rule_count,
+        "rows": row_count,
+        "linear_s": round(linear_s, 4),
+        "compiled_s": round(compiled_s, 4),
+        "speedup": round(linear_s / compiled_s, 2) if compiled_s else None,
+        "identical": linear == compiled,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rules", type=int, action="append", help="Rule counts to benchmark (default: 10, 1000, 10000).")
+    ap.add_argument("--rows", type=int, default=5000)
+    args = ap.parse_args(argv)
+
+    for count in args.rules or [10, 1000, 10000]:
+        print(json.dumps(bench(count, args.rows)))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
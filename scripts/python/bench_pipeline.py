@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Benchmark the pipeline steps on synthetic catalogs of increasing size.
+
+The generator writes an ``ingested.csv`` in the ingest step's schema, so the
+benchmark covers normalize → publish; ingest itself depends on the network
+or the fixtures and is not part of the timings.
+"""
+import argparse, csv, json, platform, random, shutil, subprocess, sys, time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pipeline import ARTIFACTS_ROOT
+from pipeline.ingest import _fieldnames
+from pipeline.normalize import CURRENCY_BY_COUNTRY
+from pipeline.orchestrator import DEFAULT_STEPS, SmartPipelineRunner
+from pipeline.sources.supermarkets import build_default_connectors
+
+SIZES = [10_000, 100_000]
+FULL_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+BENCH_STEPS = ("normalize", "classify", "validate", "dedupe", "publish")
+
+# Confidence the connectors give their offline records; it is not part of their settings.
+OFFLINE_CONFIDENCE = {"continente_pt": 0.85, "shoprite_ao": 0.82, "nossuper_cv": 0.80, "openfoodfacts": 0.50}
+
+
+def _sources():
+    """(source, country, currency, source_type, confidence, priority) of each default connector."""
+    sources = []
+    for connector in build_default_connectors(ARTIFACTS_ROOT):
+        settings = connector.settings
+        country = settings.countries[0]
+        # Open Food Facts lists no prices.
+        currency = CURRENCY_BY_COUNTRY.get(country, "") if settings.source_type == "supermarket" else ""
+        confidence = OFFLINE_CONFIDENCE[settings.slug]
+        sources.append((settings.source, country, currency, settings.source_type, confidence, settings.priority))
+    return sources
+
+
+SOURCES = _sources()
+PRODUCTS = [
+    ("Arroz Agulha", "Mercearia; Cereais; Arroz", ["1 kg", "500 g", "5 kg"]),
+    ("Feijão Preto", "Mercearia; Leguminosas", ["1 kg", "500 g"]),
+    ("Esparguete", "Mercearia; Massas", ["500 g", "1 kg"]),
+    ("Água Mineral Natural", "Bebidas; Águas", ["1,5 L", "0.5 L", "6 L"]),
+    ("Leite UHT Meio Gordo", "Bebidas; Laticínios; Leite", ["1 L", "200 ml"]),
+    ("Atum em Azeite", "Mercearia; Conservas", ["120 g", "3x80 g"]),
+    ("Açúcar Branco", "Mercearia; Açúcar", ["1 kg"]),
+    ("Café Torrado Moído", "Mercearia; Café", ["250 g", "500 g"]),
+    ("Óleo Alimentar", "Mercearia; Óleos", ["1 L", "5 L"]),
+    ("Pão de Forma Integral", "Padaria", ["600 g"]),
+    ("Detergente Máquina Loiça", "Limpeza", ["1,2 L", "40 un"]),
+    ("Iogurte Natural Açucarado", "Laticínios; Iogurtes", ["4x125 g"]),
+]
+BRANDS = ["Continente", "Gudi", "Nestlé", "Compal", "Luso", "Bom Sucesso", "Pingo Doce", "Delta", "Sical", "Mimosa", "Fula", "Sumol"]
+VARIANTS = ["", "Bio", "Selecionado", "Extra", "Família", "Light", "Sem Glúten", "Tradicional"]
+
+
+def gs1_check_digit(body):
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(body)))
+    return str((10 - total % 10) % 10)
+
+
+def synthetic_rows(count, *, dup_ratio=0.2, invalid_ratio=0.03, missing_ratio=0.02, seed=42):
+    """Yield ``count`` ingested rows; memory stays bounded at any size.
+
+    ``dup_ratio`` of the rows re-list a recent product from another source
+    (sometimes with a re-cased name), ``invalid_ratio`` carry a wrong check
+    digit and ``missing_ratio`` have no code at all. About a tenth of the
+    codes are UPCs, listed half the time without their leading zero.
+    """
+    rng = random.Random(seed)
+    recent = []
+    for i in range(count):
+        if recent and rng.random() < dup_ratio:
+            base = dict(rng.choice(recent))
+            source = rng.choice([s for s in SOURCES if s[0] != base["source"]])
+            if rng.random() < 0.3:
+                base["product_name"] = base["product_name"].upper()
+        else:
+            name, categories, quantities = rng.choice(PRODUCTS)
+            brand = rng.choice(BRANDS)
+            variant = rng.choice(VARIANTS)
+            quantity = rng.choice(quantities)
+            body = f"{'012' if rng.random() < 0.1 else '560'}{i:09d}"
+            code = body + gs1_check_digit(body)
+            if rng.random() < invalid_ratio:
+                code = code[:-1] + str((int(code[-1]) + 1) % 10)
+            elif rng.random() < missing_ratio:
+                code = ""
+            base = {
+                "code": code,
+                "product_name": " ".join(p for p in (name, variant, brand, quantity) if p),
+                "brands": brand,
+                "quantity": quantity,
+                "categories": categories,
+            }
+            source = rng.choice(SOURCES)
+            recent.append({**base, "source": source[0]})
+            if len(recent) > 5000:
+                recent.pop(rng.randrange(len(recent)))
+        slug, country, currency, source_type, confidence, priority = source
+        code = base["code"]
+        if code.startswith("0") and rng.random() < 0.5:
+            code = code[1:]
+        last_seen = f"2024-09-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z"
+        yield {
+            "code": code,
+            "product_name": base["product_name"],
+            "brands": base["brands"],
+            "quantity": base["quantity"],
+            "categories": base["categories"],
+            "country": country,
+            "url": f"https://example.invalid/{slug.lower()}/{code or i}",
+            "source": slug,
+            "source_type": source_type,
+            "confidence": f"{confidence:.2f}",
+            "priority": str(priority),
+            "price": f"{rng.uniform(0.2, 40):.2f}",
+            "currency": currency,
+            "availability": rng.choice(["in_stock", "in_stock", "out_of_stock"]),
+            "last_seen": last_seen,
+            "provenance": json.dumps(
+                [{"connector": slug.lower(), "source": slug, "country": country, "online": False, "last_seen": last_seen}]
+            ),
+            "extra": "",
+        }
+
+
+def write_catalog(path, count, **kwargs):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=_fieldnames())
+        writer.writeheader()
+        for row in synthetic_rows(count, **kwargs):
+            writer.writerow(row)
+    return path.stat().st_size
+
+
+def _overrides(root, workers, stream, fuzzy_threshold=None):
+    overrides = {
+        "normalize": {"input_path": root / "ingested.csv", "output_path": root / "normalized.csv"},
+        "classify": {"input_path": root / "normalized.csv", "output_path": root / "classified.csv"},
+        "validate": {"input_path": root / "classified.csv", "output_path": root / "validated.csv"},
+        "dedupe": {
+            "input_path": root / "validated.csv",
+            "output_path": root / "unified.csv",
+            "report_path": root / "duplicates.csv",
+            "fuzzy_threshold": fuzzy_threshold,
+        },
+        "publish": {"input_path": root / "unified.csv", "output_dir": root / "outputs"},
+    }
+    if workers > 1 and not stream:
+        for slug in ("normalize", "classify", "validate"):
+            overrides[slug]["workers"] = workers
+    return overrides
+
+
+def bench(rows, workdir, *, workers=1, stream=False, fuzzy_threshold=None, keep=False, seed=42):
+    root = workdir / f"{rows}"
+    shutil.rmtree(root, ignore_errors=True)
+    start = time.perf_counter()
+    catalog_bytes = write_catalog(root / "ingested.csv", rows, seed=seed)
+    generate_s = time.perf_counter() - start
+
+    steps = [step for step in DEFAULT_STEPS if step.slug in BENCH_STEPS]
+    runner = SmartPipelineRunner(steps)
+    start = time.perf_counter()
+    results = runner.run_all(_overrides(root, workers, stream, fuzzy_threshold), streaming=stream)
+    pipeline_s = time.perf_counter() - start
+    if not keep:
+        shutil.rmtree(root, ignore_errors=True)
+    return {
+        "rows": rows,
+        "mode": "stream" if stream else "files",
+        "workers": workers,
+        "fuzzy_threshold": fuzzy_threshold,
+        "catalog_bytes": catalog_bytes,
+        "generate_s": round(generate_s, 3),
+        "pipeline_s": round(pipeline_s, 3),
+        "unified": next((r.metrics.get("unified") for r in results if r.name == "dedupe"), None),
+        "steps": {r.name: r.metrics["profile"] for r in results if "profile" in r.metrics},
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(current, baseline, tolerance):
+    """Steps whose wall time grew by more than ``tolerance`` versus ``baseline``."""
+    previous = {(r["rows"], r["mode"], r["workers"], r.get("fuzzy_threshold")): r for r in baseline.get("results", [])}
+    found = []
+    for result in current["results"]:
+        before = previous.get((result["rows"], result["mode"], result["workers"], result.get("fuzzy_threshold")))
+        if not before:
+            continue
+        pairs = [("pipeline", before["pipeline_s"], result["pipeline_s"])]
+        pairs += [
+            (slug, before["steps"][slug]["wall_s"], profile["wall_s"])
+            for slug, profile in result["steps"].items()
+            if slug in before.get("steps", {})
+        ]
+        for name, old, new in pairs:
+            if old and new > old * (1 + tolerance):
+                found.append({"rows": result["rows"], "mode": result["mode"], "step": name, "before_s": old, "after_s": new})
+    return found
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, action="append", help="Catalog sizes (default: 10000, 100000).")
+    ap.add_argument("--full", action="store_true", help="Run 10k, 100k, 1M and 10M rows.")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--stream", action="store_true")
+    ap.add_argument("--fuzzy-threshold", type=float, default=None)
+    ap.add_argument("--workdir", type=Path, default=ARTIFACTS_ROOT / "bench" / "work")
+    ap.add_argument("--out", type=Path, default=ARTIFACTS_ROOT / "bench" / "bench_pipeline.json")
+    ap.add_argument("--baseline", type=Path, help="Previous results file to compare against.")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before a step counts as a regression.")
+    ap.add_argument("--keep", action="store_true", help="Keep the generated catalogs and outputs.")
+    args = ap.parse_args(argv)
+
+    sizes = args.rows or (FULL_SIZES if args.full else SIZES)
+    report = {
+        "commit": _commit(),
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [],
+    }
+    for rows in sizes:
+        result = bench(
+            rows, args.workdir, workers=args.workers, stream=args.stream, fuzzy_threshold=args.fuzzy_threshold, keep=args.keep
+        )
+        report["results"].append(result)
+        print(json.dumps({k: v for k, v in result.items() if k != "steps"}), file=sys.stderr)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(json.dumps(report))
+
+    if args.baseline:
+        found = regressions(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for item in found:
+            print(f"REGRESSION {json.dumps(item)}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Compare the memory held by dict rows and compact ``Row`` objects.
+
+A validated catalog is generated once (synthetic ingest rows through the
+normalize, classify and validate stages). Each representation then loads it
+in a fresh interpreter, so the numbers are the RSS growth of holding every
+row, the way the in-memory dedupe does.
+"""
+import argparse, csv, gc, json, shutil, subprocess, sys, time
+from pathlib import Path
+
+from pipeline import ARTIFACTS_ROOT, REPO_ROOT
+from pipeline.classify import classify_rows
+from pipeline.dedupe import ORDERED_FIELDS
+from pipeline.normalize import normalize_rows
+from pipeline.rows import RowSchema
+from pipeline.validate import validate_rows
+from scripts.python.bench_pipeline import synthetic_rows
+
+MODES = ("dict", "row")
+_PROC_STATUS = Path("/proc/self/status")
+
+
+def write_validated(path, count, seed=42):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = validate_rows(classify_rows(normalize_rows(synthetic_rows(count, seed=seed))))
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(fh, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+    return path.stat().st_size
+
+
+def _rss_bytes():
+    for line in _PROC_STATUS.read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    raise OSError("VmRSS not reported")
+
+
+def measure(path, mode):
+    """Load ``path`` as ``mode`` rows and report the memory they hold."""
+    gc.collect()
+    before = _rss_bytes()
+    start = time.perf_counter()
+    with path.open(newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        if mode == "row":
+            schema = RowSchema(ORDERED_FIELDS)
+            rows = [schema.row(row) for row in reader]
+        else:
+            rows = list(reader)
+    load_s = time.perf_counter() - start
+    gc.collect()
+    held = _rss_bytes() - before
+    return {
+        "mode": mode,
+        "rows": len(rows),
+        "held_mb": round(held / (1024 * 1024), 1),
+        "bytes_per_row": round(held / len(rows)) if rows else None,
+        "load_s": round(load_s, 3),
+    }
+
+
+def bench(rows, workdir, *, keep=False, seed=42):
+    root = workdir / f"{rows}"
+    shutil.rmtree(root, ignore_errors=True)
+    catalog = root / "validated.csv"
+    start = time.perf_counter()
+    catalog_bytes = write_validated(catalog, rows, seed=seed)
+    generate_s = time.perf_counter() - start
+    results = {}
+    try:
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, "-m", "scripts.python.bench_rows", "--measure", mode, "--catalog", str(catalog)],
+                cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+            )
+            results[mode] = json.loads(out.stdout)
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+    saved = results["dict"]["bytes_per_row"] - results["row"]["bytes_per_row"]
+    return {
+        "rows": rows,
+        "catalog_bytes": catalog_bytes,
+        "generate_s": round(generate_s, 3),
+        "dict": results["dict"],
+        "row": results["row"],
+        "saved_bytes_per_row": saved,
+        "saved_ratio": round(saved / results["dict"]["bytes_per_row"], 3) if results["dict"]["bytes_per_row"] else None,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--workdir", type=Path, default=ARTIFACTS_ROOT / "bench" / "rows")
+    ap.add_argument("--keep", action="store_true", help="Keep the generated catalog.")
+    ap.add_argument("--measure", choices=MODES, help=argparse.SUPPRESS)
+    ap.add_argument("--catalog", type=Path, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure(args.catalog, args.measure)))
+        return 0
+    print(json.dumps(bench(args.rows, args.workdir, keep=args.keep)))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
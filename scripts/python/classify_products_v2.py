@@ -1,16 +1,12 @@
 #!/usr/bin/env python3
-import argparse, csv, re, os
+import argparse, csv, hashlib, os, pickle
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
 try:
-    from unidecode import unidecode
-except ModuleNotFoundError:  # pragma: no cover - fallback path
-    import unicodedata
-
-    def unidecode(value: str) -> str:
-        normalized = unicodedata.normalize("NFKD", value or "")
-        return "".join(ch for ch in normalized if not unicodedata.combining(ch))
-
-def up(s:str)->str:
-    return re.sub(r"\s+"," ", unidecode((s or "").upper()).strip())
+    from scripts.python.textnorm import up
+except ModuleNotFoundError:  # pragma: no cover - executed as a standalone script
+    from textnorm import up
 
 def load_map(path, key_col, val_col, sep=';'):
     m = {}
@@ -41,24 +37,261 @@ def build_dictionaries(dict_root: str):
     return uom_syn, brand_map, fam_rules, sub_rules
 
 
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DICT_ROOT = REPO_ROOT / "data" / "seed" / "dictionaries"
+DICT_CACHE_DIR = REPO_ROOT / "artifacts" / "cache" / "dictionaries"
+DICT_SOURCES = ("synonyms_uom.csv", "brands_normalization.csv", "family_rules.csv", "subfamily_rules.csv")
+_CACHE_FORMAT = 1
+
+
+class Dictionaries(NamedTuple):
+    uom_syn: dict
+    brand_map: dict
+    fam_rules: list
+    sub_rules: list
+
+
+def _source_stats(dict_root):
+    stats = []
+    for name in DICT_SOURCES:
+        try:
+            st = os.stat(os.path.join(dict_root, name))
+            stats.append((name, st.st_size, st.st_mtime_ns))
+        except OSError:
+            stats.append((name, None, None))
+    return tuple(stats)
+
+
+def _source_digest(dict_root):
+    digest = hashlib.sha256()
+    for name in DICT_SOURCES:
+        digest.update(name.encode("utf-8") + b"\0")
+        try:
+            with open(os.path.join(dict_root, name), "rb") as fh:
+                digest.update(fh.read())
+        except OSError:
+            digest.update(b"<missing>")
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def dictionaries_digest(dict_root=DICT_ROOT):
+    """sha256 of the dictionary sources; changes whenever a rule or mapping does."""
+    return _source_digest(dict_root)
+
+
+def _cache_path(dict_root):
+    key = hashlib.sha1(str(Path(dict_root).resolve()).encode("utf-8")).hexdigest()[:16]
+    return DICT_CACHE_DIR / f"{key}.pickle"
+
+
+def _write_cache(path, payload):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:  # read-only checkout: run without the cache
+        pass
+
+
+def load_dictionaries(dict_root=DICT_ROOT, *, use_cache=True):
+    """Parsed dictionaries plus their compiled matchers for ``dict_root``.
+
+    The result is pickled under ``DICT_CACHE_DIR``. A cache whose source
+    sizes/mtimes match is loaded as is; otherwise the sources are hashed and
+    the CSVs are only re-parsed when their content actually changed.
+    """
+    stats = _source_stats(dict_root)
+    path = _cache_path(dict_root)
+    cached = None
+    if use_cache:
+        try:
+            with open(path, "rb") as fh:
+                cached = pickle.load(fh)
+            if cached.get("format") != _CACHE_FORMAT:
+                cached = None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError):
+            cached = None
+        if cached is not None and cached["stats"] == stats:
+            return cached["dictionaries"], cached["compiled"]
+    digest = _source_digest(dict_root)
+    if cached is not None and cached["digest"] == digest:
+        dicts, compiled = cached["dictionaries"], cached["compiled"]
+    else:
+        dicts = Dictionaries(*build_dictionaries(str(dict_root)))
+        compiled = compile_rules(dicts)
+    if use_cache:
+        _write_cache(path, {
+            "format": _CACHE_FORMAT,
+            "stats": stats,
+            "digest": digest,
+            "dictionaries": dicts,
+            "compiled": compiled,
+        })
+    return dicts, compiled
+
+
+_DICTS = None
+
+
+def dictionaries():
+    """The active dictionaries, loaded from ``DICT_ROOT`` on first use.
+
+    Pool workers forked after this ran share the parent's copy instead of
+    loading their own.
+    """
+    if _DICTS is None:
+        _activate(*load_dictionaries())
+    return _DICTS
+
+
+def _activate(dicts, compiled=None):
+    global _DICTS
+    _DICTS = dicts
+    _COMPILED.clear()
+    _COMPILED.update(compiled or {})
+    return dicts
+
+
+def set_dictionaries(uom_syn, brand_map, fam_rules, sub_rules):
+    """Replace the active dictionaries (tests, benchmarks)."""
+    return _activate(Dictionaries(uom_syn, brand_map, fam_rules, sub_rules))
+
+
+def __getattr__(name):
+    # Read-only compatibility for the former module-level globals.
+    fields = {"UOM_SYN": "uom_syn", "BRAND_MAP": "brand_map", "FAM_RULES": "fam_rules", "SUB_RULES": "sub_rules"}
+    if name in fields:
+        return getattr(dictionaries(), fields[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def norm_brand(b):
     b2 = up(b)
-    return BRAND_MAP.get(b2, b2)
+    return dictionaries().brand_map.get(b2, b2)
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over rule keywords.
+
+    ``first(text)`` returns the lowest keyword index occurring anywhere in the
+    text, i.e. the rule a first-match-wins linear scan would pick, in time
+    independent of the number of keywords. Small rule sets keep a plain
+    substring scan, which is faster below ``LINEAR_MAX`` keywords.
+    """
+
+    LINEAR_MAX = 48
+
+    def __init__(self, keywords):
+        keywords = list(keywords)
+        self._linear = keywords if len(keywords) <= self.LINEAR_MAX else None
+        if self._linear is not None:
+            return
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]
+        for index, keyword in enumerate(keywords):
+            if not keyword:
+                continue
+            node = 0
+            for ch in keyword:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(None)
+                    self._goto[node][ch] = nxt
+                node = nxt
+            if self._out[node] is None or index < self._out[node]:
+                self._out[node] = index
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                inherited = self._out[self._fail[child]]
+                if inherited is not None and (self._out[child] is None or inherited < self._out[child]):
+                    self._out[child] = inherited
+
+    def first(self, text):
+        if self._linear is not None:
+            for index, keyword in enumerate(self._linear):
+                if keyword and keyword in text:
+                    return index
+            return None
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        best = None
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            found = out[node]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+
+
+_COMPILED = {}
+
+
+def _compile(dicts, kind, country, family=None):
+    if kind == "FAMILY":
+        rules = [r for r in dicts.fam_rules if r.get("COUNTRY") in (country, "") and r.get("KEYWORD")]
+    else:
+        rules = [
+            r for r in dicts.sub_rules
+            if r.get("COUNTRY") in (country, "") and r.get("FAMILY") == family and r.get("KEYWORD")
+        ]
+    return (KeywordMatcher([r["KEYWORD"] for r in rules]), rules)
+
+
+def compile_rules(dicts):
+    """Matchers for every country and family the rules mention."""
+    countries = {r.get("COUNTRY") for r in dicts.fam_rules + dicts.sub_rules if r.get("COUNTRY")}
+    families = {r.get("FAMILY") for r in dicts.sub_rules if r.get("FAMILY")}
+    compiled = {}
+    for country in countries:
+        compiled[("FAMILY", country, None)] = _compile(dicts, "FAMILY", country)
+        for family in families:
+            compiled[("SUBFAMILY", country, family)] = _compile(dicts, "SUBFAMILY", country, family)
+    return compiled
+
+
+def _compiled_rules(kind, country, family=None):
+    """Matcher + rule list for a country (and family), compiled on first use."""
+    dicts = dictionaries()
+    key = (kind, country, family)
+    compiled = _COMPILED.get(key)
+    if compiled is None:
+        compiled = _compile(dicts, kind, country, family)
+        _COMPILED[key] = compiled
+    return compiled
 
 
 def classify(name, category_raw, country):
     txt = f"{name} {category_raw}"
     fam = None
     sub = None
-    for r in FAM_RULES:
-        if r.get("COUNTRY") in (country, "") and r.get("KEYWORD") and r["KEYWORD"] in txt:
-            fam = r["FAMILY"]
-            break
+    matcher, rules = _compiled_rules("FAMILY", country)
+    hit = matcher.first(txt)
+    if hit is not None:
+        fam = rules[hit]["FAMILY"]
     if fam:
-        for r in SUB_RULES:
-            if r.get("COUNTRY") in (country, "") and r.get("FAMILY") == fam and r.get("KEYWORD") and r["KEYWORD"] in txt:
-                sub = r["SUBFAMILY"]
-                break
+        matcher, rules = _compiled_rules("SUBFAMILY", country, fam)
+        hit = matcher.first(txt)
+        if hit is not None:
+            sub = rules[hit]["SUBFAMILY"]
     if not fam:
         if "ARROZ" in txt:
             fam = "MERCEARIA"
@@ -103,20 +336,15 @@ def main(argv=None) -> int:
     ap.add_argument("--in", dest="inp", required=True)
     ap.add_argument("--out", dest="out", required=True)
     ap.add_argument("--country", choices=["PT","ANG","CV"], required=True)
-    ap.add_argument("--dict-root", default="data/seed/dictionaries")
+    ap.add_argument("--dict-root", default=str(DICT_ROOT))
     args = ap.parse_args(argv)
 
-    global UOM_SYN, BRAND_MAP, FAM_RULES, SUB_RULES  # type: ignore[assignment]
-    UOM_SYN, BRAND_MAP, FAM_RULES, SUB_RULES = build_dictionaries(args.dict_root)
+    _activate(*load_dictionaries(args.dict_root))
 
     total = process_file(args.inp, args.out, args.country)
     print(f"Classified v2 -> {args.out} ({total} rows)")
     return 0
 
 
-# Dictionaries are loaded lazily via main() or tests can populate them explicitly
-UOM_SYN, BRAND_MAP, FAM_RULES, SUB_RULES = build_dictionaries("data/seed/dictionaries")
-
-
 if __name__ == "__main__":  # pragma: no cover
     raise SystemExit(main())
@@ -1,23 +1,18 @@
 #!/usr/bin/env python3
-import argparse, csv, json, re, os
+import argparse, csv, json, os
 try:
-    from unidecode import unidecode
-except ModuleNotFoundError:  # pragma: no cover - fallback path
-    import unicodedata
-
-    def unidecode(value: str) -> str:
-        normalized = unicodedata.normalize("NFKD", value or "")
-        return "".join(ch for ch in normalized if not unicodedata.combining(ch))
-
-def up(s:str)->str:
-    import re
-    return re.sub(r"\s+"," ", unidecode((s or "").upper()).strip())
+    from scripts.python.textnorm import up
+    from scripts.python.validate_gtin import gtin14
+except ModuleNotFoundError:  # pragma: no cover - executed as a standalone script
+    from textnorm import up
+    from validate_gtin import gtin14
 
 def make_key(row):
     gtin = (row.get("gtin") or "").strip()
     gtin_valid = (row.get("gtin_valid") or "0").strip()
     if gtin and gtin_valid in ("1","true","TRUE"):
-        return ("GTIN", gtin)
+        # Key on the GTIN-14 so UPC-12, EAN-13 and GTIN-14 spellings collide.
+        return ("GTIN", (row.get("gtin14") or "").strip() or gtin14(gtin))
     # fallback canonical key
     name = up(row.get("name",""))
     brand = up(row.get("brand",""))
@@ -69,7 +64,7 @@ def write_outputs(out_csv: str, dup_report: str, by_key: dict, dups: list) -> No
         fieldnames = set()
         for v in by_key.values():
             fieldnames.update(v.keys())
-        cols = ["gtin","gtin_valid","name","brand","qty","uom","country","source","url","price","currency","category_raw","family","subfamily","provenance"]
+        cols = ["gtin","gtin_valid","gtin14","name","brand","qty","uom","country","source","url","price","currency","category_raw","family","subfamily","provenance"]
         for c in sorted(fieldnames):
             if c not in cols:
                 cols.append(c)
@@ -11,17 +11,28 @@ import threading
 import time
 from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
 
-from pipeline import ARTIFACTS_ROOT, LOGS_DIR
+from pipeline import LOGS_DIR, flush_events
+from pipeline.artifacts import ArtifactIndex
+from pipeline.jobs import JobQueue
 from pipeline.orchestrator import SmartPipelineRunner
+from pipeline.products import PAGE_SIZE, ProductStore, ProductsUnavailable
 
 HOST, PORT = "127.0.0.1", 6754
 ROOT = Path(__file__).resolve().parents[2] / "gui"
 ROOT = ROOT.resolve()
 
 RUNNER = SmartPipelineRunner()
-RUN_LOCK = threading.Lock()
+ARTIFACTS = ArtifactIndex()
+JOBS = JobQueue(RUNNER, on_step=lambda result: ARTIFACTS.invalidate(result.artifacts.values()))
+PRODUCTS = ProductStore()
+
+LOG_TAIL_BYTES = 64 * 1024
+LOG_PAGE_BYTES = 256 * 1024
+LOG_STREAM_POLL = 0.5
+LOG_STREAM_HEARTBEAT = 15.0
 
 
 def _read_json_body(handler: SimpleHTTPRequestHandler) -> Dict[str, object]:
@@ -34,32 +45,64 @@ def _read_json_body(handler: SimpleHTTPRequestHandler) -> Dict[str, object]:
     return json.loads(data)
 
 
-def _artifact_listing() -> Dict[str, list]:
-    artifacts = {"working": [], "outputs": [], "logs": []}
-    for key in ("working", "outputs", "logs"):
-        directory = ARTIFACTS_ROOT / key
-        if not directory.exists():
-            continue
-        files = []
-        for path in sorted(directory.glob("**/*")):
-            if path.is_file():
-                files.append(str(path.relative_to(ARTIFACTS_ROOT)))
-        artifacts[key] = files
-    return artifacts
-
+def _log_path(name: str) -> Optional[Path]:
+    """Resolve a log file name from a request, refusing anything outside LOGS_DIR."""
+
+    if not name or name != Path(name).name or not name.endswith(".log"):
+        return None
+    path = LOGS_DIR / name
+    return path if path.is_file() else None
+
+
+def _read_log(path: Path, offset: int, limit: int) -> Tuple[int, int, int, str]:
+    """Whole lines of ``path`` from byte ``offset``: (start, end, file size, text).
+
+    A negative ``offset`` counts from the end of the file, starting at the
+    next full line. An offset past the end (the log was rotated or
+    truncated) restarts from the beginning. A line still being written is
+    left for the next read.
+    """
+
+    size = path.stat().st_size
+    tail = offset < 0
+    if tail:
+        offset = max(0, size + offset)
+    elif offset > size:
+        offset = 0
+    with path.open("rb") as fh:
+        if tail and offset:
+            fh.seek(offset - 1)
+            if fh.read(1) != b"\n":
+                offset += len(fh.readline())
+        fh.seek(offset)
+        data = fh.read(max(0, limit))
+    end = data.rfind(b"\n")
+    if end >= 0:
+        data = data[: end + 1]
+    elif len(data) < limit:
+        data = b""  # an unfinished line
+    return offset, offset + len(data), size, data.decode("utf-8", errors="replace")
+
+
+def _log_listing() -> Dict[str, object]:
+    """Every log's size plus its last LOG_TAIL_BYTES, and the offset to resume from."""
+
+    flush_events()
+    files, logs, offsets = {}, {}, {}
+    for path in sorted(LOGS_DIR.glob("*.log")):
+        stat = path.stat()
+        files[path.name] = {"size": stat.st_size, "mtime": stat.st_mtime}
+        _, offsets[path.name], _, logs[path.name] = _read_log(path, -LOG_TAIL_BYTES, LOG_TAIL_BYTES)
+    return {"files": files, "logs": logs, "offsets": offsets}
+
+
+def _submit_action(slug: str, payload: Optional[Dict[str, object]] = None) -> Tuple[Dict[str, object], bool]:
+    """Queue ``slug`` ("pipeline" or a step) and return the job plus whether it is new."""
 
-def _run_pipeline_action(slug: str, payload: Optional[Dict[str, object]] = None) -> Dict[str, object]:
     payload = payload or {}
     overrides = payload.get("overrides") if isinstance(payload.get("overrides"), dict) else {}
-    with RUN_LOCK:
-        if slug == "pipeline":
-            RUNNER.run_all(overrides=overrides if isinstance(overrides, dict) else None)
-            result = {"status": "ok", "steps": RUNNER.status()}
-        else:
-            step_overrides = overrides if isinstance(overrides, dict) else {}
-            step_result = RUNNER.run_step(slug, **step_overrides)
-            result = {"status": "ok", "step": step_result.to_dict()}
-    return result
+    job, created = JOBS.submit(slug, overrides)
+    return job.to_dict(), created
 
 
 class Handler(SimpleHTTPRequestHandler):
@@ -80,40 +123,166 @@ class Handler(SimpleHTTPRequestHandler):
         self.wfile.write(data)
 
     def do_GET(self):
+        route = urlsplit(self.path).path
         if self.path.startswith("/api/status"):
+            active = JOBS.active()
             payload = {
                 "ok": True,
                 "ts": time.time(),
                 "steps": RUNNER.status(),
+                "job": active.to_dict() if active else None,
             }
             return self._json_response(payload)
-        if self.path.startswith("/api/artifacts"):
-            return self._json_response({"artifacts": _artifact_listing()})
-        if self.path.startswith("/api/logs"):
-            logs = {}
-            for path in LOGS_DIR.glob("*.log"):
-                logs[path.name] = path.read_text(encoding="utf-8")
-            return self._json_response({"logs": logs})
+        if route == "/api/jobs":
+            return self._json_response({"jobs": [job.to_dict() for job in JOBS.jobs()]})
+        if route.startswith("/api/jobs/"):
+            job = JOBS.get(route.rsplit("/", 1)[-1])
+            if job is None:
+                return self._json_response({"error": "unknown job"}, status=404)
+            return self._json_response({"job": job.to_dict()})
+        if route == "/api/artifacts":
+            return self._artifacts_response()
+        if route == "/api/products" or route.startswith("/api/products/"):
+            return self._products_response(route, parse_qs(urlsplit(self.path).query))
+        if route == "/api/logs/stream":
+            return self._stream_log(parse_qs(urlsplit(self.path).query))
+        if route == "/api/logs":
+            query = parse_qs(urlsplit(self.path).query)
+            if "file" not in query:
+                return self._json_response(_log_listing())
+            return self._log_page(query)
         if self.path in ("/", ""):
             self.path = "/index.html"
         return super().do_GET()
 
+    def _artifacts_response(self) -> None:
+        etag, body = ARTIFACTS.snapshot()
+        if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _products_response(self, route: str, query: Dict[str, list]) -> None:
+        try:
+            if route == "/api/products":
+                filters = {name: query[name][0] for name in ("brand", "family", "subfamily") if name in query}
+                products, cursor = PRODUCTS.search(
+                    **filters,
+                    after=query.get("after", [None])[0],
+                    limit=int(query.get("limit", [str(PAGE_SIZE)])[0]),
+                )
+                return self._json_response({"products": products, "next": cursor})
+            product = PRODUCTS.get(route[len("/api/products/"):])
+        except ProductsUnavailable as exc:
+            return self._json_response({"error": str(exc)}, status=503)
+        except ValueError as exc:
+            return self._json_response({"error": str(exc)}, status=400)
+        if product is None:
+            return self._json_response({"error": "unknown gtin"}, status=404)
+        return self._json_response({"product": product})
+
+    def _log_page(self, query: Dict[str, list]) -> None:
+        path = _log_path(query["file"][0])
+        if path is None:
+            return self._json_response({"error": "unknown log"}, status=404)
+        try:
+            offset = int(query.get("offset", ["0"])[0])
+            limit = min(int(query.get("limit", [str(LOG_PAGE_BYTES)])[0]), LOG_PAGE_BYTES)
+        except ValueError:
+            return self._json_response({"error": "offset and limit must be integers"}, status=400)
+        flush_events()
+        start, end, size, text = _read_log(path, offset, limit)
+        return self._json_response(
+            {"file": path.name, "offset": start, "next_offset": end, "size": size, "eof": end >= size, "text": text}
+        )
+
+    def _stream_log(self, query: Dict[str, list]) -> None:
+        """Server-sent events with the lines appended to a log from ``offset`` on.
+
+        Each event's id is the offset after it, so a reconnecting
+        ``EventSource`` resumes through ``Last-Event-ID``.
+        """
+
+        path = _log_path(query.get("file", [""])[0])
+        if path is None:
+            return self._json_response({"error": "unknown log"}, status=404)
+        try:
+            offset = int(self.headers.get("Last-Event-ID") or query.get("offset", ["-" + str(LOG_TAIL_BYTES)])[0])
+        except ValueError:
+            return self._json_response({"error": "offset must be an integer"}, status=400)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        last_sent = time.monotonic()
+        try:
+            while True:
+                try:
+                    start, end, _, text = _read_log(path, offset, LOG_PAGE_BYTES)
+                except OSError:  # rotated away: wait for the writer to recreate it
+                    start = end = 0
+                    text = ""
+                if 0 <= start < offset:  # a negative offset is the initial tail, not a rewind
+                    self.wfile.write(f"id: {start}\nevent: reset\ndata: {path.name}\n\n".encode("utf-8"))
+                if text:
+                    data = "".join(f"data: {line}\n" for line in text.splitlines())
+                    self.wfile.write(f"id: {end}\nevent: log\n{data}\n".encode("utf-8"))
+                if end != offset:
+                    self.wfile.flush()
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= LOG_STREAM_HEARTBEAT:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    last_sent = time.monotonic()
+                if end - start < LOG_PAGE_BYTES // 2:
+                    time.sleep(LOG_STREAM_POLL)
+                offset = end
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
     def do_POST(self):
-        if self.path.startswith("/api/run/"):
-            slug = self.path.rsplit('/', 1)[-1]
+        route = urlsplit(self.path).path
+        if route.startswith("/api/run/"):
+            slug = route.rsplit('/', 1)[-1]
             try:
                 payload = _read_json_body(self)
-                result = _run_pipeline_action(slug, payload)
+                job, created = _submit_action(slug, payload)
             except KeyError:
                 return self._json_response({"error": f"unknown action: {slug}"}, status=404)
             except Exception as exc:  # pragma: no cover - runtime error path
                 return self._json_response({"error": str(exc)}, status=500)
-            return self._json_response(result)
+            return self._json_response({"job": job, "coalesced": not created}, status=202)
+        if route == "/api/products/lookup":
+            try:
+                payload = _read_json_body(self)
+                gtins = payload.get("gtins") if isinstance(payload, dict) else None
+                if not isinstance(gtins, list):
+                    raise ValueError("expected {\"gtins\": [...]}")
+                found = PRODUCTS.lookup(gtins)
+            except ProductsUnavailable as exc:
+                return self._json_response({"error": str(exc)}, status=503)
+            except ValueError as exc:
+                return self._json_response({"error": str(exc)}, status=400)
+            missing = [gtin for gtin in dict.fromkeys(str(gtin).strip() for gtin in gtins) if gtin not in found]
+            return self._json_response({"products": found, "missing": missing})
+        if route.startswith("/api/jobs/") and route.endswith("/cancel"):
+            job = JOBS.cancel(route.split("/")[-2])
+            if job is None:
+                return self._json_response({"error": "unknown job"}, status=404)
+            return self._json_response({"job": job.to_dict()})
         return self._json_response({"error": "unsupported endpoint"}, status=404)
 
 
-def start_server():
-    httpd = ThreadingHTTPServer((HOST, PORT), Handler)
+def start_server(host: str = HOST, port: int = PORT):
+    httpd = ThreadingHTTPServer((host, port), Handler)
     t = threading.Thread(target=httpd.serve_forever, daemon=True)
     t.start()
     return httpd
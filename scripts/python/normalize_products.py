@@ -1,29 +1,9 @@
 #!/usr/bin/env python3
-import argparse, json, csv, re
+import argparse, json, csv
 try:
-    from unidecode import unidecode
-except ModuleNotFoundError:  # pragma: no cover - fallback path
-    import unicodedata
-
-    def unidecode(value: str) -> str:
-        normalized = unicodedata.normalize("NFKD", value or "")
-        return "".join(ch for ch in normalized if not unicodedata.combining(ch))
-
-def norm(text: str) -> str:
-    t = unidecode(text or "").upper()
-    t = re.sub(r"[^A-Z0-9 ,.;:/()\-]", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
-
-def split_qty(quantity: str):
-    q = norm(quantity)
-    m = re.search(r"([0-9]+(?:\.[0-9]+)?)\s*(KG|G|L|ML|UN|UNI|UNID|LITRO|LITROS|GRAMAS|MILILITROS)?", q)
-    if not m:
-        return "", ""
-    qty = m.group(1)
-    uom = (m.group(2) or "").replace("GRAMAS","G").replace("MILILITROS","ML").replace("LITROS","L").replace("LITRO","L")
-    if uom in ("UNI","UNID"): uom = "UN"
-    return qty, uom
+    from scripts.python.textnorm import norm, split_qty
+except ModuleNotFoundError:  # pragma: no cover - executed as a standalone script
+    from textnorm import norm, split_qty
 
 def write_normalized(inp: str, out: str, country: str) -> int:
     count = 0
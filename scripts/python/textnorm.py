@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Shared, memoized text normalization used by normalize/classify/dedupe.
+
+Brands, categories and quantities repeat heavily across a catalog, so each
+function keeps a bounded LRU memo; ``cache_stats()`` reports hit rates.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Optional
+
+try:
+    from unidecode import unidecode
+except ModuleNotFoundError:  # pragma: no cover - fallback path
+    import unicodedata
+
+    def unidecode(value: str) -> str:
+        normalized = unicodedata.normalize("NFKD", value or "")
+        return "".join(ch for ch in normalized if not unicodedata.combining(ch))
+
+CACHE_SIZE = 65536
+
+_NON_TEXT = re.compile(r"[^A-Z0-9 ,.;:/()\-]")
+_SPACES = re.compile(r"\s+")
+_QTY = re.compile(r"([0-9]+(?:\.[0-9]+)?)\s*(KG|G|L|ML|UN|UNI|UNID|LITRO|LITROS|GRAMAS|MILILITROS)?")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def norm(text: str) -> str:
+    t = unidecode(text or "").upper()
+    t = _NON_TEXT.sub(" ", t)
+    t = _SPACES.sub(" ", t).strip()
+    return t
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def split_qty(quantity: str):
+    q = norm(quantity)
+    m = _QTY.search(q)
+    if not m:
+        return "", ""
+    qty = m.group(1)
+    uom = (m.group(2) or "").replace("GRAMAS","G").replace("MILILITROS","ML").replace("LITROS","L").replace("LITRO","L")
+    if uom in ("UNI","UNID"): uom = "UN"
+    return qty, uom
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def up(s: str) -> str:
+    return _SPACES.sub(" ", unidecode((s or "").upper()).strip())
+
+
+def cache_counters() -> Counter:
+    """Hit/miss counters of every memo, keyed ``(function, "hits"|"misses")``.
+
+    The counters cover the whole process: subtract a snapshot taken before a
+    step to get that step's lookups, and add the snapshots of worker processes.
+    """
+    counters = Counter()
+    for fn in (norm, split_qty, up):
+        info = fn.cache_info()
+        counters[(fn.__name__, "hits")] = info.hits
+        counters[(fn.__name__, "misses")] = info.misses
+    return counters
+
+
+def cache_stats(counters: Optional[Counter] = None) -> dict:
+    """Per-function memo statistics, suitable for StepResult metrics.
+
+    ``counters`` (e.g. the difference of two :func:`cache_counters`
+    snapshots) limits them to one step; by default they cover the process
+    and include the memo sizes.
+    """
+    scoped = counters is not None
+    if counters is None:
+        counters = cache_counters()
+    stats = {}
+    for fn in (norm, split_qty, up):
+        hits, misses = counters[(fn.__name__, "hits")], counters[(fn.__name__, "misses")]
+        lookups = hits + misses
+        stats[fn.__name__] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+        if not scoped:
+            stats[fn.__name__]["size"] = fn.cache_info().currsize
+    return stats
+
+
+def clear_caches() -> None:
+    for fn in (norm, split_qty, up):
+        fn.cache_clear()
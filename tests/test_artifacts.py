@@ -0,0 +1,74 @@
+import os
+import sqlite3
+
+from pipeline.artifacts import ArtifactIndex, row_count
+
+
+def _entries(index, bucket):
+    return {entry["path"]: entry for entry in index.listing()[bucket]}
+
+
+def test_row_counts_per_format(tmp_path):
+    (tmp_path / "a.csv").write_text("gtin,name\n1,a\n2,b\n", encoding="utf-8")
+    (tmp_path / "a.jsonl").write_text('{"n": 1}\n', encoding="utf-8")
+    (tmp_path / "a.txt").write_text("x\n", encoding="utf-8")
+    conn = sqlite3.connect(tmp_path / "a.sqlite")
+    conn.execute("CREATE TABLE products (gtin TEXT)")
+    conn.executemany("INSERT INTO products VALUES (?)", [("1",), ("2",), ("3",)])
+    conn.commit()
+    conn.close()
+
+    assert row_count(tmp_path / "a.csv") == 2
+    assert row_count(tmp_path / "a.jsonl") == 1
+    assert row_count(tmp_path / "a.sqlite") == 3
+    assert row_count(tmp_path / "a.txt") is None
+
+
+def test_index_follows_new_files_appends_and_invalidations(tmp_path):
+    for bucket in ("working", "outputs", "logs"):
+        (tmp_path / bucket).mkdir()
+    log = tmp_path / "logs" / "run.log"
+    log.write_text("one\n", encoding="utf-8")
+    index = ArtifactIndex(root=tmp_path)
+
+    etag, body = index.snapshot()
+    assert index.snapshot() == (etag, body)
+    assert _entries(index, "logs")["logs/run.log"]["rows"] == 1
+
+    with log.open("a", encoding="utf-8") as fh:
+        fh.write("two\nthree\n")
+    (tmp_path / "outputs" / "nested").mkdir()
+    (tmp_path / "outputs" / "nested" / "final.csv").write_text("gtin\n1\n", encoding="utf-8")
+    assert index.snapshot()[0] != etag
+    assert _entries(index, "logs")["logs/run.log"]["rows"] == 3
+    assert _entries(index, "outputs")[os.path.join("outputs", "nested", "final.csv")]["rows"] == 1
+
+    # Rewritten in place: the folder mtime stays put, so only an invalidation shows it.
+    working = tmp_path / "working" / "step.csv"
+    working.write_text("gtin\n1\n", encoding="utf-8")
+    index.snapshot()
+    mtime = os.stat(tmp_path / "working").st_mtime_ns
+    with working.open("a", encoding="utf-8") as fh:
+        fh.write("2\n3\n")
+    os.utime(tmp_path / "working", ns=(mtime, mtime))
+    assert _entries(index, "working")["working/step.csv"]["rows"] == 1
+    index.invalidate([working])
+    assert _entries(index, "working")["working/step.csv"]["rows"] == 3
+
+    working.unlink()
+    (tmp_path / "outputs" / "nested" / "final.csv").unlink()
+    (tmp_path / "outputs" / "nested").rmdir()
+    listing = index.listing()
+    assert listing["working"] == [] and listing["outputs"] == []
+
+
+def test_full_rescan_drops_folders_removed_behind_its_back(tmp_path):
+    nested = tmp_path / "outputs" / "nested"
+    nested.mkdir(parents=True)
+    (nested / "final.jsonl").write_text("{}\n", encoding="utf-8")
+    index = ArtifactIndex(root=tmp_path, full_rescan_s=0)
+    assert len(index.listing()["outputs"]) == 1
+
+    (nested / "final.jsonl").unlink()
+    nested.rmdir()
+    assert index.listing() == {"working": [], "outputs": [], "logs": []}
@@ -0,0 +1,33 @@
+import csv
+
+from scripts.python.bench_pipeline import bench, gs1_check_digit, regressions, write_catalog
+from scripts.python.validate_gtin import valid_gtin
+
+
+def test_synthetic_catalog_mixes_duplicates_and_invalid_codes(tmp_path):
+    path = tmp_path / "ingested.csv"
+    write_catalog(path, 2000, seed=3)
+    with path.open(newline="", encoding="utf-8") as fh:
+        rows = list(csv.DictReader(fh))
+
+    codes = [row["code"] for row in rows]
+    assert len(rows) == 2000
+    assert len(set(codes)) < len(codes)
+    assert any(code and not valid_gtin(code) for code in codes)
+    assert any(len(code) == 12 for code in codes)
+    assert len({row["source"] for row in rows}) == 4
+    assert any("ç" in row["product_name"] or "ã" in row["product_name"] for row in rows)
+    assert gs1_check_digit("560123456789") == "2"
+
+
+def test_bench_reports_every_step_and_flags_regressions(tmp_path):
+    result = bench(300, tmp_path)
+
+    assert set(result["steps"]) == {"normalize", "classify", "validate", "dedupe", "publish"}
+    assert 0 < result["unified"] < 300
+    assert not (tmp_path / "300").exists()
+
+    report = {"results": [result]}
+    slower = {"results": [dict(result, pipeline_s=result["pipeline_s"] * 3)]}
+    assert regressions(report, report, 0.2) == []
+    assert [item["step"] for item in regressions(slower, report, 0.2)] == ["pipeline"]
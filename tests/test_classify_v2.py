@@ -9,3 +9,63 @@ def test_brand_norm():
 def test_classify_arroz():
     fam, sub = classify("ARROZ AGULHA 1KG", "CEREAIS E DERIVADOS, ARROZ", "PT")
     assert fam == "MERCEARIA" and sub == "ARROZ"
+
+def test_keyword_matcher_prefers_rule_order():
+    from scripts.python.classify_products_v2 import KeywordMatcher
+
+    keywords = ["AGULHA", "ARROZ", "ROZ"] + [f"KW{i}" for i in range(100)]
+    matcher = KeywordMatcher(keywords)
+    assert matcher.first("ARROZ AGULHA 1KG") == 0
+    assert matcher.first("ARROZ CAROLINO") == 1
+    assert matcher.first("XKW42Y") == 7  # "KW4" is listed before "KW42"
+    assert matcher.first("FEIJAO") is None
+
+def test_compiled_classify_matches_linear_scan():
+    from scripts.python.bench_classify import bench
+
+    for count in (10, 500):
+        assert bench(count, 300)["identical"]
+
+def test_dictionaries_are_repo_anchored_and_lazy(tmp_path):
+    import subprocess, sys
+    from pathlib import Path
+
+    repo = Path(__file__).resolve().parents[1]
+    code = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "from scripts.python import classify_products_v2 as cp\n"
+        "assert cp._DICTS is None\n"
+        "print(cp.norm_brand('coca cola'), cp._DICTS is not None)\n" % str(repo)
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["COCA-COLA", "True"]
+
+def test_dictionary_cache_invalidation(tmp_path, monkeypatch):
+    import os
+    from scripts.python import classify_products_v2 as cp
+
+    monkeypatch.setattr(cp, "DICT_CACHE_DIR", tmp_path / "cache")
+    root = tmp_path / "dicts"
+    root.mkdir()
+    (root / "brands_normalization.csv").write_text("ALIAS;CANONICAL\nfoo;Bar\n", encoding="utf-8")
+    (root / "family_rules.csv").write_text("COUNTRY;KEYWORD;FAMILY\nPT;ARROZ;MERCEARIA\n", encoding="utf-8")
+
+    parsed = []
+    real_build = cp.build_dictionaries
+    monkeypatch.setattr(cp, "build_dictionaries", lambda r: parsed.append(r) or real_build(r))
+
+    dicts, compiled = cp.load_dictionaries(root)
+    assert dicts.brand_map == {"FOO": "BAR"}
+    assert ("FAMILY", "PT", None) in compiled
+    cp.load_dictionaries(root)
+    assert len(parsed) == 1
+
+    # A touch without a content change keeps the compiled form.
+    path = root / "brands_normalization.csv"
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+    cp.load_dictionaries(root)
+    assert len(parsed) == 1
+
+    path.write_text("ALIAS;CANONICAL\nfoo;Bazooka\n", encoding="utf-8")
+    dicts, _ = cp.load_dictionaries(root)
+    assert dicts.brand_map == {"FOO": "BAZOOKA"} and len(parsed) == 2
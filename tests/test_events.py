@@ -0,0 +1,45 @@
+import json
+import logging
+import threading
+
+from pipeline.events import EventLogger
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_events_are_batched_in_order_and_drained_on_close(tmp_path):
+    log = tmp_path / "logs" / "events.log"
+    events = EventLogger(log, echo=False)
+
+    def produce(worker):
+        for i in range(200):
+            events.emit(logging.INFO, "", json.dumps({"worker": worker, "i": i}))
+
+    threads = [threading.Thread(target=produce, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    events.close()
+
+    entries = _lines(log)
+    assert len(entries) == 800
+    for worker in range(4):
+        assert [e["i"] for e in entries if e["worker"] == worker] == list(range(200))
+
+
+def test_flush_reopens_a_removed_log(tmp_path):
+    log = tmp_path / "events.log"
+    events = EventLogger(log, echo=False)
+    events.emit(logging.INFO, "", '{"n": 1}')
+    events.flush()
+    log.unlink()
+
+    events.emit(logging.INFO, "", '{"n": 2}')
+    events.flush()
+    try:
+        assert _lines(log) == [{"n": 2}]
+    finally:
+        events.close()
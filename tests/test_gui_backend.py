@@ -0,0 +1,171 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from pipeline.models import StepResult
+from scripts.python import gui_backend
+
+
+class BlockingRunner:
+    order = ["ingest", "publish"]
+    steps = {"ingest": None, "publish": None}
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def run_step(self, slug, **kwargs):
+        self.started.set()
+        assert self.release.wait(5)
+        return StepResult(name=slug, status="ok")
+
+
+@pytest.fixture
+def server():
+    httpd = gui_backend.start_server(port=0)
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def _request(url, *, method="GET", body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_run_returns_a_job_immediately(server, monkeypatch):
+    from pipeline.jobs import JobQueue
+
+    runner = BlockingRunner()
+    monkeypatch.setattr(gui_backend, "JOBS", JobQueue(runner))
+
+    status, payload = _request(f"{server}/api/run/pipeline", method="POST", body={})
+    assert status == 202 and not payload["coalesced"]
+    job_id = payload["job"]["id"]
+    assert runner.started.wait(5)
+
+    status, payload = _request(f"{server}/api/run/pipeline", method="POST", body={})
+    assert payload["coalesced"] and payload["job"]["id"] == job_id
+    assert _request(f"{server}/api/status")[1]["job"]["current"] == "ingest"
+
+    runner.release.set()
+    assert gui_backend.JOBS.wait(job_id, 5)
+    status, payload = _request(f"{server}/api/jobs/{job_id}")
+    assert status == 200 and payload["job"]["status"] == "ok"
+    assert [job["id"] for job in _request(f"{server}/api/jobs")[1]["jobs"]] == [job_id]
+
+    assert _request(f"{server}/api/run/nope", method="POST", body={})[0] == 404
+    assert _request(f"{server}/api/jobs/missing")[0] == 404
+    assert _request(f"{server}/api/jobs/missing/cancel", method="POST")[0] == 404
+
+
+def test_read_log_returns_whole_lines_from_an_offset(tmp_path):
+    path = tmp_path / "a.log"
+    path.write_bytes(b"one\ntwo\nthr")
+
+    assert gui_backend._read_log(path, 0, 100) == (0, 8, 11, "one\ntwo\n")
+    assert gui_backend._read_log(path, 4, 100) == (4, 8, 11, "two\n")
+    assert gui_backend._read_log(path, -6, 100) == (8, 8, 11, "")  # tail starts at the next full line
+    assert gui_backend._read_log(path, 0, 5) == (0, 4, 11, "one\n")
+    assert gui_backend._read_log(path, 50, 100)[:2] == (0, 8)  # truncated or rotated log
+
+
+def test_log_pages_and_stream(server, tmp_path, monkeypatch):
+    import http.client
+    from urllib.parse import urlsplit
+
+    monkeypatch.setattr(gui_backend, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(gui_backend, "LOG_STREAM_POLL", 0.05)
+    log = tmp_path / "phase9_pipeline.log"
+    log.write_text('{"n": 1}\n{"n": 2}\n', encoding="utf-8")
+
+    listing = _request(f"{server}/api/logs")[1]
+    assert listing["offsets"] == {"phase9_pipeline.log": 18}
+    assert listing["logs"]["phase9_pipeline.log"].splitlines() == ['{"n": 1}', '{"n": 2}']
+
+    page = _request(f"{server}/api/logs?file=phase9_pipeline.log&offset=9&limit=100")[1]
+    assert (page["offset"], page["next_offset"], page["eof"], page["text"]) == (9, 18, True, '{"n": 2}\n')
+    assert _request(f"{server}/api/logs?file=../secrets.log")[0] == 404
+
+    netloc = urlsplit(server).netloc
+    conn = http.client.HTTPConnection(netloc, timeout=10)
+    conn.request("GET", "/api/logs/stream?file=phase9_pipeline.log&offset=9")
+    response = conn.getresponse()
+    assert response.getheader("Content-Type").startswith("text/event-stream")
+
+    def next_event(response=response):
+        lines = []
+        while True:
+            line = response.fp.readline().decode("utf-8").rstrip("\n")
+            if not line:
+                return lines
+            lines.append(line)
+
+    assert next_event() == ["id: 18", "event: log", 'data: {"n": 2}']
+    with log.open("a", encoding="utf-8") as fh:
+        fh.write('{"n": 3}\n')
+    assert next_event() == ["id: 27", "event: log", 'data: {"n": 3}']
+    conn.close()
+
+    # Without an offset the stream starts at the tail, with no reset first.
+    conn = http.client.HTTPConnection(netloc, timeout=10)
+    conn.request("GET", "/api/logs/stream?file=phase9_pipeline.log")
+    tail = conn.getresponse()
+    assert next_event(tail) == ["id: 27", "event: log", 'data: {"n": 1}', 'data: {"n": 2}', 'data: {"n": 3}']
+    conn.close()
+
+
+def test_artifacts_are_served_with_an_etag(server, tmp_path, monkeypatch):
+    from pipeline.artifacts import ArtifactIndex
+
+    (tmp_path / "outputs").mkdir()
+    (tmp_path / "outputs" / "final.csv").write_text("gtin\n1\n2\n", encoding="utf-8")
+    monkeypatch.setattr(gui_backend, "ARTIFACTS", ArtifactIndex(root=tmp_path))
+
+    with urllib.request.urlopen(f"{server}/api/artifacts", timeout=10) as response:
+        etag = response.headers["ETag"]
+        payload = json.loads(response.read())
+    assert payload["artifacts"]["outputs"][0]["rows"] == 2
+
+    request = urllib.request.Request(f"{server}/api/artifacts", headers={"If-None-Match": etag})
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(request, timeout=10)
+    assert excinfo.value.code == 304
+
+
+def test_product_endpoints(server, tmp_path, monkeypatch):
+    from pipeline.products import ProductStore
+    from pipeline.publish import export_sqlite
+
+    rows = [{"gtin": f"56000000000{n:02d}", "brand": "B", "family": "F", "subfamily": "S"} for n in range(5)]
+    export_sqlite(rows, ["gtin", "brand", "family", "subfamily"], tmp_path / "final.sqlite")
+    monkeypatch.setattr(gui_backend, "PRODUCTS", ProductStore(tmp_path / "final.sqlite"))
+
+    status, payload = _request(f"{server}/api/products/5600000000003")
+    assert status == 200 and payload["product"]["brand"] == "B"
+    assert _request(f"{server}/api/products/5600000000099")[0] == 404
+
+    page = _request(f"{server}/api/products?brand=B&limit=3")[1]
+    assert len(page["products"]) == 3 and page["next"]
+    rest = _request(f"{server}/api/products?brand=B&limit=3&after={page['next']}")[1]
+    assert len(rest["products"]) == 2 and rest["next"] is None
+    assert _request(f"{server}/api/products?limit=abc")[0] == 400
+
+    status, payload = _request(
+        f"{server}/api/products/lookup", method="POST", body={"gtins": ["5600000000001", "nope"]}
+    )
+    assert status == 200 and list(payload["products"]) == ["5600000000001"] and payload["missing"] == ["nope"]
+    assert _request(f"{server}/api/products/lookup", method="POST", body=["x"])[0] == 400
+
+    monkeypatch.setattr(gui_backend, "PRODUCTS", ProductStore(tmp_path / "missing.sqlite"))
+    assert _request(f"{server}/api/products/5600000000003")[0] == 503
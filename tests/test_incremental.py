@@ -0,0 +1,233 @@
+import csv
+import io
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from pipeline.incremental import ChangeTracker, fingerprint_row
+from pipeline.models import StepResult
+from pipeline.orchestrator import DEFAULT_STEPS, SmartPipelineRunner, StepDefinition
+from pipeline.publish import export_csv, export_jsonl, export_sqlite, upsert_csv, upsert_jsonl, upsert_sqlite
+
+
+def test_fingerprint_ignores_last_seen():
+    row = {"code": "1", "product_name": "ARROZ", "last_seen": "2025-01-01T00:00:00Z"}
+    assert fingerprint_row(row) == fingerprint_row({**row, "last_seen": "2025-02-01T00:00:00Z"})
+    assert fingerprint_row(row) != fingerprint_row({**row, "product_name": "ARROZ AGULHA"})
+
+
+INGEST_FIELDS = [
+    "code", "product_name", "brands", "quantity", "categories", "country", "url", "source", "source_type",
+    "confidence", "priority", "price", "currency", "availability", "last_seen", "provenance", "extra",
+]
+
+
+def _product(code, name, source, *, price="1.00", url="", priority="80"):
+    return {
+        "code": code, "product_name": name, "brands": "Marca", "quantity": "1 kg", "categories": "Mercearia",
+        "country": "PT", "url": url, "source": source, "source_type": "supermarket", "confidence": "0.80",
+        "priority": priority, "price": price, "currency": "EUR", "availability": "in_stock",
+        "last_seen": "2025-01-01T00:00:00Z",
+        "provenance": json.dumps([{"source": source}]), "extra": "{}",
+    }
+
+
+def _write_ingested(path, rows):
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=INGEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _describe(rows):
+    return [(("CANON", row["product_name"]), ("",)) for row in rows]
+
+
+def test_change_tracker_pulls_in_rows_sharing_a_key(tmp_path):
+    ingested, state, delta_path = tmp_path / "ingested.csv", tmp_path / "state.json", tmp_path / "delta.csv"
+    rows = [
+        _product("1", "ARROZ", "A"),
+        _product("2", "ARROZ", "B"),
+        _product("3", "FEIJAO", "A"),
+        _product("", "MASSA", "A", url="https://a/massa"),
+        _product("", "MASSA", "B", url="https://b/massa"),
+    ]
+    _write_ingested(ingested, rows)
+    first = ChangeTracker(state)
+    assert first.write_delta(ingested, delta_path, _describe).metrics() == {
+        "changed": 5, "unchanged": 0, "removed": 0, "related": 0,
+    }
+    first.commit()
+
+    second = ChangeTracker(state)
+    delta = second.write_delta(ingested, delta_path, _describe)
+    assert (delta.changed, delta.unchanged, delta.keys) == (0, 5, set())
+
+    rows[0]["price"] = "2.00"
+    _write_ingested(ingested, rows[:4])
+    third = ChangeTracker(state)
+    delta = third.write_delta(ingested, delta_path, _describe)
+    assert delta.metrics() == {"changed": 1, "unchanged": 3, "removed": 1, "related": 2}
+    assert delta.keys == {("CANON", "ARROZ"), ("CANON", "MASSA")}
+    with delta_path.open(newline="", encoding="utf-8") as fh:
+        assert [(row["code"], row["source"]) for row in csv.DictReader(fh)] == [("1", "A"), ("2", "B"), ("", "A")]
+
+
+def test_upsert_replaces_every_row_of_a_dedupe_key(tmp_path):
+    columns = ["gtin", "gtin_valid", "gtin14", "name", "brand", "qty", "uom", "family", "subfamily", "price_amount"]
+    rows = [
+        {"gtin": "036000291452", "gtin_valid": "1", "gtin14": "00036000291452", "name": "A", "price_amount": "1.00"},
+        {"gtin": "", "gtin_valid": "0", "name": "B", "price_amount": "2.00"},
+        {"gtin": "", "gtin_valid": "0", "name": "C", "price_amount": "3.00"},
+    ]
+    for name, export, upsert in (
+        ("final.csv", lambda p: export_csv(rows, columns, p), lambda d, p: upsert_csv(d, columns, p)),
+        ("final.jsonl", lambda p: export_jsonl(rows, p), lambda d, p: upsert_jsonl(d, p)),
+        ("final.sqlite", lambda p: export_sqlite(rows, columns, p), lambda d, p: upsert_sqlite(d, columns, p)),
+    ):
+        path = tmp_path / name
+        export(path)
+        # The EAN-13 spelling of the UPC replaces it; two GTIN-less rows stay apart.
+        delta = [
+            {"gtin": "0036000291452", "gtin_valid": "1", "gtin14": "00036000291452", "name": "A", "price_amount": "1.50"},
+            {"gtin": "", "gtin_valid": "0", "name": "B", "price_amount": "2.50"},
+            {"gtin": "", "gtin_valid": "0", "name": "D", "price_amount": ""},
+        ]
+        assert upsert(delta, path) == 2
+        if name == "final.sqlite":
+            conn = sqlite3.connect(path)
+            try:
+                published = [dict(zip(("name", "price_amount"), row)) for row in conn.execute(
+                    "SELECT name, price_amount FROM products ORDER BY name"
+                )]
+            finally:
+                conn.close()
+            published = {row["name"]: str(row["price_amount"]) for row in published}
+            assert published == {"A": "1.5", "B": "2.5", "C": "3.0", "D": ""}
+            continue
+        if name == "final.csv":
+            with path.open(newline="", encoding="utf-8") as fh:
+                published = list(csv.DictReader(fh))
+        else:
+            published = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [(row["name"], row["price_amount"]) for row in published] == [
+            ("C", "3.00"), ("A", "1.50"), ("B", "2.50"), ("D", ""),
+        ]
+
+
+def _runner_overrides(root, ingested):
+    working, outputs = root / "working", root / "outputs"
+    working.mkdir(parents=True, exist_ok=True)
+    return {
+        "ingest": ingested,
+        "normalize": {"input_path": working / "ingested.csv", "output_path": working / "normalized.csv"},
+        "classify": {"input_path": working / "normalized.csv", "output_path": working / "classified.csv"},
+        "validate": {"input_path": working / "classified.csv", "output_path": working / "validated.csv"},
+        "dedupe": {
+            "input_path": working / "validated.csv",
+            "output_path": working / "unified.csv",
+            "report_path": working / "duplicates.csv",
+        },
+        "publish": {"input_path": working / "unified.csv", "output_dir": outputs},
+    }
+
+
+def _fixed_ingest_runner(rows_by_run):
+    def ingest(output, **kwargs):
+        _write_ingested(Path(output), rows_by_run[0])
+        return StepResult(name="ingest", status="ok", metrics={"total_records": len(rows_by_run[0])},
+                          artifacts={"csv": str(output)})
+
+    steps = [
+        StepDefinition(slug="ingest", description="fixed rows", runner=ingest)
+        if step.slug == "ingest" else step
+        for step in DEFAULT_STEPS
+    ]
+    return SmartPipelineRunner(steps)
+
+
+def _final_csv(root):
+    return (root / "outputs" / "final.csv").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("fuzzy", [None, 0.5])
+def test_incremental_run_publishes_what_a_full_run_does(tmp_path, fuzzy):
+    before = [
+        _product("036000291452", "Arroz Agulha", "SHOP_A", priority="70"),
+        _product("4006381333931", "Feijao Preto", "SHOP_A"),
+        _product("", "Massa Espiral", "SHOP_A", url="https://a/massa"),
+        _product("", "Massa Espiral", "SHOP_B", url="https://b/massa", price="0.90"),
+        _product("", "Grao de Bico", "SHOP_B", url="https://b/grao"),
+        _product("5901234123457", "Azeite Virgem", "SHOP_C"),
+    ]
+    after = [dict(row) for row in before]
+    # A new EAN-13 listing of the UPC product from a better source, a price
+    # change on one side of a name-keyed pair, a dropped listing and a new
+    # near-duplicate name.
+    after.insert(0, _product("0036000291452", "Arroz Agulha Longo", "SHOP_B", priority="95"))
+    after[3]["price"] = "1.10"
+    del after[2]
+    after.append(_product("", "Grao Bico", "SHOP_C", url="https://c/grao"))
+
+    incremental_root, full_root = tmp_path / "incremental", tmp_path / "full"
+    runs = [before]
+    runner = _fixed_ingest_runner(runs)
+    overrides = _runner_overrides(incremental_root, {"output": incremental_root / "working" / "ingested.csv"})
+    overrides["dedupe"]["fuzzy_threshold"] = fuzzy
+    first = runner.run_all(overrides, incremental=True)
+    assert first[-1].metrics["mode"] == "full"
+
+    runs[0] = after
+    second = runner.run_all(_runner_overrides(incremental_root, overrides["ingest"]) | {"dedupe": overrides["dedupe"]},
+                            incremental=True)
+    assert second[-1].metrics["mode"] == "upsert"
+    incremental = second[0].metrics["incremental"]
+    assert incremental["changed"] == 3 and incremental["removed"] == 1 and incremental["unchanged"] < len(after)
+
+    full_overrides = _runner_overrides(full_root, {"output": full_root / "working" / "ingested.csv"})
+    full_overrides["dedupe"]["fuzzy_threshold"] = fuzzy
+    _fixed_ingest_runner(runs).run_all(full_overrides)
+    assert _final_csv(incremental_root) == _final_csv(full_root)
+    published = list(csv.DictReader(io.StringIO(_final_csv(full_root))))
+    assert len(published) == (4 if fuzzy else 5)
+    assert {entry["source"] for entry in json.loads(published[0]["provenance"])} == {"SHOP_A", "SHOP_B"}
+
+
+def test_incremental_rerun_skips_unchanged_rows(tmp_path):
+    overrides = _runner_overrides(
+        tmp_path, {"limit": 9, "countries": ("PT",), "prefer_online": False, "output": tmp_path / "working" / "ingested.csv"}
+    )
+
+    first = SmartPipelineRunner().run_all(overrides, incremental=True)
+    second = SmartPipelineRunner().run_all(overrides, incremental=True)
+
+    assert (tmp_path / "working" / "incremental_state.json").exists()
+    assert first[0].metrics["incremental"]["unchanged"] == 0
+    assert first[-1].metrics["mode"] == "full"
+    assert second[0].metrics["incremental"] == {
+        "changed": 0, "unchanged": first[0].metrics["total_records"], "removed": 0, "related": 0,
+    }
+    assert {k: v for k, v in second[-1].metrics.items() if k != "profile"} == {"rows": 0, "mode": "upsert", "replaced": 0}
+    with (tmp_path / "outputs" / "final.csv").open(newline="", encoding="utf-8") as fh:
+        assert len(list(csv.DictReader(fh))) == first[-1].metrics["rows"]
+    # The upsert run writes its (empty) delta beside the full-run working files.
+    with (tmp_path / "working" / "unified.csv").open(newline="", encoding="utf-8") as fh:
+        assert len(list(csv.DictReader(fh))) == first[-1].metrics["rows"]
+    assert second[-2].artifacts["unified_csv"] == str(tmp_path / "working" / "unified_delta.csv")
+
+
+def test_incremental_rebuilds_when_the_dictionaries_change(tmp_path, monkeypatch):
+    from pipeline import orchestrator
+
+    overrides = _runner_overrides(
+        tmp_path, {"limit": 9, "countries": ("PT",), "prefer_online": False, "output": tmp_path / "working" / "ingested.csv"}
+    )
+    SmartPipelineRunner().run_all(overrides, incremental=True)
+    monkeypatch.setattr(orchestrator, "dictionaries_digest", lambda: "edited")
+    rerun = SmartPipelineRunner().run_all(overrides, incremental=True)
+
+    assert rerun[0].metrics["incremental"]["unchanged"] == 0
+    assert rerun[-1].metrics["mode"] == "full"
+    assert SmartPipelineRunner().run_all(overrides, incremental=True)[-1].metrics["mode"] == "upsert"
@@ -1,6 +1,10 @@
-from pipeline.ingest import IngestionConfig, run_ingest
+import threading
+import time
+
+from pipeline.ingest import DATA_ROOT, IngestionConfig, IngestionManager, run_ingest
 from pipeline.models import StepResult
 from pipeline import WORKING_DIR
+from pipeline.sources.base import BaseConnector, ConnectorSettings
 
 
 def test_ingest_offline_sample(tmp_path, monkeypatch):
@@ -14,3 +18,125 @@ def test_ingest_offline_sample(tmp_path, monkeypatch):
     header = data[0].split(',')
     assert 'provenance' in header
     assert 'source_type' in header
+
+
+class _SlowConnector(BaseConnector):
+    active = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def __init__(self, slug, host, codes, priority):
+        super().__init__(DATA_ROOT, session=object())
+        self.API_URL = f"https://{host}/search"
+        self.codes = codes
+        self.settings = ConnectorSettings(
+            slug=slug,
+            label=slug,
+            countries=("PT",),
+            source=slug.upper(),
+            source_type="supermarket",
+            priority=priority,
+            default_queries=("a", "b", "c"),
+        )
+
+    def _fetch_online(self, query, limit, budget=None):
+        host = self.API_URL
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        time.sleep(0.05)
+        with self.lock:
+            self.active[host] -= 1
+        # Every query repeats the first record of query "a", as search APIs do.
+        codes = [f"{self.codes[0]}a"] + [f"{code}{query}" for code in self.codes]
+        return [
+            self._make_product(
+                code=code,
+                name=f"{self.settings.slug} {code}",
+                brand="",
+                quantity="",
+                categories=[],
+                country="PT",
+                url="",
+                confidence=0.5,
+                priority=self.settings.priority,
+                extra={"query": query, "online": True},
+            )
+            for code in codes[:limit]
+        ]
+
+
+def _fake_manager(concurrency, limit=50):
+    manager = IngestionManager(IngestionConfig(limit=limit, countries=("PT",), concurrency=concurrency, per_host=2))
+    manager.connectors = [
+        _SlowConnector("shop_a", "a.example", ["1", "2", "3"], 90),
+        _SlowConnector("shop_b", "b.example", ["2", "3", "4"], 95),
+        _SlowConnector("shop_c", "a.example", ["5"], 80),
+    ]
+    return manager
+
+
+def test_concurrent_collect_matches_sequential():
+    sequential = _fake_manager(1).collect()
+    _SlowConnector.peak.clear()
+    concurrent = _fake_manager(8).collect()
+
+    assert [(r.code, r.source) for r in concurrent[0]] == [(r.code, r.source) for r in sequential[0]]
+    assert dict(concurrent[1]) == dict(sequential[1])
+    assert concurrent[2] == sequential[2]
+    assert max(_SlowConnector.peak.values()) == 2
+
+
+def test_concurrent_collect_respects_the_sequential_budget():
+    sequential = _fake_manager(1, limit=4).collect()[0]
+    concurrent = _fake_manager(8, limit=4).collect()[0]
+
+    assert [(r.code, r.source) for r in concurrent] == [(r.code, r.source) for r in sequential]
+
+
+class _PagedConnector(BaseConnector):
+    API_URL = "https://paged.example/search"
+
+    def __init__(self):
+        super().__init__(DATA_ROOT, session=object())
+        self.settings = ConnectorSettings(
+            slug="paged",
+            label="paged",
+            countries=("PT",),
+            source="PAGED",
+            source_type="supermarket",
+            priority=80,
+            default_queries=("a", "b", "c"),
+            per_query_limit=5,
+        )
+        self.pages = []
+        self.lock = threading.Lock()
+
+    def _fetch_page(self, query, page, page_size):
+        with self.lock:
+            self.pages.append((query, page))
+        if query != "a":
+            time.sleep(0.05)
+        start = (page - 1) * page_size
+        return [{"code": f"{query}{n}"} for n in range(start, start + page_size)]
+
+    def _convert_item(self, item, query):
+        return self._make_product(
+            code=item["code"], name=item["code"], brand="", quantity="", categories=[], country="PT", url="",
+            confidence=0.5, priority=self.settings.priority,
+        )
+
+
+def test_concurrent_collect_stops_paging_once_the_budget_is_spent():
+    from concurrent.futures import ThreadPoolExecutor
+
+    sequential = _PagedConnector()
+    expected = [r.code for r in sequential.collect(limit=12)]
+    concurrent = _PagedConnector()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        collected = [r.code for r in concurrent.collect(limit=12, executor=executor)]
+
+    assert collected == expected
+    assert sorted(sequential.pages) == [("a", 1), ("a", 2), ("a", 3)]
+    # Query "a" fills the budget while the others wait on their first page.
+    assert sorted(concurrent.pages) == [("a", 1), ("a", 2), ("a", 3), ("b", 1), ("c", 1)]
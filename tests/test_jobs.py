@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from pipeline.jobs import JobQueue
+from pipeline.models import StepResult
+
+
+class FakeRunner:
+    order = ["ingest", "normalize", "publish"]
+
+    def __init__(self, fail=None):
+        self.steps = {slug: object() for slug in self.order}
+        self.calls = []
+        self.fail = fail
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def run_step(self, slug, **kwargs):
+        self.calls.append((slug, kwargs))
+        if slug == "ingest":
+            self.started.set()
+            assert self.release.wait(5)
+        if slug == self.fail:
+            raise RuntimeError("boom")
+        return StepResult(name=slug, status="ok", metrics={"profile": {"wall_s": 0.01}})
+
+
+def test_pipeline_job_runs_every_step_in_the_background():
+    runner = FakeRunner()
+    finished = []
+    queue = JobQueue(runner, on_step=lambda result: finished.append(result.name))
+    job, created = queue.submit("pipeline", {"ingest": {"prefer_online": False}})
+
+    assert created and job.status in ("queued", "running")
+    assert runner.started.wait(5)
+    assert queue.get(job.id).to_dict()["current"] == "ingest"
+    runner.release.set()
+    assert queue.wait(job.id, 5)
+
+    info = job.to_dict()
+    assert info["status"] == "ok" and info["completed"] == info["total"] == 3
+    assert [step["status"] for step in info["steps"]] == ["ok", "ok", "ok"]
+    assert runner.calls[0] == ("ingest", {"prefer_online": False})
+    assert finished == runner.order
+
+
+def test_duplicate_requests_coalesce_and_cancel_stops_between_steps():
+    runner = FakeRunner()
+    queue = JobQueue(runner)
+    job, _ = queue.submit("pipeline")
+    assert runner.started.wait(5)
+
+    same, created = queue.submit("pipeline")
+    assert same is job and not created and job.requests == 2
+    queued, created = queue.submit("normalize", {"fallback_country": "CV"})
+    assert created
+
+    queue.cancel(queued.id)
+    assert queued.status == "cancelled"
+    queue.cancel(job.id)
+    runner.release.set()
+    assert queue.wait(job.id, 5)
+
+    assert job.status == "cancelled"
+    assert [step["status"] for step in job.to_dict()["steps"]] == ["ok", "cancelled", "cancelled"]
+    assert [slug for slug, _ in runner.calls] == ["ingest"]
+
+
+def test_failed_step_ends_the_job_and_the_queue_keeps_going():
+    runner = FakeRunner(fail="normalize")
+    runner.release.set()
+    queue = JobQueue(runner)
+    job, _ = queue.submit("pipeline")
+    assert queue.wait(job.id, 5)
+    assert job.status == "error" and job.error == "normalize: boom"
+    assert [step["status"] for step in job.to_dict()["steps"]] == ["ok", "error", "skipped"]
+
+    follow_up, _ = queue.submit("publish")
+    assert queue.wait(follow_up.id, 5) and follow_up.status == "ok"
+
+    with pytest.raises(KeyError):
+        queue.submit("nope")
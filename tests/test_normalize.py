@@ -6,3 +6,12 @@ def test_norm_basic():
 def test_split_qty():
     assert split_qty("1 kg") == ("1", "KG")
     assert split_qty("1.5 l") == ("1.5", "L")
+
+def test_text_cache_reports_hits():
+    from scripts.python.textnorm import cache_stats, clear_caches
+
+    clear_caches()
+    for _ in range(3):
+        norm("Bom Sucesso")
+    stats = cache_stats()["norm"]
+    assert stats["misses"] == 1 and stats["hits"] == 2
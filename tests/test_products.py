@@ -0,0 +1,74 @@
+import pytest
+
+from pipeline.products import ProductStore, ProductsUnavailable
+from pipeline.publish import export_sqlite
+
+COLUMNS = ["gtin", "name", "brand", "family", "subfamily"]
+
+
+def _product(n, brand, family, subfamily):
+    return {"gtin": f"560{n:010d}", "name": f"P{n}", "brand": brand, "family": family, "subfamily": subfamily}
+
+
+@pytest.fixture
+def store(tmp_path):
+    rows = [
+        _product(n, "BRAND_A" if n % 2 else "BRAND_B", "MERCEARIA" if n % 3 else "BEBIDAS", f"SUB{n % 4}")
+        for n in range(60)
+    ]
+    export_sqlite(rows, COLUMNS, tmp_path / "final.sqlite")
+    store = ProductStore(tmp_path / "final.sqlite", pool_size=2)
+    yield store
+    store.close()
+
+
+def _pages(store, **filters):
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.search(after=cursor, limit=7, **filters)
+        seen.extend(page)
+        if cursor is None:
+            return seen
+
+
+def test_get_and_batch_lookup(store):
+    assert store.get(" 5600000000005 ")["name"] == "P5"
+    assert store.get("0000000000000") is None
+
+    found = store.lookup(["5600000000001", "5600000000001", "missing", "5600000000042"])
+    assert sorted(found) == ["5600000000001", "5600000000042"]
+    assert found["5600000000042"]["family"] == "BEBIDAS"
+    with pytest.raises(ValueError):
+        store.lookup(str(n) for n in range(1001))
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [{}, {"brand": "BRAND_A"}, {"family": "MERCEARIA"}, {"family": "BEBIDAS", "subfamily": "SUB2"}],
+)
+def test_keyset_pages_cover_every_match_once(store, filters):
+    seen = _pages(store, **filters)
+    gtins = [row["gtin"] for row in seen]
+    assert len(gtins) == len(set(gtins)) > 0
+    assert all(row[name] == value for row in seen for name, value in filters.items())
+    with store._connection() as conn:
+        where = " AND ".join(f"{name} = ?" for name in filters) or "1"
+        total = conn.execute(f"SELECT COUNT(*) FROM products WHERE {where}", list(filters.values())).fetchone()[0]
+    assert len(gtins) == total
+    assert "rowid" not in seen[0]
+
+
+def test_bad_requests_and_republished_database(store, tmp_path):
+    with pytest.raises(ValueError):
+        store.search(limit=0)
+    with pytest.raises(ValueError):
+        store.search(brand="BRAND_A", after="not-a-cursor")
+
+    assert store.get("5600000000003") is not None
+    export_sqlite([_product(3, "NEW", "X", "Y")], COLUMNS, tmp_path / "final.sqlite")
+    assert store.get("5600000000003")["brand"] == "NEW"
+    assert store.get("5600000000005") is None
+
+    (tmp_path / "final.sqlite").unlink()
+    with pytest.raises(ProductsUnavailable):
+        store.get("5600000000003")
@@ -0,0 +1,38 @@
+from pipeline.ingest import IngestionConfig, run_ingest
+from pipeline.orchestrator import DEFAULT_STEPS, SmartPipelineRunner
+
+ROW_STEPS = ("normalize", "classify", "validate", "dedupe")
+
+
+def test_every_step_reports_a_profile(tmp_path):
+    ingested = tmp_path / "ingested.csv"
+    run_ingest(IngestionConfig(limit=9, prefer_online=False), output=ingested)
+    runner = SmartPipelineRunner([step for step in DEFAULT_STEPS if step.slug == "normalize"], trace_memory=True)
+
+    result = runner.run_step("normalize", input_path=ingested, output_path=tmp_path / "normalized.csv")
+
+    profile = result.metrics["profile"]
+    assert profile["rows"] == result.metrics["normalized"] > 0
+    assert profile["input_bytes"] == ingested.stat().st_size
+    assert profile["output_bytes"] == (tmp_path / "normalized.csv").stat().st_size
+    assert profile["wall_s"] > 0 and profile["rows_per_s"] > 0
+    assert profile["tracemalloc_peak_mb"] >= 0
+    assert runner.status()["normalize"]["metrics"]["profile"] == profile
+
+
+def test_streamed_chain_is_profiled_on_its_consumer(tmp_path):
+    ingested = tmp_path / "ingested.csv"
+    run_ingest(IngestionConfig(limit=9, prefer_online=False), output=ingested)
+    steps = [step for step in DEFAULT_STEPS if step.slug in ROW_STEPS]
+    overrides = {
+        "normalize": {"input_path": ingested},
+        "dedupe": {"output_path": tmp_path / "unified.csv", "report_path": tmp_path / "duplicates.csv"},
+    }
+
+    results = SmartPipelineRunner(steps).run_all(overrides, streaming=True)
+
+    profile = results[-1].metrics["profile"]
+    assert profile["includes"] == ["normalize", "classify", "validate"]
+    assert profile["input_bytes"] == ingested.stat().st_size
+    assert profile["rows"] == results[-1].metrics["unified"]
+    assert "profile" not in results[0].metrics
@@ -0,0 +1,107 @@
+import csv
+import sqlite3
+
+import pytest
+
+from pipeline import publish
+from pipeline.publish import ParquetSink, Sink, SqliteSink, export_sqlite, run_publish
+
+
+def test_export_sqlite_swaps_complete_database(tmp_path):
+    columns = ["gtin", "brand", "family", "subfamily", "priority"]
+    target = tmp_path / "final.sqlite"
+    export_sqlite([{"gtin": "1", "priority": "9"}], columns, target)
+    rows = [{"gtin": str(i), "brand": "B", "priority": str(i)} for i in range(12)]
+    assert export_sqlite(iter(rows), columns, target, batch_size=5) == 12
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["final.sqlite"]
+    conn = sqlite3.connect(target)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert conn.execute("SELECT COUNT(*), SUM(priority) FROM products").fetchone() == (12, 66)
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_products_gtin", "idx_products_brand", "idx_products_family"} <= indexes
+    finally:
+        conn.close()
+
+
+def _write_unified(path, count):
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=["gtin", "name", "brand", "family", "subfamily", "priority"])
+        writer.writeheader()
+        for i in range(count):
+            writer.writerow({"gtin": f"{i:013d}", "name": f"Produto {i}", "brand": "B", "priority": str(i % 3)})
+
+
+def test_threaded_publish_matches_serial(tmp_path):
+    unified = tmp_path / "unified.csv"
+    _write_unified(unified, 700)
+    serial = run_publish(unified, tmp_path / "serial")
+    threaded = run_publish(unified, tmp_path / "threaded", threaded=True)
+
+    assert serial.metrics["rows"] == threaded.metrics["rows"] == 700
+    assert set(serial.artifacts) == set(threaded.artifacts) == {"csv", "jsonl", "sqlite"}
+    for name in ("final.csv", "final.jsonl"):
+        assert (tmp_path / "serial" / name).read_bytes() == (tmp_path / "threaded" / name).read_bytes()
+    conn = sqlite3.connect(tmp_path / "threaded" / "final.sqlite")
+    try:
+        assert conn.execute("SELECT COUNT(*), SUM(priority) FROM products").fetchone() == (700, 699)
+    finally:
+        conn.close()
+
+
+class _FailingSink(Sink):
+    name = "failing"
+
+    def open(self, columns):
+        self.seen = 0
+
+    def write(self, row):
+        self.seen += 1
+        if self.seen == 300:
+            raise RuntimeError("disk full")
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_failed_publish_keeps_previous_sqlite(tmp_path, threaded):
+    target = tmp_path / "final.sqlite"
+    export_sqlite([{"gtin": "1"}], ["gtin", "brand", "family", "subfamily"], target)
+    unified = tmp_path / "unified.csv"
+    _write_unified(unified, 1000)
+
+    sinks = [SqliteSink(target, batch_size=50), _FailingSink(tmp_path / "unused")]
+    with pytest.raises(RuntimeError, match="disk full"):
+        run_publish(unified, tmp_path, threaded=threaded, sinks=sinks)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["final.sqlite", "unified.csv"]
+    conn = sqlite3.connect(target)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM products").fetchone() == (1,)
+    finally:
+        conn.close()
+
+
+def test_parquet_sink_requires_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(publish, "pq", None)
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        ParquetSink(tmp_path / "final.parquet")
+
+
+def test_parquet_output_is_typed(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    unified = tmp_path / "unified.csv"
+    _write_unified(unified, 250)
+    sink = ParquetSink(tmp_path / "final.parquet", row_group_size=100)
+    result = run_publish(unified, tmp_path, sinks=[sink])
+
+    assert result.artifacts == {"parquet": str(tmp_path / "final.parquet")}
+    parquet_file = pq.ParquetFile(tmp_path / "final.parquet")
+    assert parquet_file.metadata.num_rows == 250
+    assert parquet_file.metadata.num_row_groups == 3
+    table = pq.read_table(tmp_path / "final.parquet", columns=["gtin", "priority"])
+    assert str(table.schema.field("priority").type) == "int64"
+    assert sum(table.column("priority").to_pylist()) == 249
+    assert table.column("gtin")[5].as_py() == "0000000000005"
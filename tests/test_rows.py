@@ -0,0 +1,57 @@
+import csv
+
+
+def test_row_behaves_like_a_dict_row():
+    from pipeline.dedupe import ORDERED_FIELDS
+    from pipeline.rows import Row, RowSchema
+
+    schema = RowSchema(ORDERED_FIELDS)
+    source = {"gtin": "5601234567890", "name": "ARROZ", "country": "PT", "note": "extra column"}
+    row = schema.row(source)
+
+    assert isinstance(row, Row)
+    assert row == source and dict(row) == source
+    assert row["name"] == "ARROZ" and row.get("brand") is None and row.get("brand", "") == ""
+    assert "gtin" in row and "brand" not in row and len(row) == 4
+    assert "note" in schema.index
+
+    copy = row.copy()
+    copy["brand"] = "BOM SUCESSO"
+    del copy["note"]
+    assert "brand" not in row and row["note"] == "extra column"
+    assert copy.pick(("gtin", "brand", "note")) == ["5601234567890", "BOM SUCESSO", ""]
+    assert schema.row(copy) == copy
+
+
+def test_low_cardinality_values_are_shared():
+    from pipeline.rows import RowSchema
+
+    schema = RowSchema(["country", "source", "name"])
+    first = schema.row({"country": "".join(["P", "T"]), "source": "X", "name": "".join(["A", "B"])})
+    second = schema.row({"country": "".join(["P", "T"]), "source": "X", "name": "".join(["A", "B"])})
+    assert first["country"] is second["country"]
+    assert first["name"] == second["name"] and first["name"] is not second["name"]
+
+
+def test_unify_rows_writes_the_same_csv_as_dict_rows(tmp_path):
+    from pipeline.dedupe import unify_rows, write_outputs
+    from scripts.python.bench_rows import write_validated
+
+    catalog = tmp_path / "validated.csv"
+    write_validated(catalog, 500, seed=5)
+    unified, duplicates = unify_rows(catalog)
+    write_outputs(unified, duplicates, tmp_path / "unified.csv", tmp_path / "dups.csv")
+
+    with (tmp_path / "unified.csv").open(newline="", encoding="utf-8") as fh:
+        written = list(csv.DictReader(fh))
+    assert len(written) == len(unified) < 500
+    assert written == [{name: row.get(name, "") for name in written[0]} for row in unified]
+
+
+def test_bench_rows_measures_both_representations(tmp_path):
+    from scripts.python.bench_rows import bench
+
+    result = bench(2000, tmp_path)
+    assert result["dict"]["rows"] == result["row"]["rows"] == 2000
+    assert {"bytes_per_row", "load_s"} <= set(result["row"])
+    assert not (tmp_path / "2000").exists()
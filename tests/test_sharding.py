@@ -0,0 +1,71 @@
+import csv
+
+from pipeline import sharding
+from pipeline.classify import classify_file
+from pipeline.normalize import normalize_file
+from pipeline.validate import validate_file
+
+
+def _write_ingested(path, count):
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=["code", "product_name", "brands", "quantity", "categories", "country"])
+        writer.writeheader()
+        for i in range(count):
+            writer.writerow(
+                {
+                    "code": f"560{i:010d}",
+                    "product_name": f"Arroz Agulha {i}\n(linha dupla)" if i % 7 == 0 else f"Água \"Luso\" {i}",
+                    "brands": "Luso",
+                    "quantity": f"{i % 5 + 1} kg",
+                    "categories": "Bebidas, Águas",
+                    "country": "PT",
+                }
+            )
+
+
+def test_plan_chunks_respects_quoted_newlines(tmp_path):
+    path = tmp_path / "in.csv"
+    _write_ingested(path, 200)
+    ranges = sharding.plan_chunks(path, 9)
+    assert len(ranges) > 1
+    total = 0
+    for start, end in ranges:
+        with path.open("rb") as fh:
+            fh.seek(start)
+            assert fh.read(end - start).count(b'"') % 2 == 0
+        total += end - start
+    assert ranges[0][0] + total == path.stat().st_size
+
+
+def test_sharded_steps_match_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, "MIN_CHUNK_BYTES", 512)
+    ingested = tmp_path / "ingested.csv"
+    _write_ingested(ingested, 300)
+
+    outputs = {}
+    for workers in (1, 3):
+        root = tmp_path / f"w{workers}"
+        normalize_file(ingested, root / "normalized.csv", "PT", workers=workers)
+        classify_file(root / "normalized.csv", root / "classified.csv", workers=workers)
+        assert validate_file(root / "classified.csv", root / "validated.csv", workers=workers) == 300
+        outputs[workers] = (root / "validated.csv").read_bytes()
+    assert outputs[1] == outputs[3]
+
+
+def test_text_cache_metrics_belong_to_the_step(tmp_path, monkeypatch):
+    from pipeline.normalize import run_normalize
+
+    monkeypatch.setattr(sharding, "MIN_CHUNK_BYTES", 512)
+    ingested = tmp_path / "ingested.csv"
+    _write_ingested(ingested, 300)
+
+    def lookups(workers):
+        stats = run_normalize(ingested, tmp_path / f"n{workers}.csv", workers=workers).metrics["text_cache"]
+        return {name: entry["hits"] + entry["misses"] for name, entry in stats.items()}
+
+    serial = lookups(1)
+    assert serial["norm"] > 0
+    # A rerun reports its own lookups rather than the process totals, and a
+    # sharded run counts the lookups made in its worker processes.
+    assert lookups(1) == serial
+    assert lookups(3) == serial
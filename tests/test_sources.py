@@ -0,0 +1,138 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pipeline.ingest import DATA_ROOT
+from pipeline.sources.cache import ResponseCache
+from pipeline.sources.supermarkets import ContinentePTConnector
+
+
+class _Response:
+    def __init__(self, payload, status_code=200, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return self._payload
+
+
+class _PagedSession:
+    def __init__(self, total):
+        self.total = total
+        self.pages = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        page, size = params["page"], params["pageSize"]
+        self.pages.append(page)
+        start = (page - 1) * size
+        codes = range(start, min(start + size, self.total))
+        return _Response({"products": [{"ean": f"560{code:010d}", "name": f"P{code}"} for code in codes]})
+
+
+def test_online_fetch_pages_until_limit():
+    session = _PagedSession(total=1000)
+    connector = ContinentePTConnector(DATA_ROOT, session=session)
+    records = connector._fetch_online("arroz", 75)
+    assert len(records) == 75
+    assert len({r.code for r in records}) == 75
+    assert sorted(session.pages) == [1, 2, 3]
+
+
+def test_online_fetch_stops_when_results_run_out():
+    session = _PagedSession(total=40)
+    connector = ContinentePTConnector(DATA_ROOT, session=session)
+    records = connector._fetch_online("arroz", 500)
+    assert len(records) == 40
+    assert sorted(session.pages) == [1, 2]
+
+
+class _ETagSession:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return _Response(None, status_code=304)
+        return _Response({"products": [{"ean": "5601234567890", "name": "Arroz"}]}, headers={"ETag": '"v1"'})
+
+
+def test_response_cache_hits_within_ttl(tmp_path):
+    session = _ETagSession()
+    connector = ContinentePTConnector(DATA_ROOT, session=session)
+    connector.response_cache = ResponseCache(tmp_path, ttl=3600)
+    first = connector._fetch_online("arroz", 5)
+    second = connector._fetch_online("arroz", 5)
+    assert [r.code for r in first] == [r.code for r in second]
+    assert len(session.calls) == 1
+    assert connector.response_cache.stats["hits"] == 1
+
+
+def test_response_cache_revalidates_with_etag(tmp_path):
+    session = _ETagSession()
+    connector = ContinentePTConnector(DATA_ROOT, session=session)
+    connector.response_cache = ResponseCache(tmp_path, ttl=0)
+    connector._fetch_online("arroz", 5)
+    records = connector._fetch_online("arroz", 5)
+    assert records[0].code == "5601234567890"
+    assert session.calls[-1]["If-None-Match"] == '"v1"'
+    assert connector.response_cache.stats["revalidated"] == 1
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=400)
+    for index in range(5):
+        cache.put(f"key-{index}", {"blob": "x" * 100})
+    assert cache.get("key-0") is None
+    assert cache.get("key-4") is not None
+    assert cache.stats["evictions"] >= 1
+
+
+def test_response_cache_is_shared_safely_between_threads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = ResponseCache(tmp_path)
+
+    def store(index):
+        cache.put("same-key", {"writer": index, "blob": "x" * 10_000})
+        cache.count("misses")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(store, range(200)))
+
+    assert cache.get("same-key").payload["blob"] == "x" * 10_000
+    assert cache.stats["misses"] == cache.stats["stores"] == 200
+    assert [path.suffix for path in tmp_path.iterdir()] == [".json"]
+
+
+def test_response_cache_against_stub_server(tmp_path):
+    requests = pytest.importorskip("requests")
+    hits = []
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            body = json.dumps({"products": [{"ean": "5601234567890", "name": "Arroz"}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        connector = ContinentePTConnector(DATA_ROOT, session=requests.Session())
+        connector.API_URL = f"http://127.0.0.1:{server.server_address[1]}/search"
+        connector.response_cache = ResponseCache(tmp_path, ttl=3600)
+        connector._fetch_online("arroz", 5)
+        connector._fetch_online("arroz", 5)
+    finally:
+        server.shutdown()
+    assert len(hits) == 1
@@ -0,0 +1,48 @@
+from pipeline.ingest import IngestionConfig, run_ingest
+from pipeline.orchestrator import DEFAULT_STEPS, SmartPipelineRunner
+
+ROW_STEPS = ("normalize", "classify", "validate", "dedupe")
+
+
+def _overrides(root, ingested):
+    return {
+        "normalize": {"input_path": ingested, "output_path": root / "normalized.csv"},
+        "classify": {"input_path": root / "normalized.csv", "output_path": root / "classified.csv"},
+        "validate": {"input_path": root / "classified.csv", "output_path": root / "validated.csv"},
+        "dedupe": {
+            "input_path": root / "validated.csv",
+            "output_path": root / "unified.csv",
+            "report_path": root / "duplicates.csv",
+        },
+    }
+
+
+def test_streaming_matches_file_handoff(tmp_path):
+    ingested = tmp_path / "ingested.csv"
+    run_ingest(IngestionConfig(limit=9, prefer_online=False), output=ingested)
+    steps = [step for step in DEFAULT_STEPS if step.slug in ROW_STEPS]
+
+    files_root = tmp_path / "files"
+    SmartPipelineRunner(steps).run_all(_overrides(files_root, ingested))
+
+    stream_root = tmp_path / "stream"
+    results = SmartPipelineRunner(steps).run_all(_overrides(stream_root, ingested), streaming=True)
+
+    assert [r.name for r in results] == list(ROW_STEPS)
+    assert results[0].metrics["normalized"] == results[2].metrics["validated"] > 0
+    assert results[0].metrics["stats_includes"] == list(ROW_STEPS)
+    assert results[0].metrics["text_cache"]["up"]["hits"] > 0 and "text_cache" not in results[1].metrics
+    assert not (stream_root / "normalized.csv").exists()
+    assert (stream_root / "unified.csv").read_text() == (files_root / "unified.csv").read_text()
+    assert (stream_root / "duplicates.csv").read_text() == (files_root / "duplicates.csv").read_text()
+
+
+def test_streaming_checkpoint_writes_working_csvs(tmp_path):
+    ingested = tmp_path / "ingested.csv"
+    run_ingest(IngestionConfig(limit=9, prefer_online=False), output=ingested)
+    steps = [step for step in DEFAULT_STEPS if step.slug in ROW_STEPS]
+
+    results = SmartPipelineRunner(steps).run_all(_overrides(tmp_path, ingested), streaming=True, checkpoint=True)
+
+    assert (tmp_path / "validated.csv").exists()
+    assert results[2].artifacts["csv"] == str(tmp_path / "validated.csv")
@@ -9,3 +9,187 @@ def test_make_key_canonical():
     row = {"gtin":"", "gtin_valid":"0","name":"Água Mineral","brand":"Luso","qty":"1.5","uom":"l"}
     k = make_key(row)
     assert k[0] == "CANON"
+
+def test_upc_ean_and_gtin14_spellings_share_a_key():
+    from pipeline.dedupe import unify_records
+    from pipeline.validate import validate_rows
+
+    rows = [
+        {"gtin": code, "name": name, "brand": "COCA", "qty": "33", "uom": "CL", "source": source}
+        for code, name, source in (
+            ("049000028904", "COCA COLA LATA", "SHOPRITE_ANG"),
+            ("0049000028904", "COCA-COLA 33CL", "CONTINENTE_PT"),
+            ("00049000028904", "Coca Cola", "OPEN_FOOD_FACTS"),
+        )
+    ]
+    validated = list(validate_rows(rows))
+    assert {row["gtin14"] for row in validated} == {"00049000028904"}
+
+    unified, duplicates = unify_records(validated)
+    assert len(unified) == 1
+    assert [(d["key_type"], d["key"]) for d in duplicates] == [("GTIN", "00049000028904")] * 2
+
+
+def _validated_rows(count):
+    import json
+
+    rows = []
+    for i in range(count):
+        gtin = f"56012345{i % 40:05d}"
+        rows.append({
+            "gtin": gtin if i % 3 else "",
+            "gtin_valid": "1" if i % 3 else "0",
+            "name": f"ARROZ {i % 25}",
+            "brand": "BOM SUCESSO",
+            "qty": "1",
+            "uom": "KG",
+            "source": ["CONTINENTE_PT", "OPEN_FOOD_FACTS"][i % 2],
+            "source_type": ["supermarket", "open-data"][i % 2],
+            "priority": str(50 + i % 7),
+            "confidence": "0.8",
+            "price_amount": "" if i % 4 else "1.99",
+            "provenance": json.dumps([{"connector": f"c{i % 5}", "query": "arroz"}]),
+        })
+    return rows
+
+
+def test_spill_dedupe_matches_in_memory(tmp_path):
+    from pipeline.dedupe import unify_external, unify_records, write_outputs
+
+    rows = _validated_rows(500)
+    unified, duplicates = unify_records(rows)
+    write_outputs(unified, duplicates, tmp_path / "mem_unified.csv", tmp_path / "mem_dups.csv")
+    counts = unify_external(iter(rows), tmp_path / "ext_unified.csv", tmp_path / "ext_dups.csv", partitions=7)
+
+    assert counts == (len(unified), len(duplicates))
+    assert (tmp_path / "ext_unified.csv").read_text() == (tmp_path / "mem_unified.csv").read_text()
+    assert (tmp_path / "ext_dups.csv").read_text() == (tmp_path / "mem_dups.csv").read_text()
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".dedupe-")]
+
+
+def test_provenance_merge_matches_json_roundtrip(monkeypatch):
+    import json
+
+    from pipeline import dedupe
+
+    def legacy_merge_provenance(base_row, new_row):
+        base_prov = json.loads(base_row.get("provenance", "[]") or "[]")
+        new_prov = json.loads(new_row.get("provenance", "[]") or "[]")
+        seen = {json.dumps(entry, sort_keys=True) for entry in base_prov}
+        for entry in new_prov:
+            key = json.dumps(entry, sort_keys=True)
+            if key not in seen:
+                base_prov.append(entry)
+                seen.add(key)
+        base_row["provenance"] = json.dumps(base_prov, ensure_ascii=False)
+
+    rows = _validated_rows(300)
+    for i, row in enumerate(rows):
+        row["provenance"] = json.dumps(
+            [{"connector": f"c{i % 4}", "online": i % 2 == 0, "n": i % 3}, {"connector": "açúcar", "n": 1.0}],
+            ensure_ascii=False,
+        )
+    fast = dedupe.unify_records([dict(r) for r in rows])
+    monkeypatch.setattr(dedupe, "_merge_provenance", legacy_merge_provenance)
+    legacy = dedupe.unify_records([dict(r) for r in rows])
+    assert fast == legacy
+
+
+def _near_duplicate_rows():
+    base = {"brand": "BOM SUCESSO", "qty": "1", "uom": "KG", "priority": "50", "confidence": "0.8"}
+    return [
+        dict(base, gtin="", gtin_valid="0", name="ARROZ AGULHA 1KG", source="OPEN_FOOD_FACTS", source_type="open-data"),
+        dict(base, gtin="5601234567890", gtin_valid="1", gtin14="05601234567890", name="Arroz Agulha Carolino 1 Kg",
+             source="CONTINENTE_PT", source_type="supermarket"),
+        dict(base, gtin="", gtin_valid="0", name="ARROZ CAROLINO 1KG", source="NOSSUPER_CV", source_type="supermarket"),
+        dict(base, gtin="", gtin_valid="0", name="ARROZ AGULHA CAROLINO", qty="1000", uom="G", source="SHOPRITE_ANG",
+             source_type="supermarket"),
+        dict(base, gtin="", gtin_valid="0", name="ARROZ AGULHA 1KG", brand="CIGALA", source="SHOPRITE_ANG",
+             source_type="supermarket"),
+    ]
+
+
+def test_fuzzy_merge_folds_near_duplicates_into_gtin_rows():
+    from pipeline.dedupe import unify_records
+
+    unified, duplicates = unify_records(_near_duplicate_rows(), fuzzy_threshold=0.6)
+
+    # The CIGALA listing is another brand, so it is never compared.
+    assert [row["name"] for row in unified] == ["Arroz Agulha Carolino 1 Kg", "ARROZ AGULHA 1KG"]
+    assert unified[0]["gtin"] == "5601234567890" and unified[0]["gtin_valid"] == "1"
+    assert [(d["key_type"], d["key"], d["source"], d["score"]) for d in duplicates] == [
+        ("FUZZY", "05601234567890", "OPEN_FOOD_FACTS", "0.667"),
+        ("FUZZY", "05601234567890", "NOSSUPER_CV", "0.667"),
+        ("FUZZY", "05601234567890", "SHOPRITE_ANG", "1.000"),
+    ]
+    assert len(unify_records(_near_duplicate_rows())[0]) == 5
+
+
+def test_fuzzy_spill_dedupe_matches_in_memory(tmp_path):
+    import random
+
+    from pipeline.dedupe import unify_external, unify_records, write_outputs
+
+    rng = random.Random(9)
+    words = ["ARROZ", "AGULHA", "CAROLINO", "VAPORIZADO", "EXTRA", "LONGO", "BIO", "INTEGRAL"]
+    rows = _validated_rows(300)
+    for row in rows:
+        row["name"] = " ".join(rng.sample(words, rng.randint(2, 4)))
+        row["qty"] = rng.choice(["1", "1000", "500"])
+        row["uom"] = {"1": "KG", "1000": "G", "500": "G"}[row["qty"]]
+    unified, duplicates = unify_records([dict(r) for r in rows], fuzzy_threshold=0.7)
+    write_outputs(unified, duplicates, tmp_path / "mem_unified.csv", tmp_path / "mem_dups.csv")
+    counts = unify_external(
+        iter([dict(r) for r in rows]), tmp_path / "ext_unified.csv", tmp_path / "ext_dups.csv", partitions=5,
+        fuzzy_threshold=0.7,
+    )
+
+    assert any(d["key_type"] == "FUZZY" for d in duplicates)
+    assert counts == (len(unified), len(duplicates))
+    assert (tmp_path / "ext_unified.csv").read_text() == (tmp_path / "mem_unified.csv").read_text()
+    assert (tmp_path / "ext_dups.csv").read_text() == (tmp_path / "mem_dups.csv").read_text()
+
+
+def test_spill_budget_bounds_streamed_partitions(tmp_path, monkeypatch):
+    from pipeline import dedupe
+
+    # Streamed input has no size up front; start from one partition so only
+    # the budget check can split it.
+    monkeypatch.setattr(dedupe, "DEFAULT_SPILL_PARTITIONS", 1)
+    rows = _validated_rows(3000)
+    for i, row in enumerate(rows):
+        row["gtin"] = f"56{i:011d}" if row["gtin"] else ""
+        row["name"] = f"ARROZ {i}"
+    unified, duplicates = dedupe.unify_records([dict(r) for r in rows])
+    dedupe.write_outputs(unified, duplicates, tmp_path / "mem_unified.csv", tmp_path / "mem_dups.csv")
+
+    result = dedupe.run_dedupe(
+        output_path=tmp_path / "ext_unified.csv",
+        report_path=tmp_path / "ext_dups.csv",
+        rows=iter([dict(r) for r in rows]),
+        memory_budget_mb=1,
+    )
+
+    assert result.metrics["spill_partitions"] > 1
+    assert "oversized_blocks" not in result.metrics
+    assert (tmp_path / "ext_unified.csv").read_text() == (tmp_path / "mem_unified.csv").read_text()
+    assert (tmp_path / "ext_dups.csv").read_text() == (tmp_path / "mem_dups.csv").read_text()
+
+
+def test_spill_budget_reports_a_block_it_cannot_split(tmp_path):
+    from collections import Counter
+
+    from pipeline.dedupe import unify_external
+
+    # Every row shares brand, unit and quantity: one fuzzy block over budget.
+    rows = _validated_rows(3000)
+    for i, row in enumerate(rows):
+        row["gtin"], row["gtin_valid"], row["name"] = "", "0", f"ARROZ {i}"
+    stats = Counter()
+    unify_external(
+        iter(rows), tmp_path / "unified.csv", tmp_path / "dups.csv", partitions=1, fuzzy_threshold=0.9,
+        memory_budget_mb=1, stats=stats,
+    )
+
+    assert stats["spill_partitions"] > 1
+    assert stats["oversized_blocks"] == 1
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from scripts.python import validate_gtin
+from scripts.python.validate_gtin import valid_gtin, valid_gtins
+from pipeline.validate import validate_rows
+
+CODES = [
+    "5601234567890",
+    "5601234000012",
+    "96385074",
+    "036000291452",
+    "10036000291459",
+    "5601234000013",
+    "",
+    "ABC",
+    "123",
+    "٥٦٠١٢٣٤٠٠٠٠١٢",
+    "5601234 00001",
+]
+
+
+def _random_codes(count, seed=5):
+    rng = random.Random(seed)
+    return ["".join(rng.choice("0123456789") for _ in range(rng.choice((8, 12, 13, 14, 11)))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("numpy_enabled", [True, False])
+def test_batch_matches_scalar(monkeypatch, numpy_enabled):
+    if numpy_enabled:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(validate_gtin, "np", None)
+    codes = CODES + _random_codes(3000)
+
+    assert valid_gtins(codes) == [bool(code) and valid_gtin(code) for code in codes]
+
+
+def test_validate_rows_flags_each_row_in_batches():
+    rows = [{"gtin": f" {code} "} for code in CODES]
+
+    out = list(validate_rows(rows, batch_size=4))
+
+    assert [row["gtin_valid"] for row in out] == ["1" if code and valid_gtin(code) else "0" for code in CODES]
+    assert out[2]["gtin_valid"] == "1" and out[5]["gtin_valid"] == "0"
+
+
+def test_script_and_pipeline_derive_the_same_gtin14(tmp_path):
+    import csv
+
+    source, target = tmp_path / "in.csv", tmp_path / "out.csv"
+    source.write_text("gtin\n" + "".join(f" {code} \n" for code in CODES), encoding="utf-8")
+
+    validate_gtin.process_file(str(source), str(target))
+
+    with target.open(newline="", encoding="utf-8") as fh:
+        script = [(row["gtin_valid"], row["gtin14"]) for row in csv.DictReader(fh)]
+    pipeline = [(row["gtin_valid"], row["gtin14"]) for row in validate_rows({"gtin": f" {code} "} for code in CODES)]
+    assert script == pipeline
+    assert script[3] == ("1", "00036000291452")